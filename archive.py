@@ -0,0 +1,390 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Compact binary archive of games played with the rules of this engine
+#
+# Usage:
+#   python archive.py convert SGF_FILES_OR_DIRECTORIES [...] --output games.goa
+#   python archive.py info games.goa
+#
+# Layout of the file (all numbers little-endian):
+#
+#   file header   magic 'GOARCHV1', nr. of games (uint32), offset of the index (uint64)
+#   games         per game: size (uint8), flags (uint8, 1 = game over),
+#                 length of the names of black and white and of the result
+#                 (3 x uint16), nr. of moves (uint32), the three UTF-8 strings
+#                 and one uint16 code per move: y * size + x, PASS for a pass
+#   index         offset of each game (uint64)
+#
+# Black always moves first and the colors alternate, like in the model.
+# The file is read through mmap: a game or the first moves of a game are
+# unpacked straight from the mapped file without reading the rest.
+
+from __future__ import print_function
+
+import argparse
+import mmap
+import struct
+
+from game_model import Model, BLACK, WHITE
+
+# file extension of the archives
+EXTENSION = '.goa'
+
+MAGIC = b'GOARCHV1'
+
+# move code of a pass
+PASS = 0xFFFF
+
+# magic, nr. of games and offset of the index
+FILE_HEADER = struct.Struct('<8sIQ')
+
+# size, flags, length of the names and the result, nr. of moves
+GAME_HEADER = struct.Struct('<BBHHHI')
+
+# offset of a game in the index
+INDEX_ENTRY = struct.Struct('<Q')
+
+# flags of a game
+GAME_OVER = 1
+
+
+def _encode(text):
+    """Returns the UTF-8 bytes of a name or result.
+
+    Arguments:
+        text (str): the text, None for an empty one
+
+    Returns:
+        (bytes): encoded text
+    """
+    if text is None:
+        return b''
+
+    if isinstance(text, bytes):
+        return text
+
+    return text.encode('utf-8')
+
+
+class ArchiveWriter(object):
+    """Writes games one by one to a new archive. The index is written by close()."""
+
+    def __init__(self, path):
+        """Creates the archive file.
+
+        Arguments:
+            path (str): path of the new archive
+
+        Attributes initialized by this function:
+            self.file
+            self.offsets
+        """
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, 0, 0))
+
+        # offset of each game for the index
+        self.offsets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, size, codes, black=None, white=None, result=None, game_over=False):
+        """Appends a game.
+
+        Arguments:
+            size (int): size of the grid
+            codes (list): move codes, y * size + x or PASS
+            black (str): name of the black player
+            white (str): name of the white player
+            result (str): result in SGF notation, e.g. 'B+3'
+            game_over (boolean): both players have passed at the end
+
+        Returns:
+            (int): nr. of the game in the archive
+
+        Variables changed by this function:
+            self.offsets
+        """
+        if not 1 <= size <= 255 or size * size > PASS:
+            raise ValueError('unsupported board size %d' % size)
+
+        black, white, result = _encode(black), _encode(white), _encode(result)
+
+        self.offsets.append(self.file.tell())
+        self.file.write(GAME_HEADER.pack(size, GAME_OVER if game_over else 0,
+                                         len(black), len(white), len(result), len(codes)))
+        self.file.write(black + white + result)
+        self.file.write(struct.pack('<%dH' % len(codes), *codes))
+
+        return len(self.offsets) - 1
+
+    def add_model(self, model, black=None, white=None, result=None):
+        """Appends the moves that have been played on a model.
+
+        Arguments:
+            model (Model): the game
+            black (str): name of the black player
+            white (str): name of the white player
+            result (str): result in SGF notation, e.g. 'B+3'
+
+        Returns:
+            (int): nr. of the game in the archive
+        """
+        n = model.size
+        codes = []
+
+        # the journal holds the point of each move, None for a pass
+        for p, killed, previous, key in model.journal:
+            if p is None:
+                codes.append(PASS)
+            else:
+                x, y = model._coords(p)
+                codes.append(y * n + x)
+
+        return self.add(n, codes, black, white, result, model.is_game_over())
+
+    def close(self):
+        """Writes the index and the file header and closes the file.
+
+        Variables changed by this function:
+            self.file
+        """
+        if self.file.closed:
+            return
+
+        index = self.file.tell()
+
+        for offset in self.offsets:
+            self.file.write(INDEX_ENTRY.pack(offset))
+
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(MAGIC, len(self.offsets), index))
+        self.file.close()
+
+
+class Archive(object):
+    """Random access to the games of an archive through mmap."""
+
+    def __init__(self, path):
+        """Maps the archive into memory and reads the file header.
+
+        Arguments:
+            path (str): path of the archive
+
+        Attributes initialized by this function:
+            self.path
+            self.map
+            self.games
+            self.index
+        """
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.map) < FILE_HEADER.size:
+            self.map.close()
+            raise ValueError('%s is not a game archive' % path)
+
+        magic, self.games, self.index = FILE_HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC or self.index + self.games * INDEX_ENTRY.size > len(self.map):
+            self.map.close()
+            raise ValueError('%s is not a game archive or it is incomplete' % path)
+
+    def __len__(self):
+        return self.games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Unmaps the file.
+
+        Variables changed by this function:
+            self.map
+        """
+        self.map.close()
+
+    def _locate(self, i):
+        """Returns the offset and the header of a game.
+
+        Arguments:
+            i (int): nr. of the game
+
+        Returns:
+            offset (int): offset of the game
+            fields (tuple): the fields of GAME_HEADER
+        """
+        if not 0 <= i < self.games:
+            raise IndexError('game %d is not in the archive' % i)
+
+        offset = INDEX_ENTRY.unpack_from(self.map, self.index + i * INDEX_ENTRY.size)[0]
+
+        return offset, GAME_HEADER.unpack_from(self.map, offset)
+
+    def header(self, i):
+        """Returns the information about a game.
+
+        Arguments:
+            i (int): nr. of the game
+
+        Returns:
+            (dictionary): 'size', 'black', 'white', 'result', 'moves' and 'game_over'
+        """
+        offset, (size, flags, black, white, result, moves) = self._locate(i)
+        start = offset + GAME_HEADER.size
+
+        # the lengths are in bytes, split the bytes before decoding
+        names = [self.map[a:b].decode('utf-8', 'replace') or None for a, b in (
+            (start, start + black),
+            (start + black, start + black + white),
+            (start + black + white, start + black + white + result))]
+
+        return {
+            'size'      : size,
+            'black'     : names[0],
+            'white'     : names[1],
+            'result'    : names[2],
+            'moves'     : moves,
+            'game_over' : bool(flags & GAME_OVER)
+        }
+
+    def codes(self, i, limit=None):
+        """Returns the move codes of a game, unpacked from the mapped file.
+
+        Arguments:
+            i (int): nr. of the game
+            limit (int): only the first moves, all moves if None
+
+        Returns:
+            (tuple): move codes, y * size + x or PASS
+        """
+        offset, (size, flags, black, white, result, moves) = self._locate(i)
+
+        if limit is not None:
+            moves = min(moves, limit)
+
+        return struct.unpack_from('<%dH' % moves, self.map, offset + GAME_HEADER.size + black + white + result)
+
+    def moves(self, i, limit=None):
+        """Returns the moves of a game with their colors.
+
+        Arguments:
+            i (int): nr. of the game
+            limit (int): only the first moves, all moves if None
+
+        Returns:
+            list (tuple): color (BLACK / WHITE) and x, y coordinate or None for a pass
+        """
+        n = self._locate(i)[1][0]
+
+        return [(BLACK if k % 2 == 0 else WHITE, None if code == PASS else (code % n, code // n))
+                for k, code in enumerate(self.codes(i, limit))]
+
+    def replay(self, i, limit=None):
+        """Plays the moves of a game on a new model.
+
+        Arguments:
+            i (int): nr. of the game
+            limit (int): only the first moves, all moves if None
+
+        Returns:
+            (Model): the game after the moves, the territory is not marked
+        """
+        model = Model(self._locate(i)[1][0])
+
+        for number, (color, move) in enumerate(self.moves(i, limit), 1):
+            if model.is_game_over():
+                raise ValueError('move %d: the game is already over' % number)
+
+            if move is None:
+                model.passing()
+            elif not model.place_stone(move[0], move[1]):
+                raise ValueError('move %d: illegal move at %d, %d' % (number, move[0], move[1]))
+
+        return model
+
+
+def convert(paths, output):
+    """Converts SGF files into an archive. Games the archive cannot hold
+    (setup stones, moves out of turn) or that cannot be parsed are skipped.
+
+    Arguments:
+        paths (list): SGF files and directories
+        output (str): path of the new archive
+
+    Returns:
+        (dictionary): nr. of 'games' written and of 'skipped' games or files
+    """
+    import sgf
+    from replay import find_files
+
+    summary = {'games': 0, 'skipped': 0}
+
+    with ArchiveWriter(output) as writer:
+        for path in find_files(paths):
+            if path.endswith(EXTENSION):
+                continue
+
+            try:
+                with open(path, 'rb') as f:
+                    for nodes in sgf.read(f):
+                        try:
+                            header = sgf.info(nodes)
+                            moves = sgf.moves(nodes)
+                        except ValueError:
+                            summary['skipped'] += 1
+                            continue
+
+                        n = header['size']
+
+                        # the colors must alternate, starting with black
+                        if any([color != (BLACK if k % 2 == 0 else WHITE) for k, (color, move) in enumerate(moves)]):
+                            summary['skipped'] += 1
+                            continue
+
+                        codes = [PASS if move is None else move[1] * n + move[0] for color, move in moves]
+                        game_over = len(moves) > 1 and moves[-1][1] is None and moves[-2][1] is None
+
+                        writer.add(n, codes, header['black'], header['white'], header['result'], game_over)
+                        summary['games'] += 1
+            except (IOError, OSError, ValueError):
+                # the games before the error have been written
+                summary['skipped'] += 1
+
+    return summary
+
+
+def main():
+    """Parses the command line and converts or describes archives."""
+    parser = argparse.ArgumentParser(description='Binary archive of Go games.')
+    commands = parser.add_subparsers(dest='command')
+
+    to_archive = commands.add_parser('convert', help='convert SGF files into an archive')
+    to_archive.add_argument('paths', nargs='+', help='SGF files or directories')
+    to_archive.add_argument('--output', required=True, help='path of the new archive')
+
+    describe = commands.add_parser('info', help='nr. of games and moves in an archive')
+    describe.add_argument('archive')
+
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        summary = convert(args.paths, args.output)
+        print('{games} games written, {skipped} skipped'.format(**summary))
+    elif args.command == 'info':
+        with Archive(args.archive) as archive:
+            moves = sum([archive.header(i)['moves'] for i in range(len(archive))])
+            print('%d games, %d moves' % (len(archive), moves))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Batched model of the Go game: N games on stacked NumPy planes
+#
+# Requires NumPy (pip install numpy). All games are stepped at once by
+# BatchModel.step(), which applies one move per game with the same
+# rules as game_model.Model.place_stone() and Model.passing().
+
+import numpy as np
+
+from game_model import BLACK, WHITE, POSITIONAL, SITUATIONAL, TURN_KEY, zobrist_keys
+
+# move code of a pass
+PASS = -1
+
+
+def neighbors(planes, stride):
+    """Returns the fields that are a direct neighbor of a field in the planes.
+
+    Arguments:
+        planes (ndarray): boolean planes, shape (games, fields)
+        stride (int): length of a row on the padded board
+
+    Returns:
+        (ndarray): boolean planes of the neighbors (including padding)
+    """
+    grown = np.zeros_like(planes)
+    grown[:, 1:] |= planes[:, :-1]
+    grown[:, :-1] |= planes[:, 1:]
+    grown[:, stride:] |= planes[:, :-stride]
+    grown[:, :-stride] |= planes[:, stride:]
+
+    return grown
+
+
+def flood(seed, mask, stride):
+    """Grows the seeds within the mask of each game until they reach all
+    connected fields.
+
+    Arguments:
+        seed (ndarray): boolean planes of the starting fields
+        mask (ndarray): boolean planes of the fields that may be reached
+        stride (int): length of a row on the padded board
+
+    Returns:
+        (ndarray): boolean planes of all fields in mask connected to the seed
+    """
+    region = seed & mask
+    count = region.sum()
+
+    while True:
+        region |= neighbors(region, stride)
+        region &= mask
+        grown = region.sum()
+
+        if grown == count:
+            return region
+
+        count = grown
+
+
+class BatchModel(object):
+    """Plays N games of the same size side by side.
+    The state of all games is kept in arrays with the game as first axis.
+    Each board is stored as a flat row of n x (n + 1) fields, the last
+    field of each line is padding, so the neighbors of all games are
+    found by shifting one contiguous array.
+    Moves are given as field index y * n + x or PASS.
+    """
+    def __init__(self, games, n=9, superko=POSITIONAL):
+        """This function initializes N new games.
+
+        Arguments:
+            games (int) - nr. of games
+            n (int) - size of the grid
+            superko (str) - POSITIONAL, SITUATIONAL or None (simple ko only)
+
+        Attributes initialized by this function:
+            self.games
+            self.size
+            self.stride
+            self.superko
+            self.on_board
+            self.keys
+            self.black
+            self.white
+            self.turn
+            self.blocked_field
+            self.has_passed
+            self.game_over
+            self.captured
+            self.final_score
+            self.hash
+            self.history
+        """
+        self.games = games
+        self.size = n
+        self.stride = n + 1
+        self.superko = superko
+
+        # fields of the padded rows that are on the board
+        fields = np.arange(n * self.stride)
+        x, y = fields % self.stride, fields // self.stride
+        self.on_board = x < n
+
+        # zobrist keys of game_model.Model for each field, 0 on the padding
+        keys = zobrist_keys(n)
+        points = np.where(self.on_board, (y + 1) * (n + 2) + x + 1, 0)
+        self.keys = (None,
+                     np.where(self.on_board, np.array(keys[1], dtype=np.uint64)[points], np.uint64(0)),
+                     np.where(self.on_board, np.array(keys[2], dtype=np.uint64)[points], np.uint64(0)))
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Starts new games.
+
+        Arguments:
+            mask (ndarray): boolean array of the games to restart, all games if None
+
+        Variables changed by this function:
+            self.black
+            self.white
+            self.turn
+            self.blocked_field
+            self.has_passed
+            self.game_over
+            self.captured
+            self.final_score
+            self.hash
+            self.history
+        """
+        N = self.games
+
+        if mask is None:
+            self.black = np.zeros((N, self.on_board.size), dtype=bool)
+            self.white = np.zeros((N, self.on_board.size), dtype=bool)
+            self.turn = np.ones(N, dtype=bool)
+            self.blocked_field = np.full(N, PASS)
+            self.has_passed = np.zeros(N, dtype=bool)
+            self.game_over = np.zeros(N, dtype=bool)
+            self.captured = np.zeros((N, 2), dtype=int)
+            self.final_score = np.zeros((N, 2), dtype=int)
+            self.hash = np.zeros(N, dtype=np.uint64)
+            self.history = [None] * N
+            mask = np.ones(N, dtype=bool)
+        else:
+            self.black[mask] = False
+            self.white[mask] = False
+            self.turn[mask] = BLACK
+            self.blocked_field[mask] = PASS
+            self.has_passed[mask] = False
+            self.game_over[mask] = False
+            self.captured[mask] = 0
+            self.hash[mask] = 0
+
+        for i in np.nonzero(mask)[0]:
+            self.history[i] = set([self._history_key(0, BLACK)])
+
+    def _history_key(self, h, turn):
+        """Returns the key under which a position is stored in the history.
+
+        Arguments:
+            h (int): zobrist hash of the stones on the board
+            turn (boolean): color of the player to move
+
+        Returns:
+            (int): the hash, including the player to move for situational superko
+        """
+        if self.superko == SITUATIONAL and turn == BLACK:
+            return h ^ TURN_KEY
+
+        return h
+
+    def stones(self):
+        """Returns the boards of all games.
+
+        Returns:
+            (ndarray): shape (games, n, n), 0 for empty fields, 1 for white and 2 for black stones
+        """
+        N, n = self.games, self.size
+        codes = self.black * 2 + self.white * 1
+
+        return codes.reshape(N, n, self.stride)[:, :, :n].astype(np.int8)
+
+    def step(self, moves):
+        """Plays one move (or pass) in every game.
+        Invalid moves (also fields off the board) and moves in finished games
+        do not change anything, the player has to move again like after
+        Model.place_stone() returned False.
+
+        Arguments:
+            moves (array): field index y * n + x or PASS for each game
+
+        Returns:
+            (dictionary): arrays with one entry per game:
+                'valid'     : the move has been played
+                'captures'  : nr. of stones killed by the move
+                'passed'    : the player has passed
+                'game_over' : both players have passed
+                'score'     : [White, Black] like Model.get_data()
+        """
+        N, n, stride = self.games, self.size, self.stride
+        moves = np.asarray(moves)
+        games = np.arange(N)
+
+        running = ~self.game_over
+        passes = running & (moves == PASS)
+        plays = running & (moves >= 0) & (moves < n * n)
+
+        ######################################
+        # Move Validation
+        ######################################
+
+        move = np.where(plays, moves, 0)
+        field = move + move // n
+
+        # the position must be free and not blocked by the ko-rule
+        free = ~(self.black[games, field] | self.white[games, field])
+        plays &= free & (move != self.blocked_field)
+
+        stone = np.zeros(self.black.shape, dtype=bool)
+        stone[games, field] = plays
+
+        turn = self.turn[:, None]
+        before = np.where(turn, self.black, self.white)
+        own = before | stone
+        enemy = np.where(turn, self.white, self.black)
+        empty = self.on_board & ~(own | enemy)
+
+        # enemy stones that are not connected to an empty field are killed
+        # (only groups touching the new stone can lose their last liberty)
+        killed = enemy & ~flood(neighbors(empty, stride) & enemy, enemy, stride)
+
+        # the new group needs a liberty after the enemy stones are removed
+        empty |= killed
+        alive = flood(neighbors(empty, stride) & own, own, stride)
+        plays &= alive[games, field]
+
+        # new hash of the position
+        zero = np.uint64(0)
+        keys = np.where(self.turn, self.keys[2][field], self.keys[1][field])
+        new_hash = self.hash ^ np.where(plays, keys, zero)
+
+        # only the few games with captures need the keys of the killed stones
+        rows = np.nonzero(killed.any(axis=1))[0]
+
+        if rows.size:
+            enemy_keys = np.where(self.turn[rows, None], self.keys[1], self.keys[2])
+            new_hash[rows] ^= np.bitwise_xor.reduce(np.where(killed[rows], enemy_keys, zero), axis=1)
+
+        # superko-rule: the resulting position must be new
+        if self.superko is not None:
+            hashes, turns = new_hash.tolist(), self.turn.tolist()
+
+            for i in np.nonzero(plays)[0].tolist():
+                if self._history_key(hashes[i], not turns[i]) in self.history[i]:
+                    plays[i] = False
+
+        ######################################
+        # Move Execution (only if valid)
+        ######################################
+
+        killed &= plays[:, None]
+        own = before | (stone & plays[:, None])
+        enemy &= ~killed
+
+        self.black = np.where(turn, own, enemy)
+        self.white = np.where(turn, enemy, own)
+        self.hash = np.where(plays, new_hash, self.hash)
+
+        captures = killed.sum(axis=1)
+        self.captured[games, self.turn.astype(int)] += captures
+
+        # ko-rule: a single stone without neighbors of the same color
+        # has killed a single stone
+        single = ~(neighbors(stone, stride) & before).any(axis=1)
+        ko = plays & (captures == 1) & single
+        ko_field = killed.argmax(axis=1)
+        blocked = np.where(plays | passes, PASS, self.blocked_field)
+        self.blocked_field = np.where(ko, ko_field - ko_field // stride, blocked)
+
+        # both players pass => game over
+        ended = passes & self.has_passed
+        passes &= ~ended
+        self.game_over |= ended
+        self.has_passed = np.where(plays, False, self.has_passed | passes)
+
+        # switch the color (turn)
+        self.turn ^= plays | passes
+
+        hashes, turns = self.hash.tolist(), self.turn.tolist()
+
+        for i in np.nonzero(plays | passes)[0].tolist():
+            self.history[i].add(self._history_key(hashes[i], turns[i]))
+
+        # score of the finished games
+        if ended.any():
+            white, black = self.territory(ended)
+            self.final_score[ended, int(WHITE)] = white.sum(axis=1)
+            self.final_score[ended, int(BLACK)] = black.sum(axis=1)
+
+        return {
+            'valid'     : plays | passes | ended,
+            'captures'  : captures,
+            'passed'    : passes | ended,
+            'game_over' : self.game_over.copy(),
+            'score'     : self.scores()
+        }
+
+    def territory(self, mask=None):
+        """Finds the empty areas that are reached from the stones of only one color,
+        like Model.find_territory() without Benson's algorithm.
+
+        Arguments:
+            mask (ndarray): boolean array of the games, all games if None
+
+        Returns:
+            tuple (ndarray): boolean planes of the territory of white and black
+        """
+        if mask is None:
+            mask = slice(None)
+
+        black, white = self.black[mask], self.white[mask]
+        empty = self.on_board & ~(black | white)
+
+        reached_black = flood(neighbors(black, self.stride) & empty, empty, self.stride)
+        reached_white = flood(neighbors(white, self.stride) & empty, empty, self.stride)
+
+        return reached_white & ~reached_black, reached_black & ~reached_white
+
+    def scores(self):
+        """Returns the scores of all games: the captured stones and, for
+        finished games, the territory found by territory().
+
+        Returns:
+            (ndarray): int array of shape (games, 2), [White, Black] per game
+        """
+        return self.captured + np.where(self.game_over[:, None], self.final_score, 0)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Benchmarks for the game model of the Go game
+#
+# Usage:
+#   python benchmark.py clone [--sizes 9 19 52]
+#   python benchmark.py batch [--games 256] [--size 9]    (requires NumPy)
+#   python benchmark.py playout [--sizes 9 13 19] [--profile]
+#   python benchmark.py parallel [--workers 1 2 4 8 16] [--size 9]
+#   python benchmark.py table [--sizes 5 7] [--entries 500 5000 50000]
+#   python benchmark.py ownership [--sizes 9 19] [--playouts N] [--workers 1]
+
+from __future__ import print_function
+
+import argparse
+import copy
+import pickle
+import random
+import time
+
+from game_model import Model
+
+
+def random_position(n, moves=None, seed=0):
+    """Plays random moves on a new board to get a typical position.
+
+    Arguments:
+        n (int): size of the grid
+        moves (int): nr. of attempted moves, defaults to half the board
+        seed (int): seed of the random generator
+
+    Returns:
+        (Model): the model after the moves
+    """
+    rnd = random.Random(seed)
+    model = Model(n)
+
+    if moves is None:
+        moves = n * n // 2
+
+    for i in range(moves):
+        model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+    return model
+
+
+def measure(func, number):
+    """Measures the time of a function call (best of three runs).
+
+    Arguments:
+        func (function): function without arguments
+        number (int): nr. of calls per run
+
+    Returns:
+        (float): seconds per call
+    """
+    best = None
+
+    for run in range(3):
+        start = time.time()
+
+        for i in range(number):
+            func()
+
+        elapsed = (time.time() - start) / number
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def bench_clone(sizes, number):
+    """Compares Model.clone() with copy.deepcopy() and reports the
+    size of a pickled position.
+
+    Arguments:
+        sizes (list): board sizes
+        number (int): nr. of copies per run
+    """
+    print('{:>7} {:>12} {:>12} {:>8} {:>12}'.format('board', 'clone', 'deepcopy', 'speedup', 'pickle'))
+
+    for n in sizes:
+        model = random_position(n)
+
+        t_clone = measure(model.clone, number)
+        t_deepcopy = measure(lambda: copy.deepcopy(model), number)
+        size = len(pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+
+        print('{:>7} {:>9.1f} us {:>9.1f} us {:>7.1f}x {:>6} bytes'.format(
+            '%dx%d' % (n, n), t_clone * 1e6, t_deepcopy * 1e6, t_deepcopy / t_clone, size))
+
+
+def random_moves(games, n, steps, seed=0):
+    """Generates random moves (or passes) for games played side by side.
+
+    Arguments:
+        games (int): nr. of games played side by side
+        n (int): size of the grid
+        steps (int): nr. of moves per game
+        seed (int): seed of the random generator
+
+    Returns:
+        list: one list of moves (y * n + x or -1 for a pass) per step
+    """
+    rnd = random.Random(seed)
+
+    return [[-1 if rnd.random() < 0.05 else rnd.randrange(n * n) for j in range(games)]
+            for i in range(steps)]
+
+
+def bench_batch(games, n, steps):
+    """Compares the games per second of BatchModel.step() with the same
+    games played one by one on Model instances. Finished games are
+    restarted right away.
+
+    Arguments:
+        games (int): nr. of games played side by side
+        n (int): size of the grid
+        steps (int): nr. of moves per game
+    """
+    from batch import BatchModel, PASS
+
+    engine = BatchModel(games, n)
+
+    def step_batch(moves):
+        over = engine.step(moves)['game_over']
+        engine.reset(over)
+        return int(over.sum())
+
+    models = [Model(n) for i in range(games)]
+
+    def step_models(moves):
+        finished = 0
+
+        for i, move in enumerate(moves):
+            model = models[i]
+
+            if move == PASS:
+                model.passing()
+            else:
+                model.place_stone(move % n, move // n)
+
+            if model.game_over:
+                models[i] = Model(n)
+                finished += 1
+
+        return finished
+
+    print('{:>10} {:>8} {:>12} {:>12}'.format('engine', 'games', 'moves/s', 'games/s'))
+
+    moves = random_moves(games, n, steps)
+
+    for name, step in (('Model', step_models), ('BatchModel', step_batch)):
+        start = time.time()
+        finished = sum([step(m) for m in moves])
+        elapsed = time.time() - start
+
+        print('{:>10} {:>8} {:>12.0f} {:>12.1f}'.format(
+            name, games, games * steps / elapsed, finished / elapsed))
+
+
+def bench_playout(sizes, seconds, profile=False):
+    """Reports the random playouts per second from an empty board.
+    With profile, the functions with the most own time are listed
+    for each board size (the rate is lower under the profiler).
+
+    Arguments:
+        sizes (list): board sizes
+        seconds (float): minimum duration per board size
+        profile (boolean): run the playouts under cProfile
+    """
+    import cProfile
+    import pstats
+
+    from playout import playout
+
+    rnd = random.Random(0)
+
+    print('{:>7} {:>10} {:>12}'.format('board', 'playouts', 'playouts/s'))
+
+    for n in sizes:
+        model = Model(n)
+        profiler = cProfile.Profile() if profile else None
+        count = 0
+        start = time.time()
+
+        while time.time() - start < seconds:
+            if profiler is not None:
+                profiler.runcall(playout, model, rnd)
+            else:
+                playout(model, rnd)
+            count += 1
+
+        elapsed = time.time() - start
+
+        print('{:>7} {:>10} {:>12.0f}'.format('%dx%d' % (n, n), count, count / elapsed))
+
+        if profiler is not None:
+            pstats.Stats(profiler).sort_stats('tottime').print_stats(8)
+
+
+def bench_parallel(workers, n, seconds):
+    """Reports the playouts per second of the root parallel search and
+    the scaling efficiency compared to one process.
+
+    Arguments:
+        workers (list): nr. of processes to measure
+        n (int): size of the grid
+        seconds (float): search time per measurement
+    """
+    from mcts import RootParallelMCTS
+
+    model = random_position(n, n * n // 4)
+    base = None
+
+    print('{:>8} {:>10} {:>12} {:>10} {:>11}'.format('workers', 'playouts', 'playouts/s', 'speedup', 'efficiency'))
+
+    for count in workers:
+        search = RootParallelMCTS(count, seconds=seconds, seed=0)
+
+        search.start()
+        start = time.time()
+        search.search(model)
+        elapsed = time.time() - start
+        search.close()
+
+        rate = search.count / elapsed
+
+        if base is None:
+            base = rate / count
+
+        print('{:>8} {:>10} {:>12.0f} {:>9.2f}x {:>10.0f}%'.format(
+            count, search.count, rate, rate / base, 100 * rate / (base * count)))
+
+
+def bench_table(sizes, entries, playouts, moves):
+    """Reports the counters of the transposition table of the MCTS for
+    different table sizes: the search plays a few moves on its own.
+    A position is only found again if the tree reaches it through two
+    move orders, at least three moves deep: with a few thousand playouts
+    per move this happens on small boards, on 9x9 and larger the tree
+    is too shallow and (almost) every lookup misses.
+
+    Arguments:
+        sizes (list): board sizes
+        entries (list): maximum nr. of entries of the table
+        playouts (int): nr. of playouts per move
+        moves (int): nr. of moves played
+    """
+    from mcts import MCTS
+    from transposition import TranspositionTable, ENTRY_BYTES
+
+    print('{:>7} {:>8} {:>9} {:>9} {:>9} {:>10} {:>9}'.format(
+        'board', 'entries', 'memory', 'hits', 'misses', 'evictions', 'hit rate'))
+
+    for n in sizes:
+        for count in entries:
+            table = TranspositionTable(count)
+            search = MCTS(playouts=playouts, seed=0, table=table)
+            model = Model(n)
+
+            for i in range(moves):
+                move = search.search(model)
+
+                if move is None:
+                    model.passing()
+                else:
+                    model.place_stone(*move)
+
+                search.advance(move)
+
+            stats = table.stats()
+
+            print('{:>7} {:>8} {:>6.1f} MB {:>9} {:>9} {:>10} {:>8.1f}%'.format(
+                '%dx%d' % (n, n), count, count * ENTRY_BYTES / 1048576.0, stats['hits'],
+                stats['misses'], stats['evictions'], 100 * stats['hit_rate']))
+
+
+def bench_ownership(sizes, playouts, workers):
+    """Reports the time of the end of game scoring with the Monte Carlo
+    ownership estimation. The positions are unfinished random games.
+
+    Arguments:
+        sizes (list): board sizes
+        playouts (int): maximum nr. of playouts, None for the
+                        nr. of the end of game scoring
+        workers (int): nr. of processes
+    """
+    from playout import ownership, playout, scoring_playouts
+
+    print('{:>7} {:>10} {:>10}'.format('board', 'playouts', 'time'))
+
+    for n in sizes:
+        # a random game stopped at about two thirds of the board
+        model = playout(Model(n), random.Random(0), max_moves=2 * n * n // 3)
+        model.territory = [[None for x in range(n)] for y in range(n)]
+
+        maximum = scoring_playouts(n) if playouts is None else playouts
+
+        start = time.time()
+        done = ownership(model, maximum, workers=workers, seed=0)[1]
+        elapsed = time.time() - start
+
+        print('{:>7} {:>10} {:>8.2f} s'.format('%dx%d' % (n, n), done, elapsed))
+
+
+def main():
+    """Parses the command line and runs the selected benchmark."""
+    parser = argparse.ArgumentParser(description='Benchmarks for the Go game model.')
+    commands = parser.add_subparsers(dest='command')
+
+    clone = commands.add_parser('clone', help='Model.clone() against copy.deepcopy()')
+    clone.add_argument('--sizes', type=int, nargs='+', default=[9, 19, 52])
+    clone.add_argument('--number', type=int, default=200)
+
+    batch = commands.add_parser('batch', help='BatchModel.step() against single Model instances')
+    batch.add_argument('--games', type=int, default=256)
+    batch.add_argument('--size', type=int, default=9)
+    batch.add_argument('--steps', type=int, default=400)
+
+    playouts = commands.add_parser('playout', help='random playouts per second')
+    playouts.add_argument('--sizes', type=int, nargs='+', default=[9, 13, 19])
+    playouts.add_argument('--seconds', type=float, default=2.0)
+    playouts.add_argument('--profile', action='store_true')
+
+    parallel = commands.add_parser('parallel', help='scaling of the root parallel MCTS')
+    parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parallel.add_argument('--size', type=int, default=9)
+    parallel.add_argument('--seconds', type=float, default=4.0)
+
+    table = commands.add_parser('table', help='counters of the MCTS transposition table')
+    table.add_argument('--sizes', type=int, nargs='+', default=[5, 7])
+    table.add_argument('--entries', type=int, nargs='+', default=[500, 5000, 50000])
+    table.add_argument('--playouts', type=int, default=2000)
+    table.add_argument('--moves', type=int, default=15)
+
+    owners = commands.add_parser('ownership', help='time of the Monte Carlo dead stone detection')
+    owners.add_argument('--sizes', type=int, nargs='+', default=[9, 19])
+    owners.add_argument('--playouts', type=int, default=None)
+    owners.add_argument('--workers', type=int, default=1)
+
+    args = parser.parse_args()
+
+    if args.command == 'clone':
+        bench_clone(args.sizes, args.number)
+    elif args.command == 'batch':
+        bench_batch(args.games, args.size, args.steps)
+    elif args.command == 'playout':
+        bench_playout(args.sizes, args.seconds, args.profile)
+    elif args.command == 'parallel':
+        bench_parallel(args.workers, args.size, args.seconds)
+    elif args.command == 'table':
+        bench_table(args.sizes, args.entries, args.playouts, args.moves)
+    elif args.command == 'ownership':
+        bench_ownership(args.sizes, args.playouts, args.workers)
+
+
+if __name__ == '__main__':
+    main()
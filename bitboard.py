@@ -0,0 +1,596 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Alternative model of the Go game on NumPy boolean planes
+#
+# Requires NumPy (pip install numpy). It plays and scores games with the
+# same rules and the same methods as game_model.Model (place_stone,
+# passing, is_legal, legal_moves, get_data, estimate, mark_territory and
+# find_territory), but liberties, captures and territory are found with
+# shifts and flood fills over whole boolean planes instead of loops over
+# single points. This pays off on large boards and for analysis of the
+# whole board.
+#
+# It is not a replacement of Model for the controllers: undo(), redo(),
+# get_changes() and position_hash() are not implemented.
+
+import numpy as np
+
+from game_model import BLACK, WHITE, COLORS, POSITIONAL, SITUATIONAL, TURN_KEY, Snapshot, zobrist_keys
+
+
+def neighbors(mask):
+    """Returns the fields that are a direct neighbor of a field in the mask.
+
+    Arguments:
+        mask (ndarray): boolean plane
+
+    Returns:
+        (ndarray): boolean plane of the neighbors
+    """
+    grown = np.zeros_like(mask)
+    grown[1:, :] |= mask[:-1, :]
+    grown[:-1, :] |= mask[1:, :]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+
+    return grown
+
+
+def dilate(mask):
+    """Returns the mask grown by the four direct neighbors of each field.
+
+    Arguments:
+        mask (ndarray): boolean plane
+
+    Returns:
+        (ndarray): boolean plane containing mask and its neighbors
+    """
+    return mask | neighbors(mask)
+
+
+def flood(seed, mask):
+    """Grows the seed within the mask until it reaches all connected fields.
+
+    Arguments:
+        seed (ndarray): boolean plane of the starting fields
+        mask (ndarray): boolean plane of the fields that may be reached
+
+    Returns:
+        (ndarray): boolean plane of all fields in mask connected to the seed
+    """
+    region = seed & mask
+    count = region.sum()
+
+    while True:
+        region = dilate(region) & mask
+        grown = region.sum()
+
+        if grown == count:
+            return region
+
+        count = grown
+
+
+class BitboardModel(object):
+    """Game logic of the Go game on the boolean planes black, white and empty.
+    Plays and scores a game like game_model.Model, without undo() / redo(),
+    get_changes() and position_hash() (see the top of the module).
+    """
+    def __init__(self, n=11, superko=POSITIONAL):
+        """This function initializes a new model.
+
+        Arguments:
+            n (int) - size of the grid
+            superko (str) - POSITIONAL, SITUATIONAL or None (simple ko only)
+
+        Attributes initialized by this function:
+            self.size
+            self.turn
+            self.blocked_field
+            self.superko
+            self.has_passed
+            self.game_over
+            self.black
+            self.white
+            self.keys
+            self.hash
+            self.history
+            self.territory_black
+            self.territory_white
+            self.score
+            self.captured
+        """
+        # gameplay attributes
+        self.size = n
+        self.turn = BLACK
+
+        # used for ko-rule
+        self.blocked_field = None
+        self.superko = superko
+
+        # used to detect if bother players pass
+        self.has_passed = False
+
+        # game over flag
+        self.game_over = False
+
+        # one boolean plane per color, indexed by [y, x]
+        self.black = np.zeros((n, n), dtype=bool)
+        self.white = np.zeros((n, n), dtype=bool)
+
+        # zobrist keys of game_model.Model (without the padding),
+        # so both models compute the same hash for a position
+        keys = zobrist_keys(n)
+        self.keys = (None,
+                     np.array(keys[1], dtype=np.uint64).reshape(n + 2, n + 2)[1:-1, 1:-1],
+                     np.array(keys[2], dtype=np.uint64).reshape(n + 2, n + 2)[1:-1, 1:-1])
+        self.hash = 0
+        self.history = set([self._history_key(self.hash, self.turn)])
+
+        # marked territory of each player
+        self.territory_black = np.zeros((n, n), dtype=bool)
+        self.territory_white = np.zeros((n, n), dtype=bool)
+
+        # score from empty fields at the end of the game.
+        self.score = [0, 0]
+
+        # stones killed during the game
+        self.captured = [0, 0]
+
+    def clone(self):
+        """Returns an independent copy of the model.
+
+        Returns:
+            (BitboardModel): copy of the game
+        """
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+
+        other.black = self.black.copy()
+        other.white = self.white.copy()
+        other.history = set(self.history)
+        other.territory_black = self.territory_black.copy()
+        other.territory_white = self.territory_white.copy()
+        other.score = self.score[:]
+        other.captured = self.captured[:]
+
+        return other
+
+    def _history_key(self, h, turn):
+        """Returns the key under which a position is stored in the history.
+
+        Arguments:
+            h (int): zobrist hash of the stones on the board
+            turn (boolean): color of the player to move
+
+        Returns:
+            (int): the hash, including the player to move for situational superko
+        """
+        if self.superko == SITUATIONAL and turn == BLACK:
+            return h ^ TURN_KEY
+
+        return h
+
+    def _planes(self, color):
+        """Returns the planes of the player with the given color and of the opponent.
+
+        Arguments:
+            color (boolean): color of the player
+
+        Returns:
+            tuple (ndarray): own stones, enemy stones
+        """
+        if color == BLACK:
+            return self.black, self.white
+
+        return self.white, self.black
+
+    def empty(self):
+        """Returns the plane of the empty fields.
+
+        Returns:
+            (ndarray): boolean plane, True where there is no stone
+        """
+        return ~(self.black | self.white)
+
+    def passing(self):
+        """Action when a player passes his turn.
+
+        Variables changed by this function:
+            self.game_over
+            self.turn
+            self.has_passed
+            self.blocked_field
+            self.history
+        """
+        # do nothing if game is over
+        if self.game_over:
+            return False
+
+        # both players pass => game over
+        if self.has_passed:
+            self.game_over = True
+            return True
+
+        # invert the turn & set passed to true
+        self.turn = WHITE if (self.turn == BLACK) else BLACK
+        self.has_passed = True
+        self.blocked_field = None
+        self.history.add(self._history_key(self.hash, self.turn))
+
+        return True
+
+    def _try(self, x, y):
+        """Computes the result of placing a stone of the current player
+        on (x, y) without changing the game.
+
+        Arguments:
+            x (int): x - coordinate of the new stone
+            y (int): y - coordinate of the new stone
+
+        Returns:
+            tuple: new group (ndarray), killed stones (ndarray) and the new
+                   hash, None if the move is invalid
+        """
+        if self.game_over:
+            return None
+
+        # check if the position is on the board and free
+        if x < 0 or y < 0 or x >= self.size or y >= self.size:
+            return None
+
+        if self.black[y, x] or self.white[y, x]:
+            return None
+
+        # check if the field is already blocked
+        if self.blocked_field == (x, y):
+            return None
+
+        own, enemy = self._planes(self.turn)
+
+        stone = np.zeros((self.size, self.size), dtype=bool)
+        stone[y, x] = True
+
+        own = own | stone
+        empty = ~(own | enemy)
+
+        # enemy stones that are not connected to an empty field are killed
+        alive = flood(dilate(empty) & enemy, enemy)
+        killed = enemy & ~alive
+
+        # the new group needs a liberty after the enemy stones are removed
+        group = flood(stone, own)
+
+        if not (dilate(group) & (empty | killed)).any():
+            return None
+
+        # superko-rule: the resulting position must be new
+        code = self.turn + 1
+        new_hash = self.hash ^ int(self.keys[code][y, x])
+        new_hash ^= int(np.bitwise_xor.reduce(self.keys[3 - code][killed]))
+
+        if self.superko is not None and self._history_key(new_hash, not self.turn) in self.history:
+            return None
+
+        return group, killed, new_hash
+
+    def is_legal(self, x, y):
+        """Checks whether the current player may place a stone on (x, y).
+        Does not change the game.
+
+        Returns:
+            (boolean): True if place_stone(x, y) would succeed
+        """
+        return self._try(x, y) is not None
+
+    def legal_moves(self):
+        """Returns all moves the current player may play.
+
+        Returns:
+            list (tuple): x and y coordinates of the legal moves
+        """
+        if self.game_over:
+            return []
+
+        own, enemy = self._planes(self.turn)
+        empty = self.empty()
+
+        # fields with an empty neighbor and no enemy neighbor cannot
+        # capture and are never suicide: only superko needs to be checked
+        simple = empty & neighbors(empty) & ~neighbors(enemy)
+
+        if self.superko is not None:
+            code = self.turn + 1
+            keys = np.array([self._history_key(h, not self.turn) for h in self.history], dtype=np.uint64)
+            hashes = self.keys[code] ^ np.uint64(self.hash)
+            simple &= ~np.isin(hashes, keys)
+
+        legal = simple.copy()
+
+        for y, x in zip(*np.nonzero(empty & ~simple)):
+            legal[y, x] = self.is_legal(int(x), int(y))
+
+        return [(int(x), int(y)) for y, x in zip(*np.nonzero(legal))]
+
+    def place_stone(self, x, y):
+        """Attempts to place a new stone.
+           Validates the move and if valid, executes the respective action.
+
+        Arguments
+            x (int): x - coordinate of the new stone
+            y (int): y - coordinate of the new stone
+
+        Variables changed by this function
+            self.has_passed
+            self.blocked_field
+            self.turn
+            self.black
+            self.white
+            self.hash
+            self.history
+            self.captured
+        """
+        result = self._try(x, y)
+
+        # the move is invalid
+        if result is None:
+            return False
+
+        group, killed, self.hash = result
+        own, enemy = self._planes(self.turn)
+
+        own[y, x] = True
+        enemy &= ~killed
+
+        n_killed = int(killed.sum())
+        self.captured[self.turn] += n_killed
+
+        # ko-rule: a single stone has killed a single stone
+        if n_killed == 1 and group.sum() == 1:
+            ys, xs = np.nonzero(killed)
+            self.blocked_field = (int(xs[0]), int(ys[0]))
+        else:
+            self.blocked_field = None
+
+        # switch the color (turn)
+        self.turn = WHITE if (self.turn == BLACK) else BLACK
+        self.has_passed = False
+        self.history.add(self._history_key(self.hash, self.turn))
+
+        return True
+
+    def groups(self):
+        """Labels the groups of stones on the whole board. Every stone
+        takes the smallest label of its group by repeatedly taking the
+        minimum over the neighbors of the same color.
+
+        Returns:
+            (ndarray): int plane, label of the group of each stone, -1 for empty fields
+        """
+        n = self.size
+        labels = np.where(self.empty(), -1, np.arange(n * n).reshape(n, n))
+        big = n * n
+
+        while True:
+            # candidates: own label and the labels of the neighbors
+            # of the same color (other fields are replaced by big)
+            best = labels.copy()
+
+            for plane in (self.black, self.white):
+                masked = np.where(plane, labels, big)
+                shifted = np.full((n, n), big)
+                shifted[1:, :] = np.minimum(shifted[1:, :], masked[:-1, :])
+                shifted[:-1, :] = np.minimum(shifted[:-1, :], masked[1:, :])
+                shifted[:, 1:] = np.minimum(shifted[:, 1:], masked[:, :-1])
+                shifted[:, :-1] = np.minimum(shifted[:, :-1], masked[:, 1:])
+                best = np.where(plane, np.minimum(best, shifted), best)
+
+            if (best == labels).all():
+                return labels
+
+            labels = best
+
+    def liberties(self):
+        """Counts the liberties of the group of every stone on the board.
+
+        Returns:
+            (ndarray): int plane, nr. of liberties of the group of each stone, 0 for empty fields
+        """
+        n = self.size
+        labels = self.groups()
+        empty = self.empty()
+
+        # pairs of (group label, empty field) for the four directions
+        pairs = []
+        fields = np.arange(n * n).reshape(n, n)
+
+        for stones, liberty in ((labels[1:, :], fields[:-1, :]),
+                                (labels[:-1, :], fields[1:, :]),
+                                (labels[:, 1:], fields[:, :-1]),
+                                (labels[:, :-1], fields[:, 1:])):
+            pairs.append(np.stack([stones.ravel(), liberty.ravel()]))
+
+        pairs = np.concatenate(pairs, axis=1)
+        pairs = pairs[:, (pairs[0] >= 0) & empty.ravel()[pairs[1]]]
+
+        # every liberty only counts once per group
+        pairs = np.unique(pairs, axis=1)
+        counts = np.bincount(pairs[0], minlength=n * n)
+
+        return np.where(labels >= 0, counts[np.maximum(labels, 0)], 0)
+
+    def _stones(self):
+        """Returns a nested list (same shape as board) containing the colors of each stone.
+
+        Returns:
+            list (boolean) : multidimensional list containing the colors of the stones on the board.
+        """
+        codes = self.black * 2 + self.white * 1
+
+        return [[COLORS[code] for code in row] for row in codes.tolist()]
+
+    def _territory(self):
+        """Returns a nested list (same shape as board) containing the marked territory.
+
+        Returns:
+            list (boolean) : BLACK, WHITE or None for each field
+        """
+        codes = self.territory_black * 2 + self.territory_white * 1
+
+        return [[COLORS[code] for code in row] for row in codes.tolist()]
+
+    def add_scores(self):
+        """Sums up the scores: adding empty fields + captured stones per player
+
+        Returns:
+            list (int): containing the scores of each player
+        """
+        return [self.score[0] + self.captured[0], self.score[1] + self.captured[1]]
+
+    def estimate(self):
+        """Returns the area score estimate of the running game like
+        Model.estimate(). The planes are flooded as a whole, which is
+        cheap in NumPy, so nothing is kept between the calls.
+
+        Returns:
+            list (int): estimate of each player [White, Black]
+        """
+        empty = self.empty()
+
+        reached_black = flood(dilate(self.black) & empty, empty)
+        reached_white = flood(dilate(self.white) & empty, empty)
+
+        white = int(self.white.sum() + (reached_white & ~reached_black).sum())
+        black = int(self.black.sum() + (reached_black & ~reached_white).sum())
+
+        return [self.captured[0] + white, self.captured[1] + black]
+
+    def get_data(self):
+        """Returns the data object containing all relevant information to the controller.
+
+        Returns:
+            data (Snapshot): read-only data object for the controller like Model.get_data()
+        """
+        data = Snapshot({
+            'size'      : self.size,
+            'stones'    : tuple([tuple(row) for row in self._stones()]),
+            'territory' : tuple([tuple(row) for row in self._territory()]),
+            'game_over' : self.game_over,
+            'score'     : tuple(self.add_scores()),
+            'estimate'  : tuple(self.estimate()),
+            'color'     : self.turn
+        })
+
+        return data
+
+    def get_turn(self):
+        """Returns the color of the player to move.
+
+        Returns:
+            (boolean): BLACK or WHITE
+        """
+        return self.turn
+
+    def is_game_over(self):
+        """Returns whether both players have passed.
+
+        Returns:
+            (boolean): True if the game is over
+        """
+        return self.game_over
+
+    def _claim(self, region, color):
+        """Marks all fields of the region as territory of the given color.
+
+        Arguments:
+            region (ndarray): boolean plane of the fields
+            color (boolean): BLACK, WHITE or None to remove the marks
+
+        Variables changed by this function
+            self.territory_black
+            self.territory_white
+        """
+        self.territory_black[region] = color == BLACK
+        self.territory_white[region] = color == WHITE
+
+    def _compute_score(self):
+        """Counts the number of marked fields and updates the score.
+        Dead stones inside the territory count 1 additional point.
+
+        Variables changed by this function
+            self.score
+        """
+        stones = self.black | self.white
+        self.score = [int(self.territory_white.sum() + (self.territory_white & stones).sum()),
+                      int(self.territory_black.sum() + (self.territory_black & stones).sum())]
+
+    def mark_territory(self, x, y):
+        """Function that can be evoked by user to claim territory for one player.
+        For empty fields it will also mark all adjacent empty fields,
+        for fields that contain a stone it will mark the entire stone
+        group and all adjacent empty spaces.
+
+        Arguments:
+            x (int): x-coordinate on the board
+            y (int): y-coordinate on the board
+
+        Attributes updated by this function:
+            self.score
+            self.territory_black
+            self.territory_white
+        """
+        # valid if the game is finished
+        if not self.game_over:
+            return
+
+        empty = self.empty()
+        field = np.zeros((self.size, self.size), dtype=bool)
+        field[y, x] = True
+
+        # claim an empty field: None => Black => White => None
+        if empty[y, x]:
+            if self.territory_black[y, x]:
+                color = WHITE
+            elif self.territory_white[y, x]:
+                color = None
+            else:
+                color = BLACK
+
+            self._claim(flood(field, empty), color)
+
+        # claim a group and the adjacent empty fields
+        else:
+            if self.territory_black[y, x] or self.territory_white[y, x]:
+                color = None
+            else:
+                color = not self.black[y, x]
+
+            own = self.black if self.black[y, x] else self.white
+            group = flood(field, own)
+            self._claim(group | flood(dilate(group) & empty, empty), color)
+
+        # compute the score
+        self._compute_score()
+
+    def find_territory(self):
+        """Tries to automatically claim territory for the proper players.
+        Claims the empty areas that are reached from the stones of
+        only one color. Unlike Model.find_territory() it does not look
+        for unconditionally alive groups (Benson's algorithm).
+
+        Attributes updated by this function:
+            self.score
+            self.territory_black
+            self.territory_white
+        """
+        empty = self.empty()
+
+        reached_black = flood(dilate(self.black) & empty, empty)
+        reached_white = flood(dilate(self.white) & empty, empty)
+
+        self._claim(reached_black & ~reached_white, BLACK)
+        self._claim(reached_white & ~reached_black, WHITE)
+
+        # compute the score
+        self._compute_score()
@@ -44,7 +44,8 @@ class Window(pyglet.window.Window):
                         'territory': [[None for x in range(size)] for y in range(size)],
                         'color' : None,
                         'game_over': False,
-                        'score' : [0, 20]
+                        'score' : [0, 20],
+                        'estimate' : [0, 0]
                         }
         
         # Set default background color
@@ -104,9 +105,15 @@ class Window(pyglet.window.Window):
                 self.current_player_stone
                 self.button_pass
                 self.button_newgame
+                self.stone_sprites
+                self.territory_marks
         """
         # Creating a batch to display all graphics
         self.batch = pyglet.graphics.Batch()
+
+        # Stones and territory marks of the new batch by field (x, y)
+        self.stone_sprites = {}
+        self.territory_marks = {}
         
         # Graphic groups (groups of lower index get drawn first)
         self.grp_back = pyglet.graphics.OrderedGroup(0)
@@ -153,6 +160,8 @@ class Window(pyglet.window.Window):
                 self.black_label_stone
                 self.score_white
                 self.white_label_stone
+                self.estimate_black
+                self.estimate_white
                 self.player_color
                 self.current_player_stone
                 self.button_pass
@@ -190,6 +199,15 @@ class Window(pyglet.window.Window):
         self.white_label_stone.scale = LITTLE_STONE_SIZE
         self.white_label_stone.set_position(150, label_y + self.white_label_stone.height/4)
 
+        # LIVE AREA SCORE ESTIMATE (BLACK / WHITE)
+        estimate_y = label_y - 25
+        Label(x=10, y=estimate_y, text='Estimate:', color=label_text_color,
+                          font_size=label_font_size, bold=True, batch=self.batch, group=self.grp_label)
+        self.estimate_black = Label(x=100, y=estimate_y, text=str(self.data['estimate'][1]), color=label_text_color,
+                          font_size=label_font_size, batch=self.batch, group=self.grp_label)
+        self.estimate_white = Label(x=170, y=estimate_y, text=str(self.data['estimate'][0]), color=label_text_color,
+                          font_size=label_font_size, batch=self.batch, group=self.grp_label)
+
         # CURRENT PLAYER STONE
         self.player_color = Label(x=550, y=label_y, text="Your color: ", color=label_text_color,
             font_size=label_font_size, bold=True, batch=self.batch, group=self.grp_label)
@@ -246,7 +264,12 @@ class Window(pyglet.window.Window):
         """
         # Display the stones on the regular batch
         self.batch_stones = self.batch
-        self.stone_sprites = []
+
+        # Remove the stones of the last update
+        for _s in self.stone_sprites.values():
+            _s.delete()
+
+        self.stone_sprites = {}
 
         # Center black and white stones
         def center_image(image):
@@ -258,6 +281,30 @@ class Window(pyglet.window.Window):
         center_image(self.image_white_stone)
 
         # Place all stones on the grid
+        for i in range(0, self.data['size']):
+            for j in range(0, self.data['size']):
+                self.update_stone(i, j)
+
+    def update_stone(self, i, j):
+        """Update the stone on a single field of the game board.
+
+            Arguments:
+                i (int): x-coordinate on the board
+                j (int): y-coordinate on the board
+
+            Attributes updated by this function:
+                self.stone_sprites
+        """
+        # Remove the old stone
+        if (i, j) in self.stone_sprites:
+            self.stone_sprites.pop((i, j)).delete()
+
+        # Get the stone color to place
+        stone_color = self.image_black_stone if self.data['stones'][j][i] == BLACK else None
+        stone_color = self.image_white_stone if self.data['stones'][j][i] == WHITE else stone_color
+
+        if not stone_color:
+            return
 
         # Scale stone images
         scaling = self.grid.field_width / self.image_black_stone.width
@@ -266,70 +313,82 @@ class Window(pyglet.window.Window):
         if scaling > MAX_STONE_SCALING:
             scaling = MAX_STONE_SCALING
 
-        # Iterate trough all data stones and place the corresponding black or
-        # white stone on the grid
-        for i in range(0, self.data['size']):
-            for j in range(0, self.data['size']):
-                if self.data['stones'][j][i] != None:
-                    # Get x and y grid coordinates
-                    x_coord, y_coord = self.grid.get_coords(i, j)
-
-                    # Get the stone color to place
-                    stone_color = self.image_black_stone if self.data['stones'][j][i] == BLACK else None
-                    stone_color = self.image_white_stone if self.data['stones'][j][i] == WHITE else stone_color
-
-                    # Place the stone on the grid
-                    if stone_color:
-                        _s = Sprite(stone_color,
-                                    batch=self.batch_stones,
-                                    group=self.grp_stones,
-                                    x=x_coord,
-                                    y=y_coord)
-                        _s.scale = scaling
-                        self.stone_sprites.append(_s)   
-    
+        # Get x and y grid coordinates
+        x_coord, y_coord = self.grid.get_coords(i, j)
+
+        # Place the stone on the grid
+        _s = Sprite(stone_color,
+                    batch=self.batch_stones,
+                    group=self.grp_stones,
+                    x=x_coord,
+                    y=y_coord)
+        _s.scale = scaling
+        self.stone_sprites[(i, j)] = _s
+
     def update_territories(self):
         """Update the black and white territories on the board.
 
             Attributes updated by this function:
                 self.batch_territory
+                self.territory_marks
         """
         # Display the territory an the regular batch
-        # Display the stones on the regular batch
         self.batch_territory = self.batch
-        
-        rad = 5
-        
+
+        # Remove the marks of the last update
+        for mark in self.territory_marks.values():
+            mark.delete()
+
+        self.territory_marks = {}
+
         # Iterate trough all territory indicators and place the corresponding
         # black or white circle on the grid or above stones
         for i in range(0, self.data['size']):
             for j in range(0, self.data['size']):
-                if self.data['territory'][j][i] != None:
-                    x_coord, y_coord = self.grid.get_coords(i, j)
-                    if self.data['territory'][j][i] == BLACK:
-                        Circle(x_coord,
-                               y_coord,
-                               color=BLACK_TERRITORY,
-                               r=rad,
-                               batch=self.batch_territory,
-                               group=self.grp_territory)
-                    elif self.data['territory'][j][i] == WHITE:
-                        Circle(x_coord,
-                               y_coord,
-                               color=WHITE_TERRITORY,
-                               r=rad,
-                               batch=self.batch_territory,
-                               group=self.grp_territory)
+                self.update_territory(i, j)
+
+    def update_territory(self, i, j):
+        """Update the territory mark on a single field of the board.
+
+            Arguments:
+                i (int): x-coordinate on the board
+                j (int): y-coordinate on the board
+
+            Attributes updated by this function:
+                self.territory_marks
+        """
+        # Remove the old mark
+        if (i, j) in self.territory_marks:
+            self.territory_marks.pop((i, j)).delete()
+
+        if self.data['territory'][j][i] == BLACK:
+            color = BLACK_TERRITORY
+        elif self.data['territory'][j][i] == WHITE:
+            color = WHITE_TERRITORY
+        else:
+            return
+
+        x_coord, y_coord = self.grid.get_coords(i, j)
+        self.territory_marks[(i, j)] = Circle(x_coord,
+                                              y_coord,
+                                              color=color,
+                                              r=5,
+                                              batch=self.batch_territory,
+                                              group=self.grp_territory)
 
     def update_scores(self):
-        """Update scores for BLACK and WHITE.
+        """Update scores and the live area score estimate for BLACK and WHITE.
         
             Attributes updated by this function:
                 self.score_black
                 self.score_white
+                self.estimate_black
+                self.estimate_white
         """
         self.score_black.text = str(self.data['score'][1])
         self.score_white.text = str(self.data['score'][0])
+        self.estimate_black.text = str(self.data['estimate'][1])
+        self.estimate_white.text = str(self.data['estimate'][0])
 
     def update_current_player(self):
         """Update stone of current player.
@@ -435,7 +494,9 @@ class Window(pyglet.window.Window):
         >>> import pyglet
         >>> help(pyglet.window.key)
         """
-        pass
+        # Save the record of the game
+        if symbol == pyglet.window.key.S:
+            self.controller.save_game()
     
     def receive_data(self, data):
         """Receive data from the controller and update view.
@@ -443,9 +504,41 @@ class Window(pyglet.window.Window):
             Attributes updated by this function:
                 self.data
         """
-        self.data.update(data)
+        self._copy_data(data)
         self.update()
 
+    def _copy_data(self, data):
+        """Copy a snapshot of the game into the data of the view, the
+        board matrices become lists again so changes can be applied.
+
+            Attributes updated by this function:
+                self.data
+        """
+        self.data.update(data)
+        self.data['stones'] = [list(row) for row in data['stones']]
+        self.data['territory'] = [list(row) for row in data['territory']]
+
+    def receive_changes(self, changes):
+        """Receive the changes since the last update from the controller
+        (see Model.get_changes()) and only redraw the changed fields.
+
+            Attributes updated by this function:
+                self.data
+        """
+        for i, j, color in changes['stones']:
+            self.data['stones'][j][i] = color
+            self.update_stone(i, j)
+
+        for i, j, color in changes['territory']:
+            self.data['territory'][j][i] = color
+            self.update_territory(i, j)
+
+        for key in ('game_over', 'score', 'estimate', 'color'):
+            self.data[key] = changes[key]
+
+        self.update_scores()
+        self.update_current_player()
+
     def new_game(self, data):
         """Receive data from the controller and start a new game.
         
@@ -453,7 +546,7 @@ class Window(pyglet.window.Window):
                 self.data
         """
         # Initialize the display
-        self.data.update(data)
+        self._copy_data(data)
         self.init_display()
         self.update()
          
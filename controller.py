@@ -4,46 +4,166 @@
 # Author: Nik Zaugg
 
 # Controller part of the MVC architecture for an implementation of the Go game
+#
+# The game logic is in headless.HeadlessController, this controller adds
+# the window and lets the computer players think in the background.
+
+import threading
+import time
 
 import pyglet
-from game_model import Model
+from headless import HeadlessController, GAME_OVER_MESSAGE
+from playout import find_territory
 import client
 
-class Controller(object):
+class Controller(HeadlessController):
     """ Controller class which enables communication between the client and the model"""
 
-    def __init__(self, grid_size, player_1_name, player_2_name):
+    def __init__(self, grid_size, player_1_name, player_2_name, computer_1=None, computer_2=None):
         """Initialize the controller/game and grid size and pass initial data from the model to the client
 
         Arguments
             grid_size (int): number of squares (n x n)
+            player_1_name (str): name of the first (black) player
+            player_2_name (str): name of the second (white) player
+            computer_1 (MCTSPlayer): computer player for black, None for a human
+            computer_2 (MCTSPlayer): computer player for white, None for a human
 
         Variables changed by this function
             self.n
             self.model
+            self.computers
+            self.message
+            self.scoring
             self.window
         """
         # Initialize the controller and start communicating between the view and model
-        self.n = int(grid_size)
-        self.player_1 = player_1_name
-        self.player_2 = player_2_name
-        self.model = Model(self.n)
+        HeadlessController.__init__(self, grid_size, player_1_name, player_2_name, computer_1, computer_2)
+
+        # thread counting the territory at the end of the game and its result
+        self.scoring = None
+
         self.window = client.Window(self, self.n)
         self.window.receive_data(self.model.get_data())
 
         # Display the start message and start the game.
-        self.window.info.text = "Let's start, " + self.player_1 + "!"
+        self.window.info.text = self.message
+        self._next_turn()
         pyglet.app.run()
     
 
     def _update_window(self):
-        """Send updated Data to the View
+        """Send the changes since the last update and the message to the View
+        (the full data is only sent at the start of a game)
 
         Variables changed by this function
             self.window
         """
-        self.window.receive_data(self.model.get_data())
-        
+        self.window.receive_changes(self.model.get_changes())
+        self.window.info.text = self.message
+
+
+    def _end_game(self):
+        """Marks the territory and the dead stones when both players have passed.
+        The playouts run on a copy of the game in the background, the window
+        stays responsive and polls for the result. If the playouts fail,
+        the territory is counted without them.
+
+        Variables changed by this function
+            self.scoring
+            self.message
+        """
+        result = []
+
+        def count(game, fallback):
+            try:
+                find_territory(game)
+            except Exception:
+                # only the surrounded areas and the regions of alive groups
+                game = fallback
+                game.find_territory()
+
+            result.append(game.territory)
+
+        thread = threading.Thread(target=count,
+                                  args=(self.model.clone(), self.model.clone()))
+        thread.daemon = True
+        thread.start()
+
+        self.scoring = (thread, result)
+        self.message = 'Counting the territory...'
+        pyglet.clock.schedule_interval(self._poll_scoring, 0.1)
+
+
+    def _poll_scoring(self, dt):
+        """Marks the territory once it has been counted.
+        Called by the pyglet clock.
+
+        Arguments
+            dt (float): time since the last call
+
+        Variables changed by this function
+            self.model
+            self.scoring
+            self.message
+        """
+        thread, result = self.scoring
+
+        if thread.is_alive():
+            return
+
+        pyglet.clock.unschedule(self._poll_scoring)
+        self.scoring = None
+
+        if result:
+            self.model.claim_territory(result[0])
+
+        self.message = GAME_OVER_MESSAGE
+        self._update_window()
+
+
+    def _next_turn(self):
+        """Lets the computer search its move in the background if it is its turn.
+        The window stays responsive and polls for the result.
+
+        Variables changed by this function
+            self.message
+            self.window.info.text
+        """
+        computer = self._computer_to_move()
+
+        if computer is not None:
+            computer.think(self.model)
+            self.message = 'Thinking...'
+            self.window.info.text = self.message
+            pyglet.clock.schedule_interval(self._poll_computer, 0.1)
+
+
+    def _poll_computer(self, dt):
+        """Plays the move of the computer once its search has finished.
+        Called by the pyglet clock.
+
+        Arguments
+            dt (float): time since the last call
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        computer = self._computer_to_move()
+
+        if computer is None:
+            pyglet.clock.unschedule(self._poll_computer)
+            return
+
+        if not computer.ready.is_set():
+            return
+
+        pyglet.clock.unschedule(self._poll_computer)
+        self._computer_played(computer.move)
+        self._update_window()
+        self._next_turn()
+
     
     def play(self, pos):
         """Place a stone on a certain position on the grid
@@ -53,41 +173,31 @@ class Controller(object):
 
         Variables changed by this function
             self.model
-            self.window.info.text
+            self.message
         """
+        # Wait for the computer to move
+        if self._computer_to_move() is not None:
+            return
 
-        # Get the name of the current player
-        player_name = self.player_1 if self.model.get_data()['color'] else self.player_2
-
-        # If valid move
-        if(self.model.place_stone(pos[0], pos[1])):
-            self.window.info.text = 'Nice Move ' + player_name + '!'
-        # If invalid move
-        else:
-            self.window.info.text = 'Invalid move ' + player_name + '!'
-        
+        HeadlessController.play(self, pos)
         self._update_window()
+        self._next_turn()
     
 
     def passing(self):
         """Pass on the turn of the current player
 
         Variables changed by this function
-            self.window.info.text
             self.model
+            self.message
         """
-        self.window.info.text = "You passed on your turn"
-        
-        # If able to pass on the turn
-        if self.model.passing():
-            # If the game is over
-            if self.model.get_data()['game_over']:
-                self.window.info.text = 'Game is Over! Both players passed their turn!'
-            # If the game continues
-            else:
-                self.window.info.text = 'Continue playing!'
+        # Wait for the computer to move
+        if self._computer_to_move() is not None:
+            return
 
+        HeadlessController.passing(self)
         self._update_window()
+        self._next_turn()
     
 
     def mark_territory(self, pos):
@@ -99,18 +209,46 @@ class Controller(object):
         Variables changed by this function
             self.model
         """
-        self.model.mark_territory(pos[0], pos[1])
+        # Wait until the territory has been counted
+        if self.scoring is not None:
+            return
+
+        HeadlessController.mark_territory(self, pos)
         self._update_window()
 
 
+    def save_game(self):
+        """Save the record of the game as SGF in the working directory
+
+        Variables changed by this function
+            self.message
+            self.window.info.text
+        """
+        filename = time.strftime('game-%Y%m%d-%H%M%S.sgf')
+
+        with open(filename, 'w') as f:
+            self.save(f)
+
+        self.message = 'Game saved to ' + filename
+        self.window.info.text = self.message
+
+
     def new_game(self):
         """Create a new game
 
         Variables changed by this function
             self.model
+            self.message
+            self.scoring
             self.window
-            self.window.into.text
         """
-        self.model.__init__(self.n)
+        # Stop the computer players and forget their search trees,
+        # the result of a running count of the territory is dropped
+        pyglet.clock.unschedule(self._poll_computer)
+        pyglet.clock.unschedule(self._poll_scoring)
+        self.scoring = None
+
+        HeadlessController.new_game(self)
         self.window.new_game(self.model.get_data())
-        self.window.info.text = "New game, let's start, " + self.player_1 + "!"
+        self.window.info.text = self.message
+        self._next_turn()
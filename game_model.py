@@ -5,177 +5,1698 @@
 
 # Model part of the MVC architecture for an implementation of the Go game
 
-from template import Group
+import itertools
+import random
 
 # constants
 BLACK = True
 WHITE = False
 
+# content of a point on the padded board (stone codes are color + 1)
+EMPTY = 0
+WHITE_STONE = 1
+BLACK_STONE = 2
+OFF_BOARD = 3
+
+# color of the stone for each point code
+COLORS = (None, WHITE, BLACK, None)
+
+# superko rules: a move may not repeat an earlier board position
+# (positional) or an earlier board position with the same player to move
+# (situational). None only applies the simple ko-rule.
+POSITIONAL = 'positional'
+SITUATIONAL = 'situational'
+
+# cached legality of a move on a point
+UNKNOWN = 0
+LEGAL = 1
+ILLEGAL = 2
+
+# zobrist key of the player to move, used for situational superko
+TURN_KEY = 0x9E3779B97F4A7C15
+
+# cache of the zobrist keys for each board size
+_ZOBRIST_KEYS = {}
+_KO_KEYS = {}
+
+def zobrist_keys(n):
+    """Returns the zobrist keys for a board of size n x n.
+    The keys are generated from a fixed seed, so the hash of a position
+    is the same in every process.
+
+    Arguments:
+        n (int): size of the grid
+
+    Returns:
+        tuple: 64-bit keys indexed by [stone code][point on the padded board]
+    """
+    if n not in _ZOBRIST_KEYS:
+        rnd = random.Random(n)
+        area = (n + 2) * (n + 2)
+        white = [rnd.getrandbits(64) for p in range(area)]
+        black = [rnd.getrandbits(64) for p in range(area)]
+        _ZOBRIST_KEYS[n] = (None, white, black)
+
+    return _ZOBRIST_KEYS[n]
+
+def ko_keys(n):
+    """Returns the zobrist keys of the field blocked by the ko-rule
+    for a board of size n x n.
+
+    Arguments:
+        n (int): size of the grid
+
+    Returns:
+        list: 64-bit keys indexed by the point on the padded board
+    """
+    if n not in _KO_KEYS:
+        rnd = random.Random(n * 1000003 + 1)
+        _KO_KEYS[n] = [rnd.getrandbits(64) for p in range((n + 2) * (n + 2))]
+
+    return _KO_KEYS[n]
+
+# the 8 symmetries of the square board as functions of the coordinates
+# and the last index m = n - 1: identity, rotation by 90, 180 and 270
+# degrees, mirror left-right and top-bottom, and the two diagonals
+SYMMETRIES = (
+    lambda x, y, m: (x, y),
+    lambda x, y, m: (m - y, x),
+    lambda x, y, m: (m - x, m - y),
+    lambda x, y, m: (y, m - x),
+    lambda x, y, m: (m - x, y),
+    lambda x, y, m: (x, m - y),
+    lambda x, y, m: (y, x),
+    lambda x, y, m: (m - y, m - x)
+)
+
+# SYMMETRIES[INVERSE[s]] undoes SYMMETRIES[s]
+INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+
+_SYMMETRY_KEYS = {}
+
+def symmetry_keys(n):
+    """Returns the zobrist keys of the board seen through each symmetry:
+    the key of a stone on p in table s is the key of the field that p
+    is mapped to by SYMMETRIES[s]. XOR-ing them gives the hash of the
+    transformed board, table 0 equals zobrist_keys(n).
+
+    Arguments:
+        n (int): size of the grid
+
+    Returns:
+        list: 8 tuples of 64-bit keys indexed by [stone code][point on the padded board]
+    """
+    if n not in _SYMMETRY_KEYS:
+        keys = zobrist_keys(n)
+        stride = n + 2
+        tables = []
+
+        for symmetry in SYMMETRIES:
+            white = [0] * (stride * stride)
+            black = [0] * (stride * stride)
+
+            for y in range(n):
+                for x in range(n):
+                    tx, ty = symmetry(x, y, n - 1)
+                    p, q = (y + 1) * stride + x + 1, (ty + 1) * stride + tx + 1
+                    white[p], black[p] = keys[1][q], keys[2][q]
+
+            tables.append((None, white, black))
+
+        _SYMMETRY_KEYS[n] = tables
+
+    return _SYMMETRY_KEYS[n]
+
+def transform(symmetry, move, n):
+    """Maps a move to the board transformed by a symmetry.
+
+    Arguments:
+        symmetry (int): index into SYMMETRIES
+        move (tuple): x and y coordinate, None for a pass
+        n (int): size of the grid
+
+    Returns:
+        (tuple): x and y coordinate on the transformed board, None for a pass
+    """
+    if move is None:
+        return None
+
+    return SYMMETRIES[symmetry](move[0], move[1], n - 1)
+
+# versions of the game states, increasing over all models of the process
+_VERSIONS = itertools.count(1)
+
+class Snapshot(dict):
+    """Read-only dictionary returned by Model.get_data()."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('the snapshot of the game can not be changed')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # pickle and copy fill dict subclasses through __setitem__,
+        # rebuild the snapshot from a plain dict instead
+        return (Snapshot, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # the values are immutable (tuples, numbers, booleans)
+        return self
+
 class Model(object):
     """ This class takes care of all the calulcations and the game logic. 
         It prepares the data for the Controller. 
     """
-    def __init__(self, n=11):
+    # attributes that are derived from the board and not pickled
+    _derived = ('stride', 'offsets', 'keys', 'parent', 'next_stone',
+                'group_size', 'libs', 'lib_sum', 'lib_sum2',
+                'changes', 'change_start', 'legality', 'legality_read',
+                'legal_list', 'estimate_read', 'region', 'regions', 'next_region',
+                'stones_on_board', 'area_estimate', 'marking',
+                'view_read', 'territory_changed', 'snapshot',
+                'sym_keys', 'sym_read', 'sym_hashes')
+
+    def __init__(self, n=11, superko=POSITIONAL):
         """This function initializes a new model. 
 
-        Arguments:
-            n (int) - size of the grid
+        Arguments:
+            n (int) - size of the grid
+            superko (str) - POSITIONAL, SITUATIONAL or None (simple ko only)
+
+        Attributes initialized by this function:
+            self.size
+            self.turn
+            self.blocked_field
+            self.superko
+            self.has_passed
+            self.game_over
+            self.stride
+            self.offsets
+            self.points
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+            self.keys
+            self.hash
+            self.history
+            self.journal
+            self.redo_moves
+            self.changes
+            self.change_start
+            self.legality
+            self.legality_read
+            self.legal_list
+            self.estimate_read
+            self.region
+            self.regions
+            self.next_region
+            self.stones_on_board
+            self.area_estimate
+            self.marking
+            self.territory
+            self.view_read
+            self.territory_changed
+            self.sym_keys
+            self.sym_read
+            self.sym_hashes
+            self.version
+            self.snapshot
+            self.score
+            self.captured
+        """
+        # gameplay attributes
+        self.size = n
+        self.turn = BLACK
+
+        # used for ko-rule
+        self.blocked_field = None
+        self.superko = superko
+
+        # used to detect if bother players pass
+        self.has_passed = False
+
+        # game over flag
+        self.game_over = False
+
+        # the board is a flat array of (size + 2) x (size + 2) points.
+        # the outer ring is marked as OFF_BOARD, so the four neighbors
+        # p - 1, p + 1, p - stride and p + stride of a point p never need
+        # any bounds checks.
+        self.stride = self.size + 2
+        self.offsets = (-1, 1, -self.stride, self.stride)
+        self.points = bytearray([OFF_BOARD]) * (self.stride * self.stride)
+
+        for y in range(self.size):
+            p = self._point(0, y)
+            self.points[p:p + self.size] = bytearray(self.size)
+
+        # groups of stones are kept in a union-find structure.
+        # every stone points to its parent, the root of a group
+        # points to itself. the stones of a group are additionally
+        # linked in a circular list, so two lists can be joined in O(1).
+        area = self.stride * self.stride
+        self.parent = list(range(area))
+        self.next_stone = list(range(area))
+
+        # statistics stored at the root of each group:
+        # the number of stones and the pseudo-liberties, i.e. every empty
+        # field is counted once for each adjacent stone of the group.
+        # the sum and the sum of squares of the liberty points allow to
+        # detect a single liberty (atari) in O(1).
+        self.group_size = [0] * area
+        self.libs = [0] * area
+        self.lib_sum = [0] * area
+        self.lib_sum2 = [0] * area
+
+        # zobrist hash of the stones on the board (0 for the empty board)
+        # and the hashes of all positions seen so far (superko)
+        self.keys = zobrist_keys(self.size)
+        self.hash = 0
+        self.history = set([self._history_key(self.hash, self.turn)])
+
+        # changes made by each move / pass, used by undo()
+        # and the moves that have been taken back, used by redo()
+        self.journal = []
+        self.redo_moves = []
+
+        # points changed by the moves: one entry p << 2 | code per change,
+        # with the code of the point before the change. the caches read
+        # the log from their own position, see _changes_since()
+        self.changes = []
+        self.change_start = 0
+
+        self._reset_legality()
+        self._reset_estimate()
+
+        self.territory = [[None for i in range(self.size)] for j in range(self.size)]
+
+        # regions of the finished game used by mark_territory(), built on the first click
+        self.marking = None
+
+        # board as seen by the view and the changes since, see get_changes()
+        self._reset_changes()
+
+        # hashes of the board under the 8 symmetries, see canonical_hash()
+        self._reset_symmetry()
+
+        # score from empty fields at the end of the game.
+        self.score = [0, 0]
+
+        # stones killed during the game
+        self.captured = [0, 0] 
+
+        # every change of the game gets a new version, get_data() keeps
+        # its result until the version changes: (version, data)
+        self.version = next(_VERSIONS)
+        self.snapshot = None
+
+    def clone(self):
+        """Returns an independent copy of the model. Only the flat arrays
+        and containers are copied, the zobrist keys are shared.
+
+        Returns:
+            (Model): copy of the game
+        """
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+
+        other.points = self.points[:]
+        other.parent = self.parent[:]
+        other.next_stone = self.next_stone[:]
+        other.group_size = self.group_size[:]
+        other.libs = self.libs[:]
+        other.lib_sum = self.lib_sum[:]
+        other.lib_sum2 = self.lib_sum2[:]
+        other.history = set(self.history)
+        other.journal = self.journal[:]
+        other.redo_moves = self.redo_moves[:]
+        other.legality = (None, self.legality[1][:], self.legality[2][:])
+        other.region = self.region[:]
+        other.regions = self.regions.copy()
+        other.stones_on_board = self.stones_on_board[:]
+        other.area_estimate = self.area_estimate[:]
+        other.territory_changed = self.territory_changed[:]
+        other.sym_hashes = self.sym_hashes[:]
+        other.territory = [row[:] for row in self.territory]
+        other.score = self.score[:]
+        other.captured = self.captured[:]
+
+        # only the changes the caches have not read yet
+        other.change_start = self._first_change()
+        other.changes = self.changes[other.change_start - self.change_start:]
+
+        return other
+
+    def position(self):
+        """Returns a copy of the position without the record of the moves.
+        The history of the positions (superko) is kept, undo() and redo()
+        have nothing to take back. This is the state sent to other processes.
+
+        Returns:
+            (Model): copy of the game without journal and redo moves
+        """
+        other = self.clone()
+        other.journal = []
+        other.redo_moves = []
+
+        return other
+
+    def __getstate__(self):
+        """Returns the state for pickling. The group structure and the keys
+        are left out and rebuilt from the stones when unpickling.
+
+        Returns:
+            (dict): attributes of the model
+        """
+        state = self.__dict__.copy()
+
+        for name in self._derived:
+            del state[name]
+
+        state['points'] = bytes(self.points)
+
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled model and rebuilds the groups of stones.
+
+        Arguments:
+            state (dict): attributes returned by __getstate__
+        """
+        self.__dict__.update(state)
+        self.points = bytearray(state['points'])
+
+        area = (self.size + 2) * (self.size + 2)
+        self.stride = self.size + 2
+        self.offsets = (-1, 1, -self.stride, self.stride)
+        self.keys = zobrist_keys(self.size)
+        self.parent = list(range(area))
+        self.next_stone = list(range(area))
+        self.group_size = [0] * area
+        self.libs = [0] * area
+        self.lib_sum = [0] * area
+        self.lib_sum2 = [0] * area
+
+        self._rebuild([p for p in range(area) if COLORS[self.points[p]] is not None])
+        self.changes = []
+        self.change_start = 0
+        self._reset_legality()
+        self._reset_estimate()
+        self._reset_changes()
+        self._reset_symmetry()
+        self.marking = None
+        self.version = next(_VERSIONS)
+        self.snapshot = None
+
+    def passing(self):
+        """Action when a player passes his turn.
+
+        Variables changed by this function:
+            self.game_over
+            self.turn
+            self.has_passed
+            self.blocked_field
+            self.history
+            self.journal
+            self.redo_moves
+            self.version
+        """
+
+        # do nothing if game is over
+        if self.game_over:
+            return False
+
+        # remember the state for undo()
+        previous = self._state()
+        self.version = next(_VERSIONS)
+        
+        # both players pass => game over
+        if self.has_passed:
+            self.game_over = True
+            self._record(None, [], previous)
+            return True
+        
+        # invert the turn & set passed to true
+        self.turn = WHITE if (self.turn == BLACK) else BLACK     
+        self.has_passed = True
+        self.blocked_field = None
+        self._record(None, [], previous)
+
+        return True
+
+    def _state(self):
+        """Returns the state that is restored by undo() besides the stones.
+
+        Returns:
+            tuple: turn, blocked_field, has_passed, captured and game_over
+        """
+        return (self.turn, self.blocked_field, self.has_passed, tuple(self.captured), self.game_over)
+
+    def _record(self, p, killed, previous):
+        """Stores the position in the history and the changes of a move
+        or a pass in the journal.
+
+        Arguments:
+            p (int): point of the new stone, None for a pass
+            killed (list): stones of each group that has been killed
+            previous (tuple): state before the move, see _state()
+
+        Variables changed by this function:
+            self.history
+            self.journal
+            self.redo_moves
+        """
+        key = self._history_key(self.hash, self.turn)
+
+        # only remove positions from the history that were new
+        if key in self.history:
+            key = None
+        else:
+            self.history.add(key)
+
+        self.journal.append((p, killed, previous, key))
+        self.redo_moves = []
+
+    def undo(self):
+        """Takes back the last move or pass. Only the fields that have
+        been changed by the move are touched.
+
+        Returns:
+            (boolean): False if there is nothing to take back
+
+        Variables changed by this function:
+            self.journal
+            self.redo_moves
+            self.history
+            self.turn
+            self.blocked_field
+            self.has_passed
+            self.captured
+            self.game_over
+            self.points - removes / restores stones
+            self.hash
+            self.version
+        """
+        if not self.journal:
+            return False
+
+        p, killed, previous, key = self.journal.pop()
+        self.version = next(_VERSIONS)
+
+        if key is not None:
+            self.history.discard(key)
+
+        if p is not None:
+            self._take_back(p, killed)
+            self.redo_moves.append(self._coords(p))
+        else:
+            self.redo_moves.append(None)
+
+        # the game continues: forget the marked territory
+        if self.game_over and not previous[4]:
+            self.territory_changed += [self._point(x, y) for y in range(self.size)
+                                       for x in range(self.size) if self.territory[y][x] is not None]
+            self.territory = [[None for i in range(self.size)] for j in range(self.size)]
+            self.score = [0, 0]
+            self.marking = None
+
+        self.turn, self.blocked_field, self.has_passed, captured, self.game_over = previous
+        self.captured = list(captured)
+
+        return True
+
+    def redo(self):
+        """Replays the last move or pass that has been taken back by undo().
+
+        Returns:
+            (boolean): False if there is nothing to replay
+        """
+        if not self.redo_moves:
+            return False
+
+        # placing a stone clears the moves to redo, keep the remaining ones
+        redo_moves = self.redo_moves
+        move = redo_moves.pop()
+
+        if move is None:
+            self.passing()
+        else:
+            self.place_stone(move[0], move[1])
+
+        self.redo_moves = redo_moves
+
+        return True
+
+    def _take_back(self, p, killed):
+        """Removes the stone at point p and puts the killed stones back.
+
+        Arguments:
+            p (int): point of the stone to remove
+            killed (list): stones of each group that has been killed by it
+
+        Variables changed by this function:
+            self.points
+            self.hash
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+            self.changes
+        """
+        points = self.points
+        code = points[p]
+
+        # the stones the move has merged form new groups without p
+        split = self._members(p)
+        split.remove(p)
+
+        points[p] = EMPTY
+        self.hash ^= self.keys[code][p]
+        self.parent[p] = p
+        self.next_stone[p] = p
+
+        # put the killed stones back on the board
+        restored = []
+
+        for stones in killed:
+            for q in stones:
+                points[q] = 3 - code
+                self.hash ^= self.keys[3 - code][q]
+
+            restored += stones
+
+        self._rebuild(split + restored)
+        self.changes += [(p << 2) | code] + [q << 2 for q in restored]
+
+        if len(self.changes) > 2 * len(points):
+            self._trim_changes()
+
+        # p is a liberty of the remaining enemy neighbors again
+        restored_set = set(restored)
+
+        for d in self.offsets:
+            q = p + d
+            if points[q] == 3 - code and q not in restored_set:
+                self._add_liberty(self._find(q), p)
+
+        # the restored stones take the liberties of the other groups they touch
+        split_set = set(split)
+
+        for r in restored:
+            for d in self.offsets:
+                q = r + d
+                if points[q] == code and q not in split_set:
+                    self._remove_liberty(self._find(q), r)
+
+    def _trim_changes(self):
+        """Drops the entries of the change log that no cache will read any
+        more. Called by the moves when the log has grown to twice the nr.
+        of fields.
+
+        Variables changed by this function:
+            self.changes
+            self.change_start
+        """
+        first = self._first_change()
+        del self.changes[:first - self.change_start]
+        self.change_start = first
+
+    def _first_change(self):
+        """Returns the position of the first entry in the change log that
+        a cache may still read. A cache that is more changes than fields
+        behind starts from scratch, it does not need its entries.
+
+        Returns:
+            (int): position in the change log
+        """
+        end = self.change_start + len(self.changes)
+        first = end
+
+        for read in (self.legality_read, self.estimate_read, self.view_read, self.sym_read):
+            if read is not None and read < first:
+                first = read
+
+        return max(first, end - len(self.points), self.change_start)
+
+    def _changes_since(self, read):
+        """Returns the points changed since a position in the change log.
+        The caches (legality, estimate, view and symmetric hashes) each
+        keep the position up to which they have read the log. The positions
+        count all entries ever logged, the list starts at change_start.
+
+        Arguments:
+            read (int): position in the change log, None for no position
+
+        Returns:
+            (dictionary): code of each changed point at that position,
+                          None if there are more changes than fields
+        """
+        changes, start = self.changes, self.change_start
+
+        if read is None or read < start or start + len(changes) - read > len(self.points):
+            return None
+
+        before = {}
+
+        # the first entry of a point holds its code at the position
+        for entry in changes[read - start:]:
+            if entry >> 2 not in before:
+                before[entry >> 2] = entry & 3
+
+        return before
+
+    def _rebuild(self, stones):
+        """Builds the groups of the given stones and their liberties from scratch.
+        All stones connected to one of them must be in the list.
+
+        Arguments:
+            stones (list): points of the stones
+
+        Variables changed by this function:
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+        """
+        for p in stones:
+            self.parent[p] = p
+            self.next_stone[p] = p
+            self.group_size[p] = 1
+            self.libs[p] = self.lib_sum[p] = self.lib_sum2[p] = 0
+
+        for p in stones:
+            code = self.points[p]
+
+            for d in self.offsets:
+                q = p + d
+
+                if self.points[q] == EMPTY:
+                    self._add_liberty(self._find(p), q)
+                elif self.points[q] == code:
+                    self._union(self._find(p), self._find(q))
+
+    def _history_key(self, h, turn):
+        """Returns the key under which a position is stored in the history.
+
+        Arguments:
+            h (int): zobrist hash of the stones on the board
+            turn (boolean): color of the player to move
+
+        Returns:
+            (int): the hash, including the player to move for situational superko
+        """
+        if self.superko == SITUATIONAL and turn == BLACK:
+            return h ^ TURN_KEY
+
+        return h
+
+    def position_hash(self):
+        """Returns the hash of the position: the stones on the board,
+        the player to move and the field blocked by the ko-rule.
+
+        Returns:
+            (int): 64-bit zobrist hash
+        """
+        h = self.hash
+
+        if self.turn == BLACK:
+            h ^= TURN_KEY
+
+        if self.blocked_field is not None:
+            h ^= ko_keys(self.size)[self._point(*self.blocked_field)]
+
+        return h
+
+    def _reset_symmetry(self):
+        """Starts the hashes of the board under the 8 symmetries. They
+        are brought up to date lazily by _update_symmetry().
+
+        Variables changed by this function:
+            self.sym_keys
+            self.sym_read
+            self.sym_hashes
+        """
+        self.sym_keys = symmetry_keys(self.size)
+
+        # position in the change log the hashes belong to, None until
+        # the first update takes in all stones
+        self.sym_read = None
+        self.sym_hashes = [0] * len(SYMMETRIES)
+
+    def _update_symmetry(self):
+        """Updates the hashes under the 8 symmetries with the points that
+        have changed since the last call.
+
+        Variables changed by this function:
+            self.sym_read
+            self.sym_hashes
+        """
+        end = self.change_start + len(self.changes)
+
+        if self.sym_read == end:
+            return
+
+        points = self.points
+        changed = self._changes_since(self.sym_read)
+
+        # start at the empty board and take in all stones
+        if changed is None:
+            self.sym_hashes = [0] * len(SYMMETRIES)
+            changed = dict([(p, EMPTY) for p in range(len(points)) if COLORS[points[p]] is not None])
+
+        hashes, tables = self.sym_hashes, self.sym_keys
+
+        for p, old in changed.items():
+            new = points[p]
+
+            # the point may be back to its old state
+            if old == new:
+                continue
+
+            for s in range(len(tables)):
+                if old:
+                    hashes[s] ^= tables[s][old][p]
+                if new:
+                    hashes[s] ^= tables[s][new][p]
+
+        self.sym_read = end
+
+    def canonical_hash(self):
+        """Returns the hash of the board that is the same for all 8
+        rotations and reflections of it: the smallest zobrist hash of
+        the board under SYMMETRIES. Only the stones are hashed.
+
+        Returns:
+            (int): canonical 64-bit hash
+        """
+        self._update_symmetry()
+
+        return min(self.sym_hashes)
+
+    def canonical_symmetry(self):
+        """Returns the symmetry that maps the board to its canonical form.
+        Moves are mapped with transform(), moves of the canonical board
+        back to this one with transform(INVERSE[symmetry], ...).
+
+        Returns:
+            (int): index into SYMMETRIES, the smallest one for symmetric boards
+        """
+        self._update_symmetry()
+        hashes = self.sym_hashes
+
+        return hashes.index(min(hashes))
+
+    def canonical_form(self):
+        """Returns the canonical form of the board.
+
+        Returns:
+            h (int): canonical hash, see canonical_hash()
+            symmetry (int): symmetry that maps this board to the canonical one
+            stones (tuple): rows of the colors of the stones on the canonical board
+        """
+        symmetry = self.canonical_symmetry()
+        stones = self._stones()
+        m = self.size - 1
+
+        # the field (x, y) of the canonical board is the inverse image of it
+        inverse = SYMMETRIES[INVERSE[symmetry]]
+        rows = []
+
+        for y in range(self.size):
+            row = []
+
+            for x in range(self.size):
+                ix, iy = inverse(x, y, m)
+                row.append(stones[iy][ix])
+
+            rows.append(tuple(row))
+
+        return self.sym_hashes[symmetry], symmetry, tuple(rows)
+
+    def from_canonical(self, move):
+        """Maps a move on the canonical board (e.g. from a cache of
+        canonical positions) back to this board.
+
+        Arguments:
+            move (tuple): x and y coordinate on the canonical board, None for a pass
+
+        Returns:
+            (tuple): x and y coordinate on this board, None for a pass
+        """
+        return transform(INVERSE[self.canonical_symmetry()], move, self.size)
+
+    def _point(self, x, y):
+        """Returns the index of the coordinates (x, y) on the padded board.
+
+        Arguments:
+            x (int): x - coordinate
+            y (int): y - coordinate
+
+        Returns:
+            (int): index into self.points
+        """
+        return (y + 1) * self.stride + x + 1
+
+    def _coords(self, p):
+        """Returns the coordinates of a point on the padded board.
+
+        Arguments:
+            p (int): index into self.points
+
+        Returns:
+            (tuple): x and y coordinate of the point
+        """
+        y, x = divmod(p, self.stride)
+        return x - 1, y - 1
+
+    def _stones(self):
+        """Returns a nested list (same shape as board) containing the colors of each stone.
+
+        Returns:
+            list (boolean) : multidimensional list containing the colors of the stones on the board.
+        """
+        colors = []
+
+        # read the colors row by row from the padded board
+        for y in range(self.size):
+            p = self._point(0, y)
+            colors.append([COLORS[code] for code in self.points[p:p + self.size]])
+
+        return colors
+
+    def _find(self, p):
+        """Returns the root of the group the stone at point p belongs to.
+        The path to the root is compressed along the way (path halving).
+
+        Arguments:
+            p (int): point of a stone
+
+        Returns:
+            (int): point of the root stone of the group
+        """
+        parent = self.parent
+
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+
+        return p
+
+    def _union(self, r, s):
+        """Merges two groups of the same color. The smaller group is
+        attached to the root of the larger one.
+
+        Arguments:
+            r (int): root of the first group
+            s (int): root of the second group
+
+        Returns:
+            (int): root of the merged group
+
+        Attributes updated by this function:
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+        """
+        if r == s:
+            return r
+
+        # union by size
+        if self.group_size[r] < self.group_size[s]:
+            r, s = s, r
+
+        self.parent[s] = r
+        self.group_size[r] += self.group_size[s]
+        self.libs[r] += self.libs[s]
+        self.lib_sum[r] += self.lib_sum[s]
+        self.lib_sum2[r] += self.lib_sum2[s]
+
+        # join the two circular lists of stones
+        self.next_stone[r], self.next_stone[s] = self.next_stone[s], self.next_stone[r]
+
+        return r
+
+    def _add_liberty(self, r, p):
+        """Adds the empty field p as a (pseudo-)liberty to the group with root r.
+
+        Attributes updated by this function:
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+        """
+        self.libs[r] += 1
+        self.lib_sum[r] += p
+        self.lib_sum2[r] += p * p
+
+    def _remove_liberty(self, r, p):
+        """Removes the field p as a (pseudo-)liberty from the group with root r.
+
+        Attributes updated by this function:
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+        """
+        self.libs[r] -= 1
+        self.lib_sum[r] -= p
+        self.lib_sum2[r] -= p * p
+
+    def _members(self, p):
+        """Returns all stones of the group containing the stone at point p.
+
+        Arguments:
+            p (int): point of a stone
+
+        Returns:
+            list (int): points of all stones in the group
+        """
+        stones = [p]
+        q = self.next_stone[p]
+
+        while q != p:
+            stones.append(q)
+            q = self.next_stone[q]
+
+        return stones
+
+    def _kill(self, r):
+        """Removes a group of stones from the game and increases the
+        counter of captured stones.
+
+        Arguments:
+            r (int): root of the group that has been killed - needs to be removed
+
+        Returns:
+            list (int): points of the removed stones
+
+        Attributes updated by this function:
+            self.points
+            self.parent
+            self.next_stone
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+            self.hash
+            self.captured
+        """
+        code = self.points[r]
+        stones = self._members(r)
+
+        # increase the caputured counter of the opposite color by the nr. of stones in the grp 
+        self.captured[not COLORS[code]] += len(stones)
+
+        # remove the stones
+        keys = self.keys[code]
+
+        for p in stones:
+            self.hash ^= keys[p]
+            self.points[p] = EMPTY
+            self.parent[p] = p
+            self.next_stone[p] = p
+
+        # the removed stones become liberties of the adjacent groups
+        for p in stones:
+            for d in self.offsets:
+                q = p + d
+                if self.points[q] == 3 - code:
+                    self._add_liberty(self._find(q), p)
+
+        return stones
+
+    def add_scores(self):
+        """Sums up the scores: adding empty fields + captured stones per player
+
+        Returns:
+            list (int): containing the scores of each player
+        """
+        return [self.score[0] + self.captured[0], self.score[1] + self.captured[1]]
+
+    def get_data(self):
+        """Returns the data object containing all relevant information to the controller.
+        The same read-only snapshot is returned until the game changes.
+
+        Returns:
+            data (Snapshot): data object for the controller, the rows of
+                             'stones' and 'territory' are tuples
+        """
+        if self.snapshot is None or self.snapshot[0] != self.version:
+            data = Snapshot({
+                'size'      : self.size,
+                'stones'    : tuple([tuple(row) for row in self._stones()]),
+                'territory' : tuple([tuple(row) for row in self.territory]),
+                'game_over' : self.game_over,
+                'score'     : tuple(self.add_scores()),
+                'estimate'  : tuple(self.estimate()),
+                'color'     : self.turn
+            })
+
+            self.snapshot = (self.version, data)
+
+        return self.snapshot[1]
+
+    def get_turn(self):
+        """Returns the color of the player to move.
+
+        Returns:
+            (boolean): BLACK or WHITE
+        """
+        return self.turn
+
+    def is_game_over(self):
+        """Returns whether both players have passed.
+
+        Returns:
+            (boolean): True if the game is over
+        """
+        return self.game_over
+
+    def _reset_changes(self):
+        """Starts tracking the changes for the view at the current board.
+
+        Variables changed by this function:
+            self.view_read
+            self.territory_changed
+        """
+        # position in the change log at the last get_changes() and the
+        # points of the territory marks changed since then
+        self.view_read = self.change_start + len(self.changes)
+        self.territory_changed = []
+
+    def get_changes(self):
+        """Returns the changes since the last call (or since the model was
+        created) for a view that has the full data of get_data().
+        Every change holds the current content of the field, so applying
+        a change twice does no harm.
+
+        Returns:
+            changes (dictionary): like get_data(), but with
+                'stones'    : list of (x, y, color) for added (BLACK / WHITE)
+                              and removed (None) stones
+                'territory' : list of (x, y, color) for changed marks
+
+        Variables changed by this function:
+            self.view_read
+            self.territory_changed
+        """
+        points = self.points
+        changed = self._changes_since(self.view_read)
+
+        # too many changes: send every field
+        if changed is None:
+            changed = dict([(p, None) for p in range(len(points)) if points[p] != OFF_BOARD])
+
+        stones = []
+
+        for p in sorted(changed):
+            if points[p] != changed[p]:
+                x, y = self._coords(p)
+                stones.append((x, y, COLORS[points[p]]))
+
+        territory = []
+
+        for p in sorted(set(self.territory_changed)):
+            x, y = self._coords(p)
+            territory.append((x, y, self.territory[y][x]))
+
+        self.view_read = self.change_start + len(self.changes)
+        self.territory_changed = []
+
+        changes = {
+            'size'      : self.size,
+            'stones'    : stones,
+            'territory' : territory,
+            'game_over' : self.game_over,
+            'score'     : self.add_scores(),
+            'estimate'  : self.estimate(),
+            'color'     : self.turn
+        }
+
+        return changes
+
+    def _reset_estimate(self):
+        """Computes the area score estimate of the whole board from scratch.
+
+        Variables changed by this function:
+            self.estimate_read
+            self.region
+            self.regions
+            self.next_region
+            self.stones_on_board
+            self.area_estimate
+        """
+        # position in the change log when the estimate was last updated
+        self.estimate_read = self.change_start + len(self.changes)
+
+        # label of the empty region of each point (0 for stones and off
+        # the board) and for each region the nr. of fields and of the
+        # contacts (pairs of a field and a neighbor) with white and with
+        # black stones: label -> (fields, white, black)
+        self.region = [0] * len(self.points)
+        self.regions = {}
+        self.next_region = 1
+
+        self.stones_on_board = [0, 0]
+        self.area_estimate = [0, 0]
+
+        for p in range(len(self.points)):
+            color = COLORS[self.points[p]]
+
+            if color is not None:
+                self.stones_on_board[color] += 1
+            elif self.points[p] == EMPTY and not self.region[p]:
+                self._label_region(p, {})
+
+    def _add_region(self, label, sign):
+        """Adds a region to the estimate or takes it out again. A region
+        counts for a player if it only touches stones of that player.
+
+        Arguments:
+            label (int): label of the region
+            sign (int): 1 to add the region, -1 to take it out
+
+        Variables changed by this function:
+            self.area_estimate
+        """
+        size, white, black = self.regions[label]
+
+        if white and not black:
+            self.area_estimate[WHITE] += sign * size
+        elif black and not white:
+            self.area_estimate[BLACK] += sign * size
+
+    def _label_region(self, p, before, old=0):
+        """Labels the empty region containing point p with a new label,
+        counts its fields and contacts and adds it to the estimate.
+
+        Arguments:
+            p (int): empty point
+            before (dictionary): code of the points that have not been
+                                 taken in yet, see _update_estimate()
+            old (int): current label of the fields of the region
+
+        Variables changed by this function:
+            self.region
+            self.regions
+            self.next_region
+            self.area_estimate
+        """
+        points, region = self.points, self.region
+        label = self.next_region
+        self.next_region += 1
+
+        region[p] = label
+        fields = [p]
+
+        # nr. of contacts indexed by the code of the neighbor
+        contacts = [0, 0, 0, 0]
+        i = 0
+
+        # the fields list is the work stack: each field is expanded once
+        while i < len(fields):
+            q = fields[i]
+            i += 1
+
+            for d in self.offsets:
+                r = q + d
+                code = before[r] if r in before else points[r]
+
+                if code != EMPTY:
+                    contacts[code] += 1
+                elif region[r] == old:
+                    region[r] = label
+                    fields.append(r)
+
+        self.regions[label] = (len(fields), contacts[WHITE_STONE], contacts[BLACK_STONE])
+        self._add_region(label, 1)
+
+    def _relabel(self, p, label):
+        """Gives the fields of the region containing point p another label.
+
+        Arguments:
+            p (int): field of the region
+            label (int): the new label
+
+        Variables changed by this function:
+            self.region
+        """
+        region = self.region
+        old = region[p]
+        region[p] = label
+        fields = [p]
+
+        while fields:
+            q = fields.pop()
+
+            for d in self.offsets:
+                r = q + d
+
+                if region[r] == old:
+                    region[r] = label
+                    fields.append(r)
+
+    def _may_split(self, p, before):
+        """Checks whether a stone on point p may split its empty region:
+        the empty neighbors of p are not all connected through the
+        8 fields around p.
+
+        Arguments:
+            p (int): point of the new stone
+            before (dictionary): code of the points that have not been
+                                 taken in yet, see _update_estimate()
+
+        Returns:
+            (boolean): True if the region has to be labelled again
+        """
+        points, s = self.points, self.stride
+
+        # the fields around p in order, the neighbors at the even positions
+        ring = (p - s, p - s + 1, p + 1, p + s + 1, p + s, p + s - 1, p - 1, p - s - 1)
+        empty = [(before[q] if q in before else points[q]) == EMPTY for q in ring]
+
+        if all(empty):
+            return False
+
+        # count the runs of empty fields around p that hold a neighbor,
+        # starting behind a field that is not empty
+        start = empty.index(False)
+        runs = 0
+        neighbor = False
+
+        for i in range(start + 1, start + 9):
+            if empty[i % 8]:
+                neighbor = neighbor or i % 2 == 0
+            else:
+                runs += neighbor
+                neighbor = False
+
+        return runs > 1
+
+    def _fill_field(self, p, code, before):
+        """Takes a stone on an empty point into the estimate. Its region
+        is only labelled again if the stone may have split it.
+
+        Arguments:
+            p (int): point of the stone
+            code (int): stone code
+            before (dictionary): code of the points that have not been
+                                 taken in yet, see _update_estimate()
+
+        Variables changed by this function:
+            self.region
+            self.regions
+            self.next_region
+            self.area_estimate
+        """
+        points, region = self.points, self.region
+        label = region[p]
+        self._add_region(label, -1)
+
+        size, white, black = self.regions[label]
+        size -= 1
+        region[p] = 0
+        empty = []
+
+        # the contacts of p with the stones are gone, the stone touches
+        # the empty neighbors
+        for d in self.offsets:
+            q = p + d
+            other = before[q] if q in before else points[q]
+
+            if other == EMPTY:
+                empty.append(q)
+            elif other == WHITE_STONE:
+                white -= 1
+            elif other == BLACK_STONE:
+                black -= 1
+
+        if code == WHITE_STONE:
+            white += len(empty)
+        else:
+            black += len(empty)
+
+        if not size:
+            del self.regions[label]
+        elif len(empty) > 1 and self._may_split(p, before):
+            del self.regions[label]
+
+            for q in empty:
+                if region[q] == label:
+                    self._label_region(q, before, label)
+        else:
+            self.regions[label] = (size, white, black)
+            self._add_region(label, 1)
+
+    def _clear_field(self, p, code, before):
+        """Takes a removed stone into the estimate. The point joins the
+        regions of its empty neighbors, the smaller regions are merged into
+        the largest one.
+
+        Arguments:
+            p (int): point of the removed stone, empty in before
+            code (int): stone code of the removed stone
+            before (dictionary): code of the points that have not been
+                                 taken in yet, see _update_estimate()
+
+        Variables changed by this function:
+            self.region
+            self.regions
+            self.next_region
+            self.area_estimate
+        """
+        points, region, regions = self.points, self.region, self.regions
+        contacts = [0, 0, 0, 0]
+        starts = {}
+
+        for d in self.offsets:
+            q = p + d
+            other = before[q] if q in before else points[q]
+            contacts[other] += 1
+
+            if other == EMPTY:
+                starts[region[q]] = q
+
+        if not starts:
+            label = self.next_region
+            self.next_region += 1
+            size, white, black = 0, 0, 0
+        else:
+            for other in starts:
+                self._add_region(other, -1)
+
+            label = max(starts, key=lambda other: regions[other][0])
+            size, white, black = regions[label]
+
+            for other in starts:
+                if other != label:
+                    s, w, b = regions.pop(other)
+                    size, white, black = size + s, white + w, black + b
+                    self._relabel(starts[other], label)
+
+        # p touches the stones around it, the empty neighbors no longer
+        # touch the removed stone
+        size += 1
+        white += contacts[WHITE_STONE]
+        black += contacts[BLACK_STONE]
+
+        if code == WHITE_STONE:
+            white -= contacts[EMPTY]
+        else:
+            black -= contacts[EMPTY]
+
+        region[p] = label
+        regions[label] = (size, white, black)
+        self._add_region(label, 1)
+
+    def _update_estimate(self):
+        """Updates the score estimate for the points changed since the last
+        update. A new stone updates the counters of its region, which is only
+        labelled again if the stone may have split it. A removed stone merges
+        the regions around it.
+
+        Variables changed by this function:
+            self.estimate_read
+            self.region
+            self.regions
+            self.next_region
+            self.stones_on_board
+            self.area_estimate
+        """
+        end = self.change_start + len(self.changes)
+
+        if self.estimate_read == end:
+            return
+
+        before = self._changes_since(self.estimate_read)
+
+        # more changes than fields: start from scratch
+        if before is None:
+            self._reset_estimate()
+            return
+
+        points = self.points
+
+        # take in the changes one by one: the points that have not been
+        # taken in yet keep their old code in before
+        for p in list(before):
+            old, new = before[p], points[p]
+
+            if old != new and old != EMPTY:
+                self.stones_on_board[COLORS[old]] -= 1
+                before[p] = EMPTY
+                self._clear_field(p, old, before)
+
+            del before[p]
+
+            if old != new and new != EMPTY:
+                self.stones_on_board[COLORS[new]] += 1
+                self._fill_field(p, new, before)
+
+        self.estimate_read = end
+
+    def estimate(self):
+        """Returns the area score estimate of the running game: captured
+        stones, stones on the board and empty regions bordered by only one
+        color. It is updated from the points changed since the last call.
+
+        Returns:
+            list (int): estimate of each player [White, Black]
+        """
+        self._update_estimate()
+
+        return [self.captured[i] + self.stones_on_board[i] + self.area_estimate[i] for i in (WHITE, BLACK)]
+
+    def _reset_legality(self):
+        """Forgets the legality of all moves.
+
+        Variables changed by this function:
+            self.legality
+            self.legality_read
+            self.legal_list
+        """
+        # legality (without ko and superko) of a stone on each point,
+        # indexed by the stone code of the player.
+        # the surroundings of the points changed by the moves since the
+        # last query (from legality_read on in the change log) are only
+        # forgotten when legality is asked for the next time.
+        area = self.stride * self.stride
+        self.legality = (None, bytearray(area), bytearray(area))
+        self.legality_read = self.change_start + len(self.changes)
+
+        # legal moves of the current position: (version, list of moves)
+        self.legal_list = None
+
+    def _update_legality(self):
+        """Forgets the cached legality of all points that may have been
+        affected by the changed points: the changed points, their neighbors
+        and the liberties of the groups touching them.
+
+        Variables changed by this function:
+            self.legality
+            self.legality_read
+        """
+        points = self.points
+        changed = self._changes_since(self.legality_read)
+
+        # more changes than fields: start from scratch
+        if changed is None:
+            self._reset_legality()
+            return
+
+        dirty = set(changed)
+        roots = set()
+
+        for p in changed:
+            for q in [p] + [p + d for d in self.offsets]:
+                dirty.add(q)
+
+                if COLORS[points[q]] is not None:
+                    roots.add(self._find(q))
+
+        # the atari status of the touching groups may have changed
+        for r in roots:
+            for p in self._members(r):
+                for d in self.offsets:
+                    if points[p + d] == EMPTY:
+                        dirty.add(p + d)
+
+        for p in dirty:
+            self.legality[WHITE_STONE][p] = UNKNOWN
+            self.legality[BLACK_STONE][p] = UNKNOWN
+
+        self.legality_read = self.change_start + len(self.changes)
+
+    def _captures(self, p, code):
+        """Checks whether a stone may be placed on the point p without
+        regarding ko. Does not change the game.
+
+        Arguments:
+            p (int): point on the padded board
+            code (int): stone code of the player
+
+        Returns:
+            list (int): roots of the groups that would be killed,
+                        None if the move is not possible
+        """
+        points = self.points
+
+        # check if the position is free
+        if points[p] != EMPTY:
+            return None
+
+        # set the move validity initially to False
+        is_valid = False
 
-        Attributes initialized by this function:
-            self.size
-            self.turn
-            self.blocked_field
-            self.has_passed
-            self.game_over
-            self.board
-            self.territory
-            self.score
-            self.captured
-        """
-        # gameplay attributes
-        self.size = n
-        self.turn = BLACK
+        # remember the groups to kill
+        groups_to_kill = []
 
-        # used for ko-rule
-        self.blocked_field = None
+        # this is called for every move of a playout: look up the
+        # liberty counters once (the atari test is _in_atari inlined)
+        libs, lib_sum, lib_sum2 = self.libs, self.lib_sum, self.lib_sum2
 
-        # used to detect if bother players pass
-        self.has_passed = False
+        # All direct neighbors of p
+        for d in self.offsets:
+            q = p + d
+            other = points[q]
 
-        # game over flag
-        self.game_over = False
+            # Check if the neighbor is on the board
+            if other == OFF_BOARD:
+                continue
 
-        # the board is represented by a size x size - matrix. 
-        self.board = [[None for i in range(self.size)] for j in range(self.size)]   
-        self.territory = [[None for i in range(self.size)] for j in range(self.size)]
+            # an empty neighbor is a liberty of the new stone
+            if other == EMPTY:
+                is_valid = True
+                continue
 
-        # score from empty fields at the end of the game.
-        self.score = [0, 0]
+            # p is a liberty of the neighbor, if it is the only one,
+            # an enemy group will be killed and a group of the same
+            # color does not give any liberty to the new stone.
+            r = self._find(q)
+            in_atari = libs[r] * lib_sum2[r] == lib_sum[r] * lib_sum[r]
 
-        # stones killed during the game
-        self.captured = [0, 0] 
+            if other == code:
+                if not in_atari:
+                    is_valid = True
 
-    def passing(self):
-        """Action when a player passes his turn.
+            elif in_atari:
+                is_valid = True
 
-        Variables changed by this function:
-            self.game_over
-            self.turn
-            self.has_passed
-            self.blocked_field
-        """
+                if r not in groups_to_kill:
+                    groups_to_kill.append(r)
 
-        # do nothing if game is over
-        if self.game_over:
-            return False
-        
-        # both players pass => game over
-        if self.has_passed:
-            self.game_over = True
-            return True
-        
-        # invert the turn & set passed to true
-        self.turn = WHITE if (self.turn == BLACK) else BLACK     
-        self.has_passed = True
-        self.blocked_field = None
+        if not is_valid:
+            return None
 
-        return True
+        return groups_to_kill
 
-    def _stones(self):
-        """Returns a nested list (same shape as board) containing the colors of each stone.
+    def _repeats(self, p, code, groups_to_kill):
+        """Checks whether a move would repeat an earlier position (superko).
+
+        Arguments:
+            p (int): point of the new stone
+            code (int): stone code of the player
+            groups_to_kill (list): roots of the groups killed by the move
 
         Returns:
-            list (boolean) : multidimensional list containing the colors of the stones on the board.
+            (boolean): True if the move is forbidden by the superko-rule
         """
-        # initialize a new empty list with the size of the playing board
-        colors = [[None for i in range(self.size)] for j in range(self.size)]
+        if self.superko is None:
+            return False
 
-        for j in range(0, self.size):
-            for i in range(0, self.size):
-                if self.board[j][i] is None:
-                    colors[j][i] = None
-                else:
-                    colors[j][i] = self.board[j][i].color
-                            
-        return colors
+        new_hash = self.hash ^ self.keys[code][p]
 
-    def _add(self, grp):
-        """Adds a group of stones to the game
+        for r in groups_to_kill:
+            for q in self._members(r):
+                new_hash ^= self.keys[3 - code][q]
 
-        Arguments:
-            grp (Group): The group that shall be added
-        
-        Attributes updated by this function:
-            self.board
-        """
-        for (x, y) in grp.stones:
-            self.board[y][x] = grp
-    
-    def _remove(self, grp):
-        """Removes a group of stones from the game
+        return self._history_key(new_hash, not self.turn) in self.history
+
+    def _is_legal(self, p):
+        """Checks whether the current player may place a stone on point p.
 
         Arguments:
-            grp (Group): The group that shall be removed
-        
-        Attributes updated by this function:
-            self.board
+            p (int): point on the padded board
+
+        Returns:
+            (boolean): True if the move is legal
         """
-        for (x, y) in grp.stones:
-            self.board[y][x] = None
+        code = self.turn + 1
 
-    def _kill(self, grp):
-        """Removes a group of stones from the game and increases the
-        counter of captured stones.
+        # the update may replace the arrays, read them afterwards
+        if self.legality_read != self.change_start + len(self.changes):
+            self._update_legality()
 
-        Arguments:
-            grp (Group): The group that has been killed - needs to be removed
+        legality = self.legality[code]
 
-        Attributes updated by this function:
-            self.board
-            self.captured
-            self.group
-        """
-        # increase the caputured counter of the opposite color by the nr. of stones in the grp 
-        self.captured[not grp.color] += grp.size
+        if legality[p] == UNKNOWN:
+            legality[p] = ILLEGAL if self._captures(p, code) is None else LEGAL
+
+        if legality[p] == ILLEGAL:
+            return False
+
+        # ko-rule
+        if self.blocked_field is not None and p == self._point(*self.blocked_field):
+            return False
+
+        # superko-rule
+        if self.superko is None:
+            return True
 
-        # remove the group
-        self._remove(grp)
+        return not self._repeats(p, code, self._captures(p, code))
 
-    def _liberties(self, grp):
-        """Counts the number of empty fields adjacent to the group.
+    def is_legal(self, x, y):
+        """Checks whether the current player may place a stone on (x, y).
+        Does not change the game.
 
         Arguments:
-            grp (Group): a group of stones.
+            x (int): x - coordinate
+            y (int): y - coordinate
 
         Returns:
-            (int): nr. of liberties of that group
+            (boolean): True if place_stone(x, y) would succeed
         """
-        return sum([1 for u, v in grp.border if self.board[v][u] is None])     
+        if self.game_over:
+            return False
 
-    def add_scores(self):
-        """Sums up the scores: adding empty fields + captured stones per player
+        if x < 0 or y < 0 or x >= self.size or y >= self.size:
+            return False
 
-        Returns:
-            list (int): containing the scores of each player
-        """
-        return [self.score[0] + self.captured[0], self.score[1] + self.captured[1]]
+        return self._is_legal(self._point(x, y))
 
-    def get_data(self):
-        """Returns the data object containing all relevant information to the controller.
+    def legal_moves(self):
+        """Returns all moves the current player may play.
+        The list is kept until the game changes: the version changes with
+        every move, pass, undo() and redo(), also when a position is reached
+        again with a different history (superko).
 
         Returns:
-            data (dictionary): data object for the controller
+            list (tuple): x and y coordinates of the legal moves
         """
-        data = {
-            'size'      : self.size,
-            'stones'    : self._stones(),
-            'territory' : self.territory,
-            'game_over' : self.game_over,
-            'score'     : self.add_scores(),
-            'color'     : self.turn
-        }
+        if self.game_over:
+            return []
+
+        if self.legal_list is None or self.legal_list[0] != self.version:
+            moves = []
+
+            for y in range(self.size):
+                for x in range(self.size):
+                    if self._is_legal(self._point(x, y)):
+                        moves.append((x, y))
+
+            self.legal_list = (self.version, moves)
 
-        return data
+        return list(self.legal_list[1])
 
     def place_stone(self, x, y):
         """Attempts to place a new stone. 
@@ -189,92 +1710,151 @@ class Model(object):
             self.has_passed
             self.blocked_field
             self.turn
-            self.board - adds / removes / kills stones
+            self.points - adds / removes / kills stones
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+            self.hash
+            self.history
+            self.journal
+            self.redo_moves
+            self.changes
+            self.captured
         """
         # check if the game is finished
         if self.game_over:
             return False
-        
-        # check if the position is free
-        if self.board[y][x] is not None:
+
+        # check if the position is on the board
+        if x < 0 or y < 0 or x >= self.size or y >= self.size:
             return False
 
+        p = self._point(x, y)
+
         # check if the field is already blocked
         if self.blocked_field == (x, y):
             return False
 
-        # create new group with the given coordinates
-        new_group = Group(stones=[(x, y)], color=self.turn)
-
-        # create two lists to remember the groups to remove / kill
-        groups_to_remove = []
-        groups_to_kill = []
+        code = self.turn + 1
 
         ######################################
         # Move Validation
         ######################################
 
-        # set the move validity initially to False
-        is_valid = False
+        # the position must be free, the new stone must have a liberty or
+        # kill an enemy group and the position must not be repeated
+        groups_to_kill = self._captures(p, code)
+
+        # the move is invalid
+        if groups_to_kill is None or self._repeats(p, code, groups_to_kill):
+            return False
 
-        # All direct neighbors of (x, y)
-        for (u, v) in [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]:
+        # remember the state for undo()
+        previous = self._state()
 
-            # Check if the neighbor is on the board
-            if u < 0 or v < 0 or u >= self.size or v >= self.size:
-                continue
-            
-            # Add the neighbor to the border of the new group
-            new_group.border.add((u, v))
-
-            other_group = self.board[v][u]
-            
-            # check if neighbor is None
-            if other_group is None:
-                is_valid = True
-                continue
+        killed = self._execute(p, code, groups_to_kill)
+        self._record(p, killed, previous)
 
-            # same color
-            if new_group.color == other_group.color:
-                # merge the two groups
-                new_group = new_group + other_group
+        return True
 
-                # remember to delte the old grp (other_group)
-                groups_to_remove.append(other_group)
+    def _execute(self, p, code, groups_to_kill):
+        """Places a stone of a valid move, kills the enemy groups and
+        ends the turn. The move is not recorded in the journal.
 
-            # groups have different colors
-            # check that there is only one free adjacent field to other_group
-            elif self._liberties(other_group) == 1:
-                is_valid = True
-                
-                # remember to kill the other_group
-                if other_group not in groups_to_kill: 
-                    groups_to_kill.append(other_group)
+        Arguments:
+            p (int): point of the new stone
+            code (int): stone code of the player
+            groups_to_kill (list): roots of the groups killed by the move
 
-        # new_group must have at least one free adjacent field
-        if self._liberties(new_group) >= 1:
-            is_valid = True
+        Returns:
+            list: stones of each group that has been killed
+
+        Variables changed by this function
+            self.has_passed
+            self.blocked_field
+            self.turn
+            self.points - adds / removes / kills stones
+            self.parent
+            self.next_stone
+            self.group_size
+            self.libs
+            self.lib_sum
+            self.lib_sum2
+            self.hash
+            self.changes
+            self.captured
+            self.version
+        """
+        points = self.points
 
         ######################################
         # Move Execution (only if valid)
         ######################################
 
-        # the move is valid
-        if is_valid:
-            # remove groups
-            for grp in groups_to_remove:
-                self._remove(grp)
+        # create new group with the given coordinates
+        points[p] = code
+        self.hash ^= self.keys[code][p]
+        root = p
+        self.group_size[p] = 1
 
-            # kill groups
-            for grp in groups_to_kill:
-                self._kill(grp)
+        # the liberty counters are updated inline (_add_liberty and
+        # _remove_liberty), the liberties of the new stone are added
+        # to the merged group at the end
+        libs, lib_sum, lib_sum2 = self.libs, self.lib_sum, self.lib_sum2
+        libs[p] = lib_sum[p] = lib_sum2[p] = 0
+        new_libs = new_sum = new_sum2 = 0
 
-            # add the new group
-            self._add(new_group)
-        
-        # the move is invalid
-        else:
-            return False
+        parent = self.parent
+
+        for d in self.offsets:
+            q = p + d
+            other = points[q]
+
+            if other == OFF_BOARD:
+                continue
+
+            if other == EMPTY:
+                new_libs += 1
+                new_sum += q
+                new_sum2 += q * q
+                continue
+
+            # the new stone takes a liberty from the neighbor
+            # (_find inlined)
+            r = q
+
+            while parent[r] != r:
+                parent[r] = parent[parent[r]]
+                r = parent[r]
+
+            libs[r] -= 1
+            lib_sum[r] -= p
+            lib_sum2[r] -= p * p
+
+            # same color: merge the two groups
+            if other == code and r != root:
+                root = self._union(root, r)
+
+        libs[root] += new_libs
+        lib_sum[root] += new_sum
+        lib_sum2[root] += new_sum2
+
+        # the legality of the surrounding moves, the score estimate,
+        # the view and the symmetric hashes may have changed
+        changes = self.changes
+        changes.append(p << 2)
+
+        # kill groups
+        killed = [self._kill(r) for r in groups_to_kill] if groups_to_kill else []
+
+        for stones in killed:
+            changes += [(q << 2) | (3 - code) for q in stones]
+
+        if len(changes) > 2 * len(points):
+            self._trim_changes()
 
         ######################################
         # ko-rule: block the field where the stone has just been placed
@@ -284,9 +1864,8 @@ class Model(object):
         # 1. the new group has only one stone
         # 2. only one group has been killed
         # 3. the killed group has only had one stone
-        if new_group.size == 1 and len(groups_to_kill) == 1 and groups_to_kill[0].size == 1:
-            for (x, y) in groups_to_kill[0].stones:
-                self.blocked_field = (x, y)
+        if self.group_size[root] == 1 and len(killed) == 1 and len(killed[0]) == 1:
+            self.blocked_field = self._coords(killed[0][0])
         else:
             self.blocked_field = None
         
@@ -297,24 +1876,27 @@ class Model(object):
         # switch the color (turn)
         self.turn = WHITE if (self.turn == BLACK) else BLACK
         self.has_passed = False
+        self.version = next(_VERSIONS)
 
-        return True
+        return killed
 
     def _compute_score(self):
         """Counts the number of marked fields and updates the score.
 
         Variables changed by this function 
             self.score
+            self.version
         """
 
         # reset the scores to zero
         self.score = [0, 0]
+        self.version = next(_VERSIONS)
 
         for j in range(0, self.size):
             for i in range(0, self.size):
                 # count the black stones
                 if self.territory[j][i] == BLACK:
-                    if self.board[j][i] != None:
+                    if self.points[self._point(i, j)] != EMPTY:
                         # add 1 additional point for dead stones inside the territory 
                         self.score[BLACK] += 2
                     else:
@@ -322,122 +1904,172 @@ class Model(object):
                         
                 # count the white stones        
                 elif self.territory[j][i] == WHITE:
-                    if self.board[j][i] != None:
+                    if self.points[self._point(i, j)] != EMPTY:
                         # add 1 additional point for dead stones inside the territory 
                         self.score[WHITE] += 2
                     else:
                         self.score[WHITE] += 1
 
-    def _claim_empty(self, x, y, color, area=None):
-        """ Claims an empty field including all adjacent (neighboring) empty fields.
+    def _marking_index(self):
+        """Returns the index of the empty regions used by mark_territory().
+        It is built once per finished game, the board does not change
+        until undo() continues the game.
+
+        Returns:
+            region (list): label of the region of each empty point
+            regions (list): empty points of each region, indexed by label
+
+        Variables changed by this function:
+            self.marking
+            self.score
+        """
+        if self.marking is None:
+            labels = [0] * len(self.points)
+            regions = [None]
+
+            for y in range(self.size):
+                for x in range(self.size):
+                    p = self._point(x, y)
+
+                    if self.points[p] == EMPTY and not labels[p]:
+                        regions.append(self._find_empty(p, labels, len(regions))[0])
+
+            # the stones are labelled as well, only keep the empty points
+            region = [labels[p] if self.points[p] == EMPTY else 0 for p in range(len(labels))]
+            self.marking = (region, regions)
+
+            # the counters are kept up to date by _mark() from now on
+            self._compute_score()
+
+        return self.marking
+
+    def _mark(self, p, color):
+        """Marks a single field and updates the score by its value.
+
+        Arguments:
+            p (int): point on the padded board
+            color (boolean): color the field will receive, None to unmark it
 
-        Arguments
-            x (int): x-coordinate
-            y (int): y-coordinate
-            color (boolean): color the empty field will receive
-            area (list):     visited coordinates / fields
-        
         Variables changed by this function
             self.territory
+            self.score
+            self.territory_changed
+            self.version
         """
+        x, y = self._coords(p)
+        old = self.territory[y][x]
 
-        # initialize a new empty list
-        if area is None:
-            area = list()
-
-        # recursion stopping criteria
-        # position is not empty or has already been traversed
-        if self.board[y][x] is not None or (x, y) in area:
+        if old == color:
             return
 
-        # claim the empty field
+        self.territory_changed.append(p)
+        self.version = next(_VERSIONS)
+
+        # dead stones inside the territory count 1 additional point
+        value = 1 if self.points[p] == EMPTY else 2
+
+        if old is not None:
+            self.score[old] -= value
+
+        if color is not None:
+            self.score[color] += value
+
         self.territory[y][x] = color
 
-        # remembering the current location 
-        area.append((x, y))
+    def _claim_empty(self, p, color):
+        """ Claims an empty field including all adjacent (neighboring) empty fields.
+        The region is taken from the index, so the work is linear in its size.
 
-        # recursively checking all neighbors
-        for (u, v) in [(x-1, y), (x, y-1), (x+1, y), (x, y+1)]:
+        Arguments
+            p (int): point on the padded board
+            color (boolean): color the empty field will receive
+        
+        Variables changed by this function
+            self.territory
+            self.score
+        """
+        region, regions = self._marking_index()
 
-            # check that the neighbor actually exists on the board
-            if u < 0 or v < 0 or u >= self.size or v >= self.size:
-                continue
-            
-            # claim neighboring empty field
-            if (u, v) not in area and self.board[v][u] is None:
-                self._claim_empty(u, v, color, area=area)
+        for q in regions[region[p]]:
+            self._mark(q, color)
 
-    def _claim_group(self, x, y, color, area=None):
+    def _claim_group(self, p, color):
         """Claims an entire group and also all adjacent empty fields.
 
         Arguments
-            x (int) - x-coordinate
-            y (int) - y-coordinate
+            p (int) - point on the padded board
             color (boolean) - color of player the empty field will receive
-            area (list) - visited coordinates / fields
 
         Variables changed by this function
             self.territory
+            self.score
         """
+        region, regions = self._marking_index()
+        stones = self._members(p)
 
-        # initialize a new empty list
-        if area is None:
-            area = list()
+        # claiming each stone in the group at point p
+        for q in stones:
+            self._mark(q, color)
 
-        # claiming each stone in the group at coordinates (x, y)
-        for (u, v) in self.board[y][x].stones:
-            if (u, v) not in area:
-                # remembering the current location
-                area.append((u, v))
+        # claiming each region adjacent to the group (once)
+        labels = set([region[q + d] for q in stones for d in self.offsets]) - set([0])
 
-                # claiming the position
-                self.territory[v][u] = color
-        
-        # claiming each empty field in the adjacent empty fields
-        for (u, v) in self.board[y][x].border:
-            if self.board[v][u] is None and (u, v) not in area:
-                self._claim_empty(u, v, color, area=area) 
-    
-    def _find_empty(self, x, y, area=None, count=None):
-        """ Finds the connected empty fields starting at (x, y) and
-        counts the adjacent stones of each color.
+        for label in labels:
+            for q in regions[label]:
+                self._mark(q, color)
+
+    def _find_empty(self, p, labels=None, label=1):
+        """ Finds the connected empty fields starting at point p and
+        counts the adjacent stones of each color. Each stone is counted
+        once, even if it touches several fields of the area.
+
+        Arguments
+            p (int): empty point on the padded board
+            labels (list): label per point, 0 for unvisited points;
+                           the fields of the area and the counted stones
+                           receive the label
+            label (int): label of this area, must differ from the labels
+                         already used
 
         Returns:
-            area (list):    empty fields [Black, White]
-            count (list):   number of adjacents stones to [Black, White]
+            area (list):    empty fields of the area
+            count (list):   number of adjacent stones [White, Black]
         """
-        
-        # TODO: BUG: Fix that stones are counted multiple times if more than one empty field is adjacent to them
+        points = self.points
 
-        # initialize a new empty list
-        if area is None:
-            area = list()
+        # initialize the labels
+        if labels is None:
+            labels = [0] * len(points)
 
-        # initializes the count
-        if count is None:
-            count = [0, 0]
+        area = []
+        count = [0, 0]
 
-        # recursion stopping criteria
         # position is not empty or has already been traversed
-        if self.board[y][x] is not None or (x, y) in area:
+        if points[p] != EMPTY or labels[p]:
             return area, count
 
-        # add the current position to the traversed
-        area.append((x, y))
+        labels[p] = label
+        stack = [p]
 
-        # recursively checking all neighbors
-        for (u, v) in [(x-1, y), (x, y-1), (x+1, y), (x, y+1)]:
+        while stack:
+            p = stack.pop()
+            area.append(p)
 
-            # check that the neighbor actually exists on the board
-            if u < 0 or v < 0 or u >= self.size or v >= self.size:
-                continue
-            
-            # claim neighboring empty field
-            if (u, v) not in area:
-                if self.board[v][u] is None:
-                    self._find_empty(u, v, area=area, count=count)
-                else:
-                    count[self.board[v][u].color] += 1
+            for d in self.offsets:
+                q = p + d
+
+                # skip the fields of this area and the stones already counted
+                if labels[q] == label:
+                    continue
+
+                code = points[q]
+
+                if code == EMPTY:
+                    labels[q] = label
+                    stack.append(q)
+                elif code != OFF_BOARD:
+                    labels[q] = label
+                    count[COLORS[code]] += 1
 
         return area, count
 
@@ -445,7 +2077,8 @@ class Model(object):
         """Function that can be evoked by user to claim territory for one player.
         For empty fields it will also mark all adjacent empty fields,
         for fields that contain a stone it will mark the entire stone
-        group and all adjacent empty spaces.
+        group and all adjacent empty spaces. The score is updated by
+        the changed fields only.
 
         Arguments:
             x (int): x-coordinate on the board
@@ -460,8 +2093,10 @@ class Model(object):
         if not self.game_over:
             return
 
+        p = self._point(x, y)
+
         # claim an empty field
-        if self.board[y][x] is None:
+        if self.points[p] == EMPTY:
             # cycle through the colours depending on how the field is currently marked
             # None => Black => White => None
             col_dict = {None:BLACK, BLACK:WHITE, WHITE:None}
@@ -469,62 +2104,253 @@ class Model(object):
             # change the color
             color = col_dict[self.territory[y][x]]
 
-            # recursively claim the fields
-            self._claim_empty(x, y, color)
+            # claim the fields
+            self._claim_empty(p, color)
 
         # claim a group
         else:
             # Choose whether to mark or unmark the group
             if self.territory[y][x] is None:
-                color = not self.board[y][x].color
+                color = not COLORS[self.points[p]]
             else:
                 color = None
 
-            # recursively claim the fields
-            self._claim_group(x, y, color)
+            # claim the fields
+            self._claim_group(p, color)
 
-        # compute the score
-        self._compute_score()
+    def _benson(self, code):
+        """Benson's algorithm: finds the groups of one color that can not be
+        captured, even if the player always passes, and the regions they own.
+
+        A region is a connected area of points without a stone of the color.
+        It is vital to a group if all of its empty fields are liberties of
+        the group. Groups with less than two vital regions are removed,
+        which removes the regions they touch, until nothing changes.
+        Every group and region is removed at most once, so the work is
+        linear in the number of groups, regions and their contacts.
+
+        Arguments:
+            code (int): stone code of the color
+
+        Returns:
+            alive (list): stones of the unconditionally alive groups
+            owned (list): points (empty or dead enemy stones) of the regions
+                          enclosed by alive groups in which every empty field
+                          is a liberty of one of them
+        """
+        points, offsets = self.points, self.offsets
+
+        # label the regions: connected points on the board without own stones
+        region = [0] * len(points)
+        regions = [None]
+
+        # per region: groups it touches, groups it is vital to and
+        # whether every empty field touches a group
+        touching = [None]
+        vital = [None]
+        enclosed = [None]
+
+        for p in range(len(points)):
+            if points[p] == code or points[p] == OFF_BOARD or region[p]:
+                continue
+
+            label = len(regions)
+            region[p] = label
+            fields = [p]
+            groups = set()
+            liberties = {}
+            empty = 0
+            covered = True
+            i = 0
+
+            while i < len(fields):
+                q = fields[i]
+                i += 1
+                roots = set()
+
+                for d in offsets:
+                    r = q + d
+                    other = points[r]
+
+                    if other == code:
+                        roots.add(self._find(r))
+                    elif other != OFF_BOARD and not region[r]:
+                        region[r] = label
+                        fields.append(r)
+
+                groups |= roots
+
+                # count for each group how many empty fields it touches
+                if points[q] == EMPTY:
+                    empty += 1
+                    covered = covered and len(roots) > 0
+
+                    for r in roots:
+                        liberties[r] = liberties.get(r, 0) + 1
+
+            regions.append(fields)
+            touching.append(groups)
+            vital.append([r for r in groups if liberties.get(r, 0) == empty])
+            enclosed.append(covered)
+
+        # the regions each group touches and its number of vital regions
+        neighbor_regions = {}
+        healthy = {}
+
+        for label in range(1, len(regions)):
+            for r in touching[label]:
+                neighbor_regions.setdefault(r, []).append(label)
+                healthy.setdefault(r, 0)
+
+            for r in vital[label]:
+                healthy[r] += 1
+
+        # remove the groups with less than two vital regions
+        removed_group = set()
+        removed_region = [False] * len(regions)
+        queue = [r for r in healthy if healthy[r] < 2]
+
+        while queue:
+            r = queue.pop()
+
+            if r in removed_group:
+                continue
+
+            removed_group.add(r)
+
+            # the regions of a removed group are no longer safe
+            for label in neighbor_regions[r]:
+                if removed_region[label]:
+                    continue
+
+                removed_region[label] = True
+
+                for s in vital[label]:
+                    healthy[s] -= 1
+
+                    if healthy[s] < 2 and s not in removed_group:
+                        queue.append(s)
+
+        alive = []
 
-    def find_territory(self):
+        for r in healthy:
+            if r not in removed_group:
+                alive += self._members(r)
+
+        owned = []
+
+        for label in range(1, len(regions)):
+            if not removed_region[label] and touching[label] and enclosed[label]:
+                owned += regions[label]
+
+        return alive, owned
+
+    def unconditional_life(self):
+        """Finds the unconditionally alive (pass-alive) groups of both
+        colors and the regions they own, see _benson().
+
+        Returns:
+            alive (list): stones of the alive groups [White, Black]
+            owned (list): points owned by the alive groups [White, Black]
+        """
+        white_alive, white_owned = self._benson(WHITE_STONE)
+        black_alive, black_owned = self._benson(BLACK_STONE)
+
+        return [white_alive, black_alive], [white_owned, black_owned]
+
+    def find_territory(self, probability=None, threshold=0.8, benson=True):
         """Tries to automatically claim territory for the proper players.
 
         Current algorithm:
-            It just claims empty areas that are completely surrounded
-            by one color. Therefore it will not recognise prisoners or dead groups.
+            It claims empty areas that are completely surrounded by one
+            color. With an ownership estimate, the fields (empty or dead
+            stones) that belong to one color with at least the threshold
+            probability are claimed as well (see playout.find_territory(),
+            which estimates it with random playouts). At last the regions
+            owned by unconditionally alive groups (Benson's algorithm) are
+            claimed including the enemy stones in them, which are dead.
+
+        Arguments:
+            probability (list): probability that each field belongs to
+                                [White, Black], indexed by [y][x], None
+                                to claim only the surrounded areas
+            threshold (float): probability at which a field is claimed
+            benson (boolean): claim the regions of unconditionally alive
+                              groups, False for the boards at the end of
+                              random playouts, where it is not worth the time
 
         Attributes updated by this function:
             self.score
             self.territory
         """
 
-        # TODO: Update this algorithm to claim fields that are completely surrounded by one color (recognize prisoners and dead groups).
-
-        # Keep track of the checked fields
-        covered_area = list()
+        # Label every empty area in a single pass over the board
+        # (the labels of the stones only prevent counting them twice)
+        labels = [0] * len(self.points)
+        label = 0
 
         for y in range(self.size):
             for x in range(self.size):
+                p = self._point(x, y)
+
+                # only check empty fields that are not part of an earlier area
+                if self.points[p] != EMPTY or labels[p]:
+                    continue
+
+                # Find all adjacent empty fields
+                # Count contains the number of adjacent stones of each color.
+                label += 1
+                area, count = self._find_empty(p, labels, label)
+
+                # claim the territory if black has no adjacent stones
+                if count[BLACK] == 0 and count[WHITE] > 0:
+                    color = WHITE
 
-                # skip the coordinates if they have already been checked
-                if (x, y) in covered_area:
+                # claim the territory if white has no adjacent stones
+                elif count[WHITE] == 0 and count[BLACK] > 0:
+                    color = BLACK
+
+                else:
                     continue
 
-                # only check empty fields
-                if self.board[y][x] is None:
+                for q in area:
+                    self._mark(q, color)
 
-                    # Find all adjacent empty fields
-                    # Count contains the number of adjacent stones of each color.
-                    area, count = self._find_empty(x, y, area=covered_area)
-                    covered_area += area
+        # claim the fields owned by one color with a high probability
+        if probability is not None:
+            for y in range(self.size):
+                for x in range(self.size):
+                    p = self._point(x, y)
+                    own = COLORS[self.points[p]]
 
-                    # claim the territory if black has no adjacent stones
-                    if count[BLACK] == 0 and count[WHITE] > 0:
-                        self._claim_empty(x, y, WHITE)
+                    for color in (WHITE, BLACK):
+                        if color != own and probability[color][y][x] >= threshold:
+                            self._mark(p, color)
 
-                    # claim the territory if white has no adjacent stones
-                    elif count[WHITE] == 0 and count[BLACK] > 0:
-                        self._claim_empty(x, y, BLACK)
+        # claim the regions of the unconditionally alive groups
+        if benson:
+            alive, owned = self.unconditional_life()
+
+            for color in (WHITE, BLACK):
+                for q in owned[color]:
+                    self._mark(q, color)
 
         # compute the score
-        self._compute_score()
\ No newline at end of file
+        self._compute_score()
+
+    def claim_territory(self, territory):
+        """Takes over the territory found on a copy of the game, e.g. by
+        find_territory() on a clone in a background thread.
+
+        Arguments:
+            territory (list): WHITE, BLACK or None for each field, indexed by [y][x]
+
+        Attributes updated by this function:
+            self.score
+            self.territory
+        """
+        for y in range(self.size):
+            for x in range(self.size):
+                self._mark(self._point(x, y), territory[y][x])
+
+        self._compute_score()
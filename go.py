@@ -5,8 +5,9 @@
 
 # Starting screen for an implementation of the Go game using the MVC architecture
 
-from Tkinter import Tk, Label, Entry, Button, W, mainloop, StringVar
+from Tkinter import Tk, Label, Entry, Button, Checkbutton, W, mainloop, StringVar, IntVar
 from controller import Controller
+from mcts import MCTSPlayer, TABLE_MEGABYTES
 
 
 class Go_Game():
@@ -22,6 +23,14 @@ class Go_Game():
 
         Attributes updated by this function:
             self.grid_size
+            self.player_1_name
+            self.player_2_name
+            self.computer_1
+            self.computer_2
+            self.seconds
+            self.playouts
+            self.processes
+            self.table
         """
 
         # Create screen to ask for game settings
@@ -43,6 +52,10 @@ class Go_Game():
         self.player_1_name = Entry(starting_screen, textvariable=sv_player_1)
         self.player_1_name.grid(row=1, column=1)
 
+        # Let the computer play black
+        self.computer_1 = IntVar()
+        Checkbutton(starting_screen, text='Computer', variable=self.computer_1).grid(row=1, column=2, sticky=W)
+
         # Create an input field for the name of the second (white) player
         # (also add a callback method to detect changes)
         Label(starting_screen, text='Name Player 2 (White)').grid(row=3)
@@ -51,13 +64,41 @@ class Go_Game():
         self.player_2_name = Entry(starting_screen, textvariable=sv_player_2)
         self.player_2_name.grid(row=3, column=1)
 
+        # Let the computer play white
+        self.computer_2 = IntVar()
+        Checkbutton(starting_screen, text='Computer', variable=self.computer_2).grid(row=3, column=2, sticky=W)
+
+        # Create input fields for the budget of the computer per move
+        # (the search stops as soon as one of them is used up)
+        Label(starting_screen, text='Computer Seconds per Move').grid(row=4)
+        self.seconds = Entry(starting_screen)
+        self.seconds.insert(0, '2')
+        self.seconds.grid(row=4, column=1)
+
+        Label(starting_screen, text='Computer Playouts per Move').grid(row=5)
+        self.playouts = Entry(starting_screen)
+        self.playouts.grid(row=5, column=1)
+
+        # Create an input field for the nr. of search processes of the computer
+        Label(starting_screen, text='Computer Processes').grid(row=6)
+        self.processes = Entry(starting_screen)
+        self.processes.insert(0, '1')
+        self.processes.grid(row=6, column=1)
+
+        # Create an input field for the memory of the transposition table
+        # of each search process (0 for no table)
+        Label(starting_screen, text='Computer Table Memory (MB)').grid(row=7)
+        self.table = Entry(starting_screen)
+        self.table.insert(0, str(TABLE_MEGABYTES))
+        self.table.grid(row=7, column=1)
+
         # Add a button to start a new go game
         Button(starting_screen, text='Start', command=self.start_game).grid(
-            row=4, column=1, sticky=W, pady=4)
+            row=8, column=1, sticky=W, pady=4)
 
         # Create a label for messages
         self.info_label = Label(starting_screen, text='')
-        self.info_label.grid(row=5, columnspan=2)
+        self.info_label.grid(row=9, columnspan=3)
 
         # Display the starting screen
         mainloop()
@@ -98,9 +139,32 @@ class Go_Game():
             self.info_label.config(text='Please enter your names!')
             return None
 
+        # Read the budget of the computer players (empty fields are no limit)
+        seconds = self.seconds.get().strip()
+        playouts = self.playouts.get().strip()
+        processes = self.processes.get().strip()
+        table = self.table.get().strip()
+
+        try:
+            seconds = float(seconds) if seconds else None
+            playouts = int(playouts) if playouts else None
+            processes = int(processes) if processes else 1
+            table = float(table) if table else 0
+        except ValueError:
+            self.info_label.config(text='Please enter numbers for the computer!')
+            return None
+
+        if (self.computer_1.get() or self.computer_2.get()) and seconds is None and playouts is None:
+            self.info_label.config(text='Please enter seconds or playouts for the computer!')
+            return None
+
+        # Create the computer players
+        computer_1 = MCTSPlayer(seconds, playouts, workers=processes, table_megabytes=table) if self.computer_1.get() else None
+        computer_2 = MCTSPlayer(seconds, playouts, workers=processes, table_megabytes=table) if self.computer_2.get() else None
+
         #start a the game
         if __name__ == '__main__':
-            Controller(n, player_1, player_2)
+            Controller(n, player_1, player_2, computer_1, computer_2)
 
 # Open the starting screen
 Go_Game()
@@ -275,8 +275,12 @@ class Circle(object):
                     x + r*math.cos((i+1)*2*math.pi/n), y + r*math.sin((i+1)*2*math.pi/n)]
                    for i in range(n+1)], [])
         # Draw filled circle.
-        batch.add(3*(n+1), pyglet.gl.GL_TRIANGLES, group, ('v2f', pos),
-                  ('c4f', sum([color for _ in range(3*(n+1))], [])))
+        self.vertex_list = batch.add(3*(n+1), pyglet.gl.GL_TRIANGLES, group, ('v2f', pos),
+                                     ('c4f', sum([color for _ in range(3*(n+1))], [])))
+
+    def delete(self):
+        """Remove the circle from its batch."""
+        self.vertex_list.delete()
 
 
 
@@ -0,0 +1,257 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Controller of the Go game without a display
+#
+# HeadlessController has the same play / passing / mark_territory / new_game
+# surface as the controller of the window, but it only depends on the
+# game model: neither pyglet nor Tkinter is imported. It is meant to be
+# used as a library, e.g. by servers, test harnesses or batch analysis:
+#
+#   game = HeadlessController(9)
+#   game.play((2, 3))
+#   game.passing()
+#   print(game.message, game.get_changes())
+#
+# Computer players (mcts.MCTSPlayer) move synchronously in computer_move().
+
+from game_model import Model
+from playout import find_territory
+import sgf
+
+# message when the territory has been marked
+GAME_OVER_MESSAGE = 'Game is Over! Click on the board to correct the territory.'
+
+
+class HeadlessController(object):
+    """Drives the game model and keeps the message for the players,
+    without any window."""
+
+    def __init__(self, grid_size, player_1_name='Black', player_2_name='White', computer_1=None, computer_2=None):
+        """Initialize the controller and start a new game.
+
+        Arguments
+            grid_size (int): number of squares (n x n)
+            player_1_name (str): name of the first (black) player
+            player_2_name (str): name of the second (white) player
+            computer_1 (MCTSPlayer): computer player for black, None for a human
+            computer_2 (MCTSPlayer): computer player for white, None for a human
+
+        Attributes initialized by this function
+            self.n
+            self.player_1
+            self.player_2
+            self.model
+            self.computers
+            self.message
+        """
+        self.n = int(grid_size)
+        self.player_1 = player_1_name
+        self.player_2 = player_2_name
+        self.model = Model(self.n)
+
+        # computer players indexed by color (WHITE = 0, BLACK = 1)
+        self.computers = [computer_2, computer_1]
+
+        # message for the players about the last action
+        self.message = "Let's start, " + self.player_1 + "!"
+
+
+    def get_data(self):
+        """Returns the full state of the game, see Model.get_data().
+
+        Returns:
+            (Snapshot): size, stones, territory, score, estimate, color and game_over
+        """
+        return self.model.get_data()
+
+
+    def get_changes(self):
+        """Returns the changes since the last call, see Model.get_changes().
+
+        Returns:
+            (dictionary): changed stones and territory, score, estimate, color and game_over
+        """
+        return self.model.get_changes()
+
+
+    def save(self, stream):
+        """Writes the record of the game (finished or running) as SGF.
+
+        Arguments
+            stream (file): file opened for writing (text)
+        """
+        sgf.dump(self.model, stream, self.player_1, self.player_2)
+
+
+    def _computer_to_move(self):
+        """Returns the computer player whose turn it is.
+
+        Returns:
+            (MCTSPlayer): the computer player, None if a human is to move
+        """
+        if self.model.game_over:
+            return None
+
+        return self.computers[self.model.turn]
+
+
+    def _end_game(self):
+        """Marks the territory and the dead stones automatically when both
+        players have passed. The marks can still be corrected by mark_territory().
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        find_territory(self.model)
+        self.message = GAME_OVER_MESSAGE
+
+
+    def _moved(self, move):
+        """Tells the computer players the move that has been played,
+        so they can reuse their search trees.
+
+        Arguments
+            move (tuple): x and y coordinate of the move, None for a pass
+        """
+        for computer in self.computers:
+            if computer is not None:
+                computer.advance(move)
+
+
+    def _computer_played(self, move):
+        """Plays the move found by the computer player whose turn it is.
+
+        Arguments
+            move (tuple): x and y coordinate of the move, None for a pass
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        player_name = self.player_1 if self.model.get_turn() else self.player_2
+
+        if move is None:
+            self.model.passing()
+            self._moved(None)
+
+            if self.model.is_game_over():
+                self._end_game()
+            else:
+                self.message = player_name + ' passed, continue playing!'
+        else:
+            self.model.place_stone(*move)
+            self._moved(tuple(move))
+            self.message = player_name + ' played, your turn!'
+
+
+    def computer_move(self):
+        """Lets the computer player whose turn it is search and play its move.
+        The search runs in this thread and blocks until the move is found.
+
+        Returns:
+            (boolean): True if the computer has moved, False if a human is to move
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        computer = self._computer_to_move()
+
+        if computer is None:
+            return False
+
+        self._computer_played(computer.mcts.search(self.model.clone()))
+
+        return True
+
+
+    def play(self, pos):
+        """Place a stone on a certain position on the grid
+
+        Arguments
+            pos (tuple): x and y coordinate to place the stone
+
+        Returns:
+            (boolean): True if the stone has been placed
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        # It's the turn of the computer
+        if self._computer_to_move() is not None:
+            return False
+
+        # Get the name of the current player
+        player_name = self.player_1 if self.model.get_turn() else self.player_2
+
+        # If valid move
+        if self.model.place_stone(pos[0], pos[1]):
+            self.message = 'Nice Move ' + player_name + '!'
+            self._moved(tuple(pos))
+            return True
+
+        # If invalid move
+        self.message = 'Invalid move ' + player_name + '!'
+        return False
+
+
+    def passing(self):
+        """Pass on the turn of the current player
+
+        Returns:
+            (boolean): True if the player has passed
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        # It's the turn of the computer
+        if self._computer_to_move() is not None:
+            return False
+
+        self.message = "You passed on your turn"
+
+        # If able to pass on the turn
+        if not self.model.passing():
+            return False
+
+        self._moved(None)
+
+        # If the game is over
+        if self.model.is_game_over():
+            self._end_game()
+        # If the game continues
+        else:
+            self.message = 'Continue playing!'
+
+        return True
+
+
+    def mark_territory(self, pos):
+        """Mark a field as territory or a group as dead. Only possible at the end of a game.
+
+        Arguments
+            pos (tuple): x and y coordinate to mark territory
+
+        Variables changed by this function
+            self.model
+        """
+        self.model.mark_territory(pos[0], pos[1])
+
+
+    def new_game(self):
+        """Create a new game, the computer players forget their search trees.
+
+        Variables changed by this function
+            self.model
+            self.message
+        """
+        for computer in self.computers:
+            if computer is not None:
+                computer.reset()
+
+        self.model.__init__(self.n)
+        self.message = "New game, let's start, " + self.player_1 + "!"
@@ -0,0 +1,649 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Monte Carlo Tree Search (UCT) computer player for the Go game
+#
+# The search tree is kept between the moves: advance() moves the root
+# to the subtree of the move that has actually been played.
+# MCTSPlayer runs the search in a background thread, so the pyglet
+# window stays responsive while the computer is thinking.
+# RootParallelMCTS searches the same position in several processes
+# and merges the statistics of the root moves.
+# The statistics of the positions are shared by all nodes of the same
+# position through a transposition table (see transposition.py).
+
+import math
+import multiprocessing
+import random
+import threading
+import time
+
+from game_model import BLACK, WHITE
+from playout import is_eye, playout
+from transposition import TranspositionTable, entries_for
+
+# exploration constant of the UCT formula
+UCT_C = 1.0
+
+# memory of the transposition table of a computer player (per process)
+TABLE_MEGABYTES = 64
+
+
+def position_key(model):
+    """Returns a key that identifies the position of a game in the tree.
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        (tuple): hash of the position and the pass state
+    """
+    return (model.position_hash(), model.has_passed, model.game_over)
+
+
+def winner(model):
+    """Returns the winner of a finished (and scored) game.
+
+    Arguments:
+        model (Model): the game after find_territory()
+
+    Returns:
+        (boolean): BLACK or WHITE, None for a draw
+    """
+    score = model.add_scores()
+
+    if score[BLACK] > score[WHITE]:
+        return BLACK
+    elif score[WHITE] > score[BLACK]:
+        return WHITE
+
+    return None
+
+
+def best_move(stats):
+    """Returns the most visited move, the most robust choice.
+
+    Arguments:
+        stats (dictionary): (visits, wins) per move
+
+    Returns:
+        (tuple): x and y coordinate of the move, None for a pass
+    """
+    if not stats:
+        return None
+
+    return max(stats, key=lambda move: stats[move][0])
+
+
+class Node(object):
+    """A position in the search tree.
+    The statistics are counted from the view of the player who has
+    played the move leading to this node.
+    """
+    def __init__(self, move, color, key, parent=None):
+        """Creates a new node.
+
+        Arguments:
+            move (tuple): x and y coordinate of the move, None for a pass
+            color (boolean): color of the player who has played the move
+            key (tuple): position_key() of the position after the move,
+                         its first item is Model.position_hash()
+            parent (Node): the node before the move, None for the root
+
+        Attributes initialized by this function:
+            self.move
+            self.color
+            self.key
+            self.parent
+            self.children
+            self.untried
+            self.visits
+            self.wins
+        """
+        self.move = move
+        self.color = color
+        self.key = key
+        self.parent = parent
+        self.children = []
+
+        # moves not yet expanded, computed on the first visit
+        self.untried = None
+
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self):
+        """Returns the child with the highest UCT value.
+
+        Returns:
+            (Node): the child to descend into
+        """
+        log_visits = math.log(self.visits)
+
+        return max(self.children, key=lambda child:
+                   child.wins / child.visits + UCT_C * math.sqrt(log_visits / child.visits))
+
+
+class MCTS(object):
+    """Searches the best move of a position with random playouts."""
+
+    def __init__(self, seconds=None, playouts=None, seed=None, table=None):
+        """Creates a new search with an empty tree.
+        The search stops as soon as one of the budgets is used up.
+
+        Arguments:
+            seconds (float): time per move
+            playouts (int): nr. of playouts per move
+            seed (int): seed of the random generator
+            table (TranspositionTable): statistics of the positions shared
+                                        by all nodes of the same position
+
+        Attributes initialized by this function:
+            self.seconds
+            self.playouts
+            self.rnd
+            self.table
+            self.root
+            self.stopped
+        """
+        if seconds is None and playouts is None:
+            raise ValueError('a time or playout budget is needed')
+
+        self.seconds = seconds
+        self.playouts = playouts
+        self.rnd = random.Random(seed)
+        self.table = table
+        self.root = None
+        self.stopped = False
+
+    def advance(self, move):
+        """Moves the root of the tree to the subtree of a played move.
+        The tree is dropped if the move has not been searched.
+
+        Arguments:
+            move (tuple): x and y coordinate of the move, None for a pass
+
+        Variables changed by this function:
+            self.root
+        """
+        if self.root is None:
+            return
+
+        for child in self.root.children:
+            if child.move == move:
+                child.parent = None
+                self.root = child
+                return
+
+        self.root = None
+
+    def _moves(self, game):
+        """Returns the moves to expand in a position: the legal moves
+        that do not fill an own eye and a pass, in random order.
+
+        Arguments:
+            game (Model): the position
+
+        Returns:
+            list (tuple): x and y coordinates, None for a pass
+        """
+        if game.game_over:
+            return []
+
+        code = game.turn + 1
+        moves = [(x, y) for (x, y) in game.legal_moves()
+                 if not is_eye(game, game._point(x, y), code)]
+        moves.append(None)
+        self.rnd.shuffle(moves)
+
+        return moves
+
+    def _iterate(self, model):
+        """Runs one iteration of the search: selection, expansion,
+        playout and backpropagation.
+
+        Arguments:
+            model (Model): the position of the root, it is not changed
+
+        Variables changed by this function:
+            the visited nodes
+        """
+        node = self.root
+        game = model.clone()
+
+        # selection: descend through the fully expanded nodes
+        while not node.untried and node.children:
+            node = node.select()
+
+            if node.move is None:
+                game.passing()
+            else:
+                game.place_stone(*node.move)
+
+        # expansion: add one child
+        if node.untried is None:
+            node.untried = self._moves(game)
+
+        if node.untried:
+            move = node.untried.pop()
+            color = game.turn
+
+            if move is None:
+                game.passing()
+            else:
+                game.place_stone(*move)
+
+            child = Node(move, color, position_key(game), node)
+            node.children.append(child)
+            node = child
+
+            # a position reached by another move order starts with the
+            # statistics stored in the transposition table, but with at
+            # most the visits of its parent, otherwise it would outweigh
+            # its siblings in the UCT values of the parent
+            if self.table is not None:
+                entry = self.table.get(child.key[0])
+
+                if entry is not None:
+                    visits, wins = entry
+
+                    if visits > child.parent.visits:
+                        wins = wins * child.parent.visits / float(visits)
+                        visits = child.parent.visits
+
+                    child.visits, child.wins = visits, wins
+
+        # simulation
+        result = winner(playout(game, self.rnd))
+
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+
+            if result is None:
+                node.wins += 0.5
+            elif result == node.color:
+                node.wins += 1
+
+            if self.table is not None:
+                self.table.put(node.key[0], node.visits, node.wins)
+
+            node = node.parent
+
+    def run(self, model, seconds=None, playouts=None):
+        """Grows the tree of a position until one of the budgets is used up.
+        The tree of the previous search is reused if its root is this position.
+
+        Arguments:
+            model (Model): the game, it is not changed
+            seconds (float): time limit, None for no limit
+            playouts (int): nr. of playouts, None for no limit
+
+        Returns:
+            (int): nr. of playouts done
+
+        Variables changed by this function:
+            self.root
+            self.stopped
+        """
+        key = position_key(model)
+
+        if self.root is None or self.root.key != key:
+            self.root = Node(None, not model.turn, key)
+
+        self.stopped = False
+        start = time.time()
+        count = 0
+
+        while not self.stopped:
+            if playouts is not None and count >= playouts:
+                break
+
+            if seconds is not None and time.time() - start >= seconds:
+                break
+
+            self._iterate(model)
+            count += 1
+
+        return count
+
+    def stats(self):
+        """Returns the statistics of the moves at the root.
+
+        Returns:
+            (dictionary): (visits, wins) per move, None for a pass
+        """
+        if self.root is None:
+            return {}
+
+        return dict([(child.move, (child.visits, child.wins)) for child in self.root.children])
+
+    def search(self, model):
+        """Searches the best move for the player to move.
+
+        Arguments:
+            model (Model): the game, it is not changed
+
+        Returns:
+            (tuple): x and y coordinate of the best move, None for a pass
+
+        Variables changed by this function:
+            self.root
+            self.stopped
+        """
+        self.run(model, self.seconds, self.playouts)
+
+        return best_move(self.stats())
+
+    def clear(self):
+        """Forgets the search tree and the transposition table.
+
+        Variables changed by this function:
+            self.root
+            self.table
+        """
+        self.root = None
+
+        if self.table is not None:
+            self.table.clear()
+
+    def stop(self):
+        """Stops a running search after the current iteration.
+
+        Variables changed by this function:
+            self.stopped
+        """
+        self.stopped = True
+
+
+def _worker(conn, seed, table_entries):
+    """Main loop of a search process of RootParallelMCTS.
+    Keeps its own tree and answers the commands of the coordinator:
+        ('run', model, seconds, playouts): searches (model None: the
+            position of the last 'run') and sends (playouts, stats)
+        ('advance', move): moves the root to the played move
+        ('clear',): forgets the tree
+        None: ends the process
+
+    Arguments:
+        conn (Connection): pipe to the coordinator
+        seed (int): seed of the random generator
+        table_entries (int): size of the transposition table, None for no table
+    """
+    table = None if table_entries is None else TranspositionTable(table_entries)
+    mcts = MCTS(playouts=0, seed=seed, table=table)
+    model = None
+
+    while True:
+        command = conn.recv()
+
+        if command is None:
+            break
+
+        if command[0] == 'run':
+            if command[1] is not None:
+                model = command[1]
+
+            count = mcts.run(model, command[2], command[3])
+            conn.send((count, mcts.stats()))
+        elif command[0] == 'advance':
+            mcts.advance(command[1])
+        elif command[0] == 'clear':
+            mcts.clear()
+
+    conn.close()
+
+
+class RootParallelMCTS(object):
+    """Root parallel search: every worker process searches the same
+    position in its own tree with its own random seed. The visits and
+    wins of the root moves are merged by the coordinator after each round.
+    The position is sent once per search in the compact pickled form
+    of the Model (see Model.__getstate__), without the record of the
+    moves (see Model.position()).
+    """
+    def __init__(self, workers, seconds=None, playouts=None, seed=None, rounds=4, table_entries=None):
+        """Creates a new parallel search, the processes are started by start()
+        or on the first search.
+
+        Arguments:
+            workers (int): nr. of processes
+            seconds (float): time per move
+            playouts (int): nr. of playouts per move (of all processes together)
+            seed (int): seed of the first process, the others get seed + i
+            rounds (int): nr. of merges per move
+            table_entries (int): size of the transposition table of each
+                                 process, None for no table
+
+        Attributes initialized by this function:
+            self.workers
+            self.seconds
+            self.playouts
+            self.seed
+            self.table_entries
+            self.rounds
+            self.processes
+            self.conns
+            self.merged
+            self.count
+            self.stopped
+        """
+        if seconds is None and playouts is None:
+            raise ValueError('a time or playout budget is needed')
+
+        self.workers = workers
+        self.seconds = seconds
+        self.playouts = playouts
+        self.seed = seed
+        self.rounds = rounds
+        self.table_entries = table_entries
+        self.processes = []
+        self.conns = []
+
+        # merged statistics and nr. of playouts of the last search
+        self.merged = {}
+        self.count = 0
+        self.stopped = False
+
+    def start(self):
+        """Starts the worker processes.
+
+        Variables changed by this function:
+            self.processes
+            self.conns
+        """
+        for i in range(self.workers):
+            conn, child_conn = multiprocessing.Pipe()
+            seed = None if self.seed is None else self.seed + i
+            process = multiprocessing.Process(target=_worker, args=(child_conn, seed, self.table_entries))
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+            self.conns.append(conn)
+
+    def _send(self, command):
+        """Sends a command to all workers.
+
+        Arguments:
+            command (tuple): the command
+        """
+        for conn in self.conns:
+            conn.send(command)
+
+    def search(self, model):
+        """Searches the best move for the player to move.
+
+        Arguments:
+            model (Model): the game, it is not changed
+
+        Returns:
+            (tuple): x and y coordinate of the best move, None for a pass
+
+        Variables changed by this function:
+            self.merged
+            self.count
+            self.stopped
+        """
+        if not self.processes:
+            self.start()
+
+        # budget of a worker per round
+        seconds = None if self.seconds is None else self.seconds / float(self.rounds)
+        playouts = None
+
+        if self.playouts is not None:
+            playouts = -(-self.playouts // (self.workers * self.rounds))
+
+        self.stopped = False
+        self.count = 0
+        position = model.position()
+
+        for i in range(self.rounds):
+            if self.stopped:
+                break
+
+            self._send(('run', position, seconds, playouts))
+            position = None
+
+            # the statistics of a worker cover its whole tree, so the
+            # last answer of each worker replaces the previous one
+            self.merged = {}
+
+            for conn in self.conns:
+                count, stats = conn.recv()
+                self.count += count
+
+                for move, (visits, wins) in stats.items():
+                    total = self.merged.get(move, (0, 0.0))
+                    self.merged[move] = (total[0] + visits, total[1] + wins)
+
+        return best_move(self.merged)
+
+    def advance(self, move):
+        """Moves the roots of the worker trees to the subtree of a played move.
+
+        Arguments:
+            move (tuple): x and y coordinate of the move, None for a pass
+        """
+        self._send(('advance', move))
+
+    def stop(self):
+        """Stops a running search after the current round.
+
+        Variables changed by this function:
+            self.stopped
+        """
+        self.stopped = True
+
+    def clear(self):
+        """Forgets the search trees and the tables of all workers."""
+        self._send(('clear',))
+
+    def close(self):
+        """Ends the worker processes.
+
+        Variables changed by this function:
+            self.processes
+            self.conns
+        """
+        self._send(None)
+
+        for process in self.processes:
+            process.join()
+
+        self.processes = []
+        self.conns = []
+
+
+class MCTSPlayer(object):
+    """Computer player that searches its moves in a background thread."""
+
+    def __init__(self, seconds=None, playouts=None, seed=None, workers=1, table_megabytes=TABLE_MEGABYTES):
+        """Creates a new computer player.
+
+        Arguments:
+            seconds (float): time per move
+            playouts (int): nr. of playouts per move
+            seed (int): seed of the random generator
+            workers (int): nr. of processes, more than one for a RootParallelMCTS
+            table_megabytes (float): memory of the transposition table of
+                                     each process, 0 for no table
+
+        Attributes initialized by this function:
+            self.mcts
+            self.thread
+            self.move
+            self.ready
+        """
+        entries = entries_for(table_megabytes) if table_megabytes else None
+
+        if workers > 1:
+            self.mcts = RootParallelMCTS(workers, seconds, playouts, seed, table_entries=entries)
+        else:
+            table = None if entries is None else TranspositionTable(entries)
+            self.mcts = MCTS(seconds, playouts, seed, table)
+
+        self.thread = None
+        self.move = None
+        self.ready = threading.Event()
+
+    def think(self, model):
+        """Starts the search for the next move. The result is available
+        in self.move as soon as self.ready is set.
+
+        Arguments:
+            model (Model): the game, a copy is searched
+
+        Variables changed by this function:
+            self.thread
+            self.move
+            self.ready
+        """
+        self.ready.clear()
+        self.thread = threading.Thread(target=self._run, args=(model.clone(),))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self, model):
+        """Runs the search in the background thread.
+
+        Arguments:
+            model (Model): copy of the game
+
+        Variables changed by this function:
+            self.move
+            self.ready
+        """
+        self.move = self.mcts.search(model)
+        self.ready.set()
+
+    def is_thinking(self):
+        """Returns whether a search is running.
+
+        Returns:
+            (boolean): True until the move has been found
+        """
+        return self.thread is not None and not self.ready.is_set()
+
+    def advance(self, move):
+        """Tells the player the move that has been played in the game.
+
+        Arguments:
+            move (tuple): x and y coordinate of the move, None for a pass
+        """
+        self.mcts.advance(move)
+
+    def reset(self):
+        """Stops the search and forgets the tree, e.g. for a new game.
+
+        Variables changed by this function:
+            self.mcts
+            self.thread
+        """
+        self.mcts.stop()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        self.mcts.clear()
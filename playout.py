@@ -0,0 +1,359 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Random playouts (Monte Carlo simulations) on the game model of the Go game
+
+import random
+
+from game_model import BLACK, WHITE, COLORS, EMPTY, OFF_BOARD
+
+# nr. of fields the playouts of the end of game scoring play through,
+# see scoring_playouts()
+SCORING_FIELDS = 400 * 9 * 9
+
+
+def is_eye(model, p, code):
+    """Checks whether the empty point p is a single-point eye of the player.
+    All neighbors must be stones of the player (or off the board) and
+    at most one diagonal field may be held by the enemy (none at the edge).
+
+    Arguments:
+        model (Model): the game
+        p (int): empty point on the padded board
+        code (int): stone code of the player
+
+    Returns:
+        (boolean): True if filling p would fill an own eye
+    """
+    points = model.points
+
+    for d in model.offsets:
+        if points[p + d] != code and points[p + d] != OFF_BOARD:
+            return False
+
+    stride = model.stride
+    enemies = 0
+    edge = False
+
+    for d in (-stride - 1, -stride + 1, stride - 1, stride + 1):
+        if points[p + d] == OFF_BOARD:
+            edge = True
+        elif points[p + d] == 3 - code:
+            enemies += 1
+
+    return enemies < (1 if edge else 2)
+
+
+def playout(model, rnd=random, max_moves=None):
+    """Plays the game to the end with random moves and scores it.
+    Both players choose uniformly from the legal moves that do not fill
+    one of their own eyes and pass when there is none left.
+    Only the simple ko-rule is applied and the moves are not recorded
+    in the journal of the copy.
+
+    Arguments:
+        model (Model): the position to start from, it is not changed
+        rnd (Random): random generator
+        max_moves (int): the game is stopped after this nr. of moves,
+                         defaults to 3 x size x size
+
+    Returns:
+        (Model): the finished copy of the game, scored by Model.find_territory()
+                 without Benson's algorithm
+    """
+    game = model.clone()
+    game.superko = None
+
+    if max_moves is None:
+        max_moves = 3 * game.size * game.size
+
+    points = game.points
+    empty = [p for p in range(len(points)) if points[p] == EMPTY]
+
+    # the inner loop works on the arrays of the copy: the eye test
+    # (is_eye) and the legality test (Model._captures) are inlined with
+    # the neighbors unrolled, only a legal move calls a method
+    uniform = rnd.random
+    execute = game._execute
+    parent = game.parent
+    libs, lib_sum, lib_sum2 = game.libs, game.lib_sum, game.lib_sum2
+    stride = game.stride
+    offsets = game.offsets
+
+    moves = 0
+
+    while not game.game_over and moves < max_moves:
+        code = game.turn + 1
+        enemy = 3 - code
+        ko = None if game.blocked_field is None else game._point(*game.blocked_field)
+
+        # try the empty points in random order: a tried point is swapped
+        # behind the untried ones
+        i = len(empty)
+        killed = None
+
+        while i > 0:
+            j = int(uniform() * i)
+            i -= 1
+            p = empty[j]
+            empty[j], empty[i] = empty[i], p
+
+            if p == ko:
+                continue
+
+            # own eye: all neighbors own stones or off the board and at
+            # most one diagonal enemy stone (none at the edge)
+            west, east, north, south = points[p - 1], points[p + 1], points[p - stride], points[p + stride]
+
+            if ((west == code or west == OFF_BOARD) and (east == code or east == OFF_BOARD) and
+                    (north == code or north == OFF_BOARD) and (south == code or south == OFF_BOARD)):
+                diagonals = (points[p - stride - 1], points[p - stride + 1],
+                             points[p + stride - 1], points[p + stride + 1])
+
+                if diagonals.count(enemy) < (1 if OFF_BOARD in diagonals else 2):
+                    continue
+
+            # a liberty of the new stone makes the move legal
+            is_valid = west == EMPTY or east == EMPTY or north == EMPTY or south == EMPTY
+            groups_to_kill = []
+
+            for d in offsets:
+                q = p + d
+                other = points[q]
+
+                if other == EMPTY or other == OFF_BOARD:
+                    continue
+
+                # root of the neighbor (Model._find without path halving)
+                r = q
+
+                while parent[r] != r:
+                    r = parent[r]
+
+                in_atari = libs[r] * lib_sum2[r] == lib_sum[r] * lib_sum[r]
+
+                if other == code:
+                    if not in_atari:
+                        is_valid = True
+
+                elif in_atari:
+                    is_valid = True
+
+                    if r not in groups_to_kill:
+                        groups_to_kill.append(r)
+
+            if is_valid:
+                killed = execute(p, code, groups_to_kill)
+                break
+
+        # no move left: pass
+        if killed is None:
+            game.passing()
+            continue
+
+        # p is no longer empty, the killed stones are
+        empty[i] = empty[-1]
+        empty.pop()
+
+        for stones in killed:
+            empty += stones
+
+        moves += 1
+
+    game.game_over = True
+    game.find_territory(benson=False)
+
+    return game
+
+
+def scoring_playouts(n):
+    """Returns the nr. of playouts of the end of game scoring on a board.
+    The playouts play about SCORING_FIELDS fields: 400 playouts on 9x9,
+    fewer on larger boards, so the scoring of 19x19 takes a fraction of
+    a second, but at least 3 batches of ownership().
+
+    Arguments:
+        n (int): size of the grid
+
+    Returns:
+        (int): maximum nr. of playouts
+    """
+    return max(48, SCORING_FIELDS // (n * n))
+
+
+def find_territory(model, playouts=None, threshold=0.8, workers=1):
+    """Marks the territory and the dead stones at the end of the game.
+    Besides the areas claimed by Model.find_territory(), the fields that
+    belong to one color in at least threshold of the random playouts
+    from the position are claimed.
+
+    Arguments:
+        model (Model): the finished game
+        playouts (int): maximum nr. of playouts, None for scoring_playouts(),
+                        0 to claim only the areas Model.find_territory()
+                        finds without playouts
+        threshold (float): probability at which a field is claimed
+        workers (int): nr. of processes
+
+    Variables changed by this function:
+        model.territory
+        model.score
+    """
+    if playouts is None:
+        playouts = scoring_playouts(model.size)
+
+    probability = None
+
+    if playouts > 0:
+        probability = ownership(model, playouts, threshold, workers=workers)[0]
+
+    model.find_territory(probability, threshold)
+
+
+def _count_owners(model, playouts, rnd):
+    """Plays random playouts and counts the owner of every field at the end.
+    The owner is the color of the stone on the field or of the territory
+    found by Model.find_territory().
+
+    Arguments:
+        model (Model): the position to start from, it is not changed
+        playouts (int): nr. of playouts
+        rnd (Random): random generator
+
+    Returns:
+        list: nr. of playouts each field (y * n + x) was owned [by White, by Black]
+    """
+    n = model.size
+    counts = [[0] * (n * n), [0] * (n * n)]
+    fields = [(y * n + x, model._point(x, y), y, x) for y in range(n) for x in range(n)]
+
+    for i in range(playouts):
+        game = playout(model, rnd)
+        points, territory = game.points, game.territory
+
+        for f, p, y, x in fields:
+            color = COLORS[points[p]]
+
+            if color is None:
+                color = territory[y][x]
+
+            if color is not None:
+                counts[color][f] += 1
+
+    return counts
+
+
+def _count_owners_task(args):
+    """Runs _count_owners() in a worker process of a multiprocessing.Pool.
+
+    Arguments:
+        args (tuple): model, nr. of playouts and seed
+
+    Returns:
+        playouts (int): nr. of playouts played, the results of the
+                        tasks arrive in any order
+        counts (list): see _count_owners()
+    """
+    model, playouts, seed = args
+
+    return playouts, _count_owners(model, playouts, random.Random(seed))
+
+
+def _owners(counts, done, threshold):
+    """Returns the owner of every field according to the playouts so far.
+
+    Arguments:
+        counts (list): nr. of playouts each field was owned [by White, by Black]
+        done (int): nr. of playouts
+        threshold (float): probability at which a field counts as owned
+
+    Returns:
+        (list): WHITE, BLACK or None for each field
+    """
+    limit = threshold * done
+
+    return [WHITE if white >= limit else BLACK if black >= limit else None
+            for white, black in zip(counts[WHITE], counts[BLACK])]
+
+
+def ownership(model, playouts=400, threshold=0.8, batch=16, patience=2, tolerance=0.02, workers=1, seed=None):
+    """Estimates the probability that each field belongs to White or
+    Black at the end of the game with random playouts.
+    The playouts run in batches. The estimation stops early when the
+    owner (above the threshold) of hardly any field has changed for
+    patience batches in a row.
+
+    Arguments:
+        model (Model): the position, usually at the end of the game; it is not changed
+        playouts (int): maximum nr. of playouts
+        threshold (float): probability at which a field counts as owned
+        batch (int): nr. of playouts between two convergence checks
+        patience (int): nr. of batches without a change to stop early
+        tolerance (float): fraction of the fields whose owner may still change
+        workers (int): nr. of processes, 1 to run in this process
+        seed (int): seed of the random generator
+
+    Returns:
+        probability (list): probability of each field [White, Black], indexed by [y][x]
+        done (int): nr. of playouts played
+    """
+    n = model.size
+    rnd = random.Random(seed)
+
+    # play on from the position, even if both players have passed
+    start = model.position()
+    start.game_over = False
+    start.has_passed = False
+    start.territory = [[None for i in range(n)] for j in range(n)]
+
+    counts = [[0] * (n * n), [0] * (n * n)]
+    done = 0
+    owners = None
+    stable = 0
+
+    pool = None
+    tasks = None
+
+    if workers > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers)
+        nr_tasks = -(-playouts // batch)
+        tasks = pool.imap_unordered(_count_owners_task, [
+            (start, min(batch, playouts - i * batch), rnd.getrandbits(32)) for i in range(nr_tasks)])
+
+    try:
+        while done < playouts:
+            if pool is None:
+                size = min(batch, playouts - done)
+                result = _count_owners(start, size, rnd)
+            else:
+                size, result = next(tasks)
+
+            for color in (WHITE, BLACK):
+                total = counts[color]
+
+                for f, c in enumerate(result[color]):
+                    total[f] += c
+
+            done += size
+
+            # stop when the owners have converged
+            previous, owners = owners, _owners(counts, done, threshold)
+
+            if previous is not None and \
+               sum([a != b for a, b in zip(owners, previous)]) <= tolerance * n * n:
+                stable += 1
+            else:
+                stable = 0
+
+            if stable >= patience:
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    probability = [[[counts[color][y * n + x] / float(done) for x in range(n)] for y in range(n)]
+                   for color in (WHITE, BLACK)]
+
+    return probability, done
+
@@ -0,0 +1,314 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Search index from board positions to the archived games that reached them
+#
+# Usage:
+#   python positions.py build games.goa --output games.gpi
+#   python positions.py query games.gpi GAME.sgf [--move 40] [--archive games.goa]
+#
+# The index maps the canonical hash of the board after each move to the
+# game nr. and the nr. of moves played. The canonical hash is the smallest
+# zobrist hash of the board under the 8 symmetries (see
+# Model.canonical_hash()), so rotated and mirrored positions match.
+# Only the stones count, not the player to move; the empty board and the
+# positions after a pass (the board is unchanged) are not indexed.
+#
+# Layout of the file (all numbers little-endian):
+#
+#   header    magic 'GOPOSIX1', nr. of entries (uint64), nr. of games (uint32)
+#   fanout    65536 x uint64: nr. of entries whose hash starts with at most
+#             the 16 bits 0 ... i
+#   entries   hash (uint64), game (uint32), move (uint32), sorted
+#
+# The index is built in one pass over the archive: the entries are
+# partitioned by the first byte of the hash into temporary files, which
+# are sorted one by one. A lookup reads the fanout and binary searches
+# the entries in the mapped file.
+
+from __future__ import print_function
+
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+from archive import Archive
+from game_model import Model
+
+MAGIC = b'GOPOSIX1'
+
+# magic, nr. of entries and nr. of games
+HEADER = struct.Struct('<8sQI')
+
+# first 16 bits of the hash
+FANOUT_BITS = 16
+FANOUT = struct.Struct('<Q')
+
+# hash, game and nr. of moves
+ENTRY = struct.Struct('<QII')
+
+# the temporary files hold the entries of one value of the first byte
+PARTITION_BITS = 8
+PARTITIONS = 1 << PARTITION_BITS
+
+# nr. of entries kept in memory per partition before they are written
+BUFFER = 4096
+
+
+def game_positions(archive, i):
+    """Replays a game and returns the canonical hash after each move.
+
+    Arguments:
+        archive (Archive): the archive
+        i (int): nr. of the game
+
+    Returns:
+        generator (tuple): nr. of moves played and the canonical hash,
+                           the replay stops at an illegal move
+    """
+    model = Model(archive.header(i)['size'])
+
+    for number, (color, move) in enumerate(archive.moves(i), 1):
+        if move is None:
+            if not model.passing():
+                return
+            continue
+
+        if not model.place_stone(move[0], move[1]):
+            return
+
+        yield number, model.canonical_hash()
+
+
+def build(archive_path, output):
+    """Builds the index of all positions of an archive.
+
+    Arguments:
+        archive_path (str): path of the archive
+        output (str): path of the new index
+
+    Returns:
+        (int): nr. of entries
+    """
+    shift = 64 - PARTITION_BITS
+    temp = tempfile.mkdtemp()
+
+    try:
+        # partition the entries by the first byte of the hash
+        files = [open(os.path.join(temp, '%03d' % i), 'wb') for i in range(PARTITIONS)]
+        buffers = [[] for i in range(PARTITIONS)]
+
+        with Archive(archive_path) as archive:
+            games = len(archive)
+
+            for game in range(games):
+                for move, h in game_positions(archive, game):
+                    part = h >> shift
+                    buffers[part].append(ENTRY.pack(h, game, move))
+
+                    if len(buffers[part]) >= BUFFER:
+                        files[part].write(b''.join(buffers[part]))
+                        buffers[part] = []
+
+        for part, f in enumerate(files):
+            f.write(b''.join(buffers[part]))
+            f.close()
+
+        # sort each partition and count the entries of each 16 bit prefix
+        fanout = [0] * (1 << FANOUT_BITS)
+        entries = 0
+
+        with open(output, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, 0, games))
+            out.write(b'\0' * (FANOUT.size << FANOUT_BITS))
+
+            for part in range(PARTITIONS):
+                with open(os.path.join(temp, '%03d' % part), 'rb') as f:
+                    data = f.read()
+
+                rows = sorted([ENTRY.unpack_from(data, k) for k in range(0, len(data), ENTRY.size)])
+
+                for row in rows:
+                    fanout[row[0] >> (64 - FANOUT_BITS)] += 1
+
+                out.write(b''.join([ENTRY.pack(*row) for row in rows]))
+                entries += len(rows)
+
+            # cumulative counts
+            total = 0
+
+            for prefix in range(len(fanout)):
+                total += fanout[prefix]
+                fanout[prefix] = total
+
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, entries, games))
+            out.write(struct.pack('<%dQ' % len(fanout), *fanout))
+    finally:
+        shutil.rmtree(temp)
+
+    return entries
+
+
+class PositionIndex(object):
+    """Looks up positions in an index file through mmap."""
+
+    def __init__(self, path):
+        """Maps the index into memory and reads the header.
+
+        Arguments:
+            path (str): path of the index
+
+        Attributes initialized by this function:
+            self.map
+            self.entries
+            self.games
+            self.start
+        """
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.start = HEADER.size + (FANOUT.size << FANOUT_BITS)
+
+        if len(self.map) < self.start:
+            self.map.close()
+            raise ValueError('%s is not a position index' % path)
+
+        magic, self.entries, self.games = HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC or self.start + self.entries * ENTRY.size > len(self.map):
+            self.map.close()
+            raise ValueError('%s is not a position index or it is incomplete' % path)
+
+    def __len__(self):
+        return self.entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Unmaps the file.
+
+        Variables changed by this function:
+            self.map
+        """
+        self.map.close()
+
+    def _hash(self, k):
+        """Returns the hash of the k-th entry.
+
+        Arguments:
+            k (int): nr. of the entry
+
+        Returns:
+            (int): the hash
+        """
+        return ENTRY.unpack_from(self.map, self.start + k * ENTRY.size)[0]
+
+    def lookup(self, h):
+        """Returns the games that reached a position.
+
+        Arguments:
+            h (int): canonical hash of the position
+
+        Returns:
+            list (tuple): game nr. and nr. of moves played, sorted
+        """
+        prefix = h >> (64 - FANOUT_BITS)
+        lo = FANOUT.unpack_from(self.map, HEADER.size + (prefix - 1) * FANOUT.size)[0] if prefix else 0
+        hi = FANOUT.unpack_from(self.map, HEADER.size + prefix * FANOUT.size)[0]
+
+        # first entry with the hash
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if self._hash(mid) < h:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        found = []
+
+        while lo < self.entries:
+            entry_hash, game, move = ENTRY.unpack_from(self.map, self.start + lo * ENTRY.size)
+
+            if entry_hash != h:
+                break
+
+            found.append((game, move))
+            lo += 1
+
+        return found
+
+    def search(self, model):
+        """Returns the archived games that reached the board of a model,
+        in any orientation.
+
+        Arguments:
+            model (Model): the position
+
+        Returns:
+            list (tuple): game nr. and nr. of moves played, sorted
+        """
+        return self.lookup(model.canonical_hash())
+
+
+def main():
+    """Parses the command line and builds or queries an index."""
+    parser = argparse.ArgumentParser(description='Position search index over a game archive.')
+    commands = parser.add_subparsers(dest='command')
+
+    make = commands.add_parser('build', help='index all positions of an archive')
+    make.add_argument('archive')
+    make.add_argument('--output', required=True, help='path of the new index')
+
+    query = commands.add_parser('query', help='games that reached the position of an SGF game')
+    query.add_argument('index')
+    query.add_argument('sgf', help='SGF file, its first game is used')
+    query.add_argument('--move', type=int, default=None, help='position after this nr. of moves (default: the end)')
+    query.add_argument('--archive', default=None, help='archive to show the players of the games')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        entries = build(args.archive, args.output)
+        print('%d positions indexed' % entries)
+
+    elif args.command == 'query':
+        import time
+        import sgf
+
+        with open(args.sgf, 'rb') as f:
+            nodes = next(sgf.read(f))
+
+        if args.move is not None:
+            nodes = nodes[:1] + [node for node in nodes[1:] if 'B' in node or 'W' in node][:args.move]
+
+        model = sgf.replay(nodes)
+
+        with PositionIndex(args.index) as index:
+            start = time.time()
+            found = index.search(model)
+            elapsed = time.time() - start
+
+        archive = Archive(args.archive) if args.archive else None
+
+        for game, move in found:
+            if archive is None:
+                print('game %d after move %d' % (game, move))
+            else:
+                header = archive.header(game)
+                print('game %d after move %d: %s - %s %s' % (
+                    game, move, header['black'], header['white'], header['result'] or ''))
+
+        print('%d matches in %.2f ms' % (len(found), elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Bulk replay and validation of game records
+#
+# Usage:
+#   python replay.py DIRECTORY_OR_FILE [...] [--workers 8] [--playouts 0] [--output results.jsonl]
+#
+# All SGF files and game archives (archive.py) below the given directories
+# are read game by game. The games of an archive are not sent to the
+# processes, each process reads them from its own mapping of the file. The
+# games are replayed on game_model.Model by a pool of processes, so the
+# moves are checked with the rules of this engine (place_stone(), the ko
+# field and the superko-rule) and the territory is scored by
+# playout.find_territory(). One JSON line is written per game as soon as it is
+# done (in the order the games finish):
+#
+#   {"file": ..., "game": 0, "size": 19, "moves": 211, "valid": true,
+#    "illegal": null, "finished": false, "score": {"black": 80, "white": 75},
+#    "result": "B+5", "recorded_result": "B+R", "seconds": 0.02, "error": null}
+#
+# Files that cannot be read or parsed get a line with an "error", the
+# batch continues with the next file. A summary is written to stderr.
+
+from __future__ import print_function
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import archive
+import sgf
+from game_model import Model, EMPTY
+from playout import find_territory
+
+# file extensions of the game records
+EXTENSIONS = ('.sgf', archive.EXTENSION)
+
+# archives opened by this process, by path
+_ARCHIVES = {}
+
+
+def find_files(paths):
+    """Returns the game records in the given files and directories.
+
+    Arguments:
+        paths (list): files and directories (searched recursively)
+
+    Returns:
+        generator (str): paths of the files in sorted order
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+
+            for name in sorted(files):
+                if name.lower().endswith(EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def read_games(paths):
+    """Streams the games of all files. A file that cannot be read or
+    parsed yields an error instead of the remaining games.
+
+    Arguments:
+        paths (list): files and directories
+
+    Returns:
+        generator (tuple): file, index of the game in the file, nodes (see
+                           sgf.parse(), None for an archive) and error
+                           message (None if parsed)
+    """
+    for path in find_files(paths):
+        index = 0
+
+        try:
+            if path.endswith(archive.EXTENSION):
+                # the games are read by the processes from the archive
+                with archive.Archive(path) as games:
+                    for index in range(len(games)):
+                        yield path, index, None, None
+                continue
+
+            with open(path, 'rb') as f:
+                for nodes in sgf.read(f):
+                    yield path, index, nodes, None
+                    index += 1
+        except (IOError, OSError, ValueError) as e:
+            yield path, index, None, str(e)
+
+
+def _open_archive(path):
+    """Returns the archive, mapped once per process.
+
+    Arguments:
+        path (str): path of the archive
+
+    Returns:
+        (Archive): the opened archive
+    """
+    if path not in _ARCHIVES:
+        _ARCHIVES[path] = archive.Archive(path)
+
+    return _ARCHIVES[path]
+
+
+def _illegal(model, number, color, move):
+    """Describes why a move cannot be played.
+
+    Arguments:
+        model (Model): the game before the move
+        number (int): nr. of the move, starting at 1
+        color (boolean): color of the move
+        move (tuple): x and y coordinate, None for a pass
+
+    Returns:
+        (dictionary): move nr., point (SGF) and reason
+    """
+    point = '' if move is None else sgf.COORDINATES[move[0]] + sgf.COORDINATES[move[1]]
+
+    if model.is_game_over():
+        reason = 'after the end of the game'
+    elif color != model.get_turn():
+        reason = 'out of turn'
+    else:
+        p = model._point(move[0], move[1])
+
+        if model.points[p] != EMPTY:
+            reason = 'occupied'
+        elif model.blocked_field == tuple(move):
+            reason = 'ko'
+        elif model._captures(p, model.turn + 1) is None:
+            reason = 'suicide'
+        else:
+            reason = 'superko'
+
+    return {'move': number, 'point': point, 'reason': reason}
+
+
+def replay_game(task, playouts=0):
+    """Replays and scores one game. Errors are reported in the result.
+
+    Arguments:
+        task (tuple): file, index, nodes and error message, see read_games()
+        playouts (int): nr. of playouts to find the dead stones, 0 to skip it
+
+    Returns:
+        (dictionary): the result line of the game
+    """
+    path, index, nodes, error = task
+    result = {'file': path, 'game': index, 'error': error}
+
+    if error is not None:
+        return result
+
+    start = time.time()
+
+    try:
+        if nodes is None:
+            games = _open_archive(path)
+            header = games.header(index)
+            moves = games.moves(index)
+        else:
+            header = sgf.info(nodes)
+            moves = sgf.moves(nodes)
+
+        model = Model(header['size'])
+        illegal = None
+
+        for number, (color, move) in enumerate(moves, 1):
+            if model.is_game_over() or color != model.get_turn():
+                illegal = _illegal(model, number, color, move)
+            elif move is None:
+                model.passing()
+            elif not model.place_stone(move[0], move[1]):
+                illegal = _illegal(model, number, color, move)
+
+            if illegal is not None:
+                break
+
+        # score the position after the last legal move
+        finished = model.is_game_over()
+        find_territory(model, playouts)
+        white, black = model.add_scores()
+
+        # the result is written for the scored position, even if the record stops early
+        model.game_over = True
+
+        result.update({
+            'size'            : header['size'],
+            'moves'           : len(moves),
+            'valid'           : illegal is None,
+            'illegal'         : illegal,
+            'finished'        : finished,
+            'score'           : {'black': black, 'white': white},
+            'result'          : sgf.result(model),
+            'recorded_result' : header['result']
+        })
+    except Exception as e:
+        result['error'] = '%s: %s' % (type(e).__name__, e)
+
+    result['seconds'] = round(time.time() - start, 6)
+
+    return result
+
+
+def _replay_task(args):
+    """Runs replay_game() in a worker process of a multiprocessing.Pool.
+
+    Arguments:
+        args (tuple): task and nr. of playouts
+
+    Returns:
+        (dictionary): see replay_game()
+    """
+    return replay_game(*args)
+
+
+def run(paths, output, workers=None, playouts=0, chunksize=4):
+    """Replays all games in the files and writes one JSON line per game.
+
+    Arguments:
+        paths (list): files and directories
+        output (file): stream for the JSON lines
+        workers (int): nr. of processes, defaults to the nr. of CPUs
+        playouts (int): nr. of playouts to find the dead stones
+        chunksize (int): nr. of games sent to a process at once
+
+    Returns:
+        (dictionary): nr. of games, invalid games, errors and seconds
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    # the pool reads the tasks in a thread as fast as it can: only allow
+    # a few games per process in flight, so the files are streamed
+    in_flight = threading.Semaphore(4 * workers * chunksize)
+    stop = threading.Event()
+
+    def tasks():
+        for task in read_games(paths):
+            in_flight.acquire()
+
+            if stop.is_set():
+                return
+
+            yield task, playouts
+
+    summary = {'games': 0, 'invalid': 0, 'errors': 0}
+    start = time.time()
+
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(_replay_task, tasks(), chunksize)
+    else:
+        pool = None
+        results = (_replay_task(task) for task in tasks())
+
+    try:
+        for result in results:
+            in_flight.release()
+
+            output.write(json.dumps(result, sort_keys=True) + '\n')
+            output.flush()
+
+            if result['error'] is not None:
+                summary['errors'] += 1
+            else:
+                summary['games'] += 1
+                summary['invalid'] += not result['valid']
+    finally:
+        # wake up the reading thread if the batch stops early
+        stop.set()
+        in_flight.release()
+
+        if pool is not None:
+            pool.terminate()
+
+    summary['seconds'] = time.time() - start
+
+    return summary
+
+
+def main():
+    """Parses the command line and replays the games."""
+    parser = argparse.ArgumentParser(description='Replays, validates and scores game records.')
+    parser.add_argument('paths', nargs='+', help='SGF files, archives or directories')
+    parser.add_argument('--workers', type=int, default=None, help='nr. of processes (default: all CPUs)')
+    parser.add_argument('--playouts', type=int, default=0, help='playouts to find the dead stones')
+    parser.add_argument('--chunksize', type=int, default=4, help='games sent to a process at once')
+    parser.add_argument('--output', default=None, help='file for the JSON lines (default: stdout)')
+
+    args = parser.parse_args()
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+
+    try:
+        summary = run(args.paths, output, args.workers, args.playouts, args.chunksize)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print('{games} games, {invalid} with illegal moves, {errors} errors in {seconds:.1f} s'.format(**summary),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
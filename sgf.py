@@ -0,0 +1,409 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Import and export of game records in the Smart Game Format (SGF, FF[4])
+#
+# The parser reads the file in chunks and yields one game at a time, so
+# collections with many games are streamed without loading the whole file:
+#
+#   with open('games.sgf') as f:
+#       for nodes in sgf.read(f):
+#           model = sgf.replay(nodes)
+#
+# Only the main line of a game is kept, variations are skipped. Moves are
+# replayed through Model.place_stone() and Model.passing(), so the records
+# are checked with the rules of this engine. Setup stones (AB, AW, AE)
+# are not supported by the model.
+
+import codecs
+import re
+
+from game_model import Model, BLACK, WHITE, POSITIONAL
+
+# letters of the coordinates 0 ... 51
+COORDINATES = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# properties of the moves by color
+MOVE_PROPERTIES = {'B': BLACK, 'W': WHITE}
+
+# properties that place stones without a move
+SETUP_PROPERTIES = ('AB', 'AW', 'AE')
+
+# a token: a bracket or semicolon, a property identifier, a value in
+# brackets (with escaped characters) or any other stray character
+_TOKEN = re.compile(r'\s*(?:([();])|([A-Za-z]+)|\[((?:[^\\\]]|\\.)*)\]|([^\[\s]))', re.S)
+
+# escaped line breaks are removed from values, other escapes keep the character
+_ESCAPE = re.compile(r'\\(?:\r\n?|\n\r?)|\\(.)', re.S)
+
+
+def _chunks(stream, chunk_size, encoding):
+    """Reads a file in pieces. Bytes are decoded, a character may be
+    split between two pieces.
+
+    Arguments:
+        stream (file): file opened for reading
+        chunk_size (int): nr. of bytes or characters per piece
+        encoding (str): encoding of files opened in binary mode
+
+    Returns:
+        generator (str): the pieces of text
+    """
+    decoder = None
+
+    while True:
+        chunk = stream.read(chunk_size)
+        final = not chunk
+
+        # decode binary files (Python 3)
+        if isinstance(chunk, bytes) and not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)('replace')
+
+            chunk = decoder.decode(chunk, final)
+
+        if chunk:
+            yield chunk
+
+        if final:
+            return
+
+
+def _tokens(chunks):
+    """Splits the text into tokens. A token is only read when it is
+    complete, values and identifiers may continue in the next piece.
+
+    Arguments:
+        chunks (iterable): pieces of the text
+
+    Returns:
+        generator (tuple): kind ('(', ')', ';', 'ident', 'value' or 'stray') and text
+    """
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    eof = False
+
+    while True:
+        m = _TOKEN.match(buf, pos)
+
+        # the token might continue in the next piece
+        if not eof and (m is None or m.end() == len(buf) and m.group(2)):
+            chunk = next(chunks, None)
+
+            if chunk is None:
+                eof = True
+            else:
+                buf = buf[pos:] + chunk
+                pos = 0
+
+            continue
+
+        if m is None:
+            if buf[pos:].strip():
+                raise ValueError('unterminated property value in SGF')
+            return
+
+        pos = m.end()
+
+        if m.group(1) is not None:
+            yield m.group(1), m.group(1)
+        elif m.group(2) is not None:
+            # old files (FF[3]) may write identifiers like 'AddBlack'
+            yield 'ident', ''.join([c for c in m.group(2) if c.isupper()])
+        elif m.group(3) is not None:
+            yield 'value', m.group(3)
+        else:
+            yield 'stray', m.group(4)
+
+
+def parse(chunks):
+    """Parses the games of an SGF collection.
+
+    Arguments:
+        chunks (iterable): pieces of the text, e.g. a single string in a list
+
+    Returns:
+        generator (list): the nodes of the main line of each game, a node
+                          is a dictionary of property -> list of values
+    """
+    # one entry per open game tree: True once its first variation is closed
+    trees = []
+
+    # depth of the variation that is skipped, 0 if none
+    skip = 0
+
+    nodes = None
+    node = None
+    ident = None
+
+    for kind, text in _tokens(chunks):
+        if kind == '(':
+            if skip:
+                skip += 1
+            elif trees and trees[-1]:
+                # only the first variation is the main line
+                skip = 1
+            else:
+                if not trees:
+                    nodes = []
+                    node = None
+                trees.append(False)
+
+        elif kind == ')':
+            if skip:
+                skip -= 1
+            elif not trees:
+                raise ValueError('unbalanced parenthesis in SGF')
+            else:
+                trees.pop()
+
+                if trees:
+                    trees[-1] = True
+                else:
+                    yield nodes
+                    nodes = None
+
+        elif skip or not trees:
+            # variations and text between the games are ignored
+            continue
+
+        elif kind == ';':
+            node = {}
+            ident = None
+            nodes.append(node)
+
+        elif kind == 'ident':
+            if node is None:
+                raise ValueError('property %s outside of a node in SGF' % text)
+            ident = text
+
+        elif kind == 'value':
+            if ident is None:
+                raise ValueError('property value without identifier in SGF')
+            node.setdefault(ident, []).append(_ESCAPE.sub(lambda m: m.group(1) or '', text))
+
+        else:
+            raise ValueError('unexpected character %r in SGF' % text)
+
+    if trees:
+        raise ValueError('unexpected end of SGF, a game is not closed')
+
+
+def read(stream, chunk_size=65536, encoding='utf-8'):
+    """Streams the games of an SGF file.
+
+    Arguments:
+        stream (file): file opened for reading (text or binary)
+        chunk_size (int): nr. of bytes or characters read at once
+        encoding (str): encoding of files opened in binary mode
+
+    Returns:
+        generator (list): the nodes of each game, see parse()
+    """
+    return parse(_chunks(stream, chunk_size, encoding))
+
+
+def info(nodes):
+    """Returns the information about the game in the root node.
+
+    Arguments:
+        nodes (list): nodes of the game, see parse()
+
+    Returns:
+        (dictionary): 'size', 'black', 'white' and 'result' (None if missing)
+    """
+    root = nodes[0] if nodes else {}
+    size = root.get('SZ', ['19'])[0]
+
+    try:
+        size = int(size)
+    except ValueError:
+        raise ValueError('unsupported board size %r in SGF' % size)
+
+    if not 1 <= size <= len(COORDINATES):
+        raise ValueError('unsupported board size %d in SGF' % size)
+
+    return {
+        'size'   : size,
+        'black'  : root.get('PB', [None])[0],
+        'white'  : root.get('PW', [None])[0],
+        'result' : root.get('RE', [None])[0]
+    }
+
+
+def _decode(value, size):
+    """Converts an SGF point into coordinates.
+
+    Arguments:
+        value (str): two letters, empty (or 'tt' up to 19 x 19) for a pass
+        size (int): size of the grid
+
+    Returns:
+        (tuple): x and y coordinate, None for a pass
+    """
+    if value == '' or value == 'tt' and size <= 19:
+        return None
+
+    if len(value) != 2 or value[0] not in COORDINATES or value[1] not in COORDINATES:
+        raise ValueError('invalid point %r in SGF' % value)
+
+    x, y = COORDINATES.index(value[0]), COORDINATES.index(value[1])
+
+    if x >= size or y >= size:
+        raise ValueError('point %r is off the %dx%d board' % (value, size, size))
+
+    return x, y
+
+
+def moves(nodes):
+    """Returns the moves of a game.
+
+    Arguments:
+        nodes (list): nodes of the game, see parse()
+
+    Returns:
+        list (tuple): color (BLACK / WHITE) and x, y coordinate or None for a pass
+    """
+    size = info(nodes)['size']
+    result = []
+
+    for node in nodes:
+        for ident in SETUP_PROPERTIES:
+            if ident in node:
+                raise ValueError('setup stones (%s) are not supported' % ident)
+
+        for ident, color in MOVE_PROPERTIES.items():
+            if ident in node:
+                result.append((color, _decode(node[ident][0], size)))
+
+    return result
+
+
+def replay(nodes, superko=POSITIONAL):
+    """Plays the moves of a game on a new model.
+
+    Arguments:
+        nodes (list): nodes of the game, see parse()
+        superko (str): superko-rule of the model
+
+    Returns:
+        (Model): the game after the last move, the territory is not marked
+    """
+    model = Model(info(nodes)['size'], superko)
+
+    for number, (color, move) in enumerate(moves(nodes), 1):
+        if model.is_game_over():
+            raise ValueError('move %d: the game is already over' % number)
+
+        if color != model.get_turn():
+            raise ValueError('move %d: %s is not to move' % (number, 'Black' if color else 'White'))
+
+        if move is None:
+            model.passing()
+        elif not model.place_stone(move[0], move[1]):
+            raise ValueError('move %d: illegal move at %s' % (number, COORDINATES[move[0]] + COORDINATES[move[1]]))
+
+    return model
+
+
+def load(stream, superko=POSITIONAL):
+    """Streams the games of an SGF file replayed on models.
+
+    Arguments:
+        stream (file): file opened for reading
+        superko (str): superko-rule of the models
+
+    Returns:
+        generator (Model): one model per game
+    """
+    for nodes in read(stream):
+        yield replay(nodes, superko)
+
+
+def record(model):
+    """Returns the moves that have been played, read from the journal of the model.
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        list (tuple): color (BLACK / WHITE) and x, y coordinate or None for a pass
+    """
+    # the state before each move starts with the color of the player
+    return [(previous[0], None if p is None else model._coords(p))
+            for p, killed, previous, key in model.journal]
+
+
+def _escape(text):
+    """Escapes the characters that end a property value.
+
+    Arguments:
+        text (str): text of the value
+
+    Returns:
+        (str): escaped text
+    """
+    return text.replace('\\', '\\\\').replace(']', '\\]')
+
+
+def result(model):
+    """Returns the result of a finished game in SGF notation.
+
+    Arguments:
+        model (Model): the game, the territory should be marked
+
+    Returns:
+        (str): e.g. 'B+3' or 'W+12', '0' for a draw, None if the game is not over
+    """
+    if not model.is_game_over():
+        return None
+
+    white, black = model.add_scores()
+
+    if black == white:
+        return '0'
+
+    return 'B+%d' % (black - white) if black > white else 'W+%d' % (white - black)
+
+
+def dumps(model, black='Black', white='White'):
+    """Returns the game record of a finished or running game.
+
+    Arguments:
+        model (Model): the game
+        black (str): name of the black player
+        white (str): name of the white player
+
+    Returns:
+        (str): the game in SGF
+    """
+    n = model.size
+    header = ['(;GM[1]FF[4]CA[UTF-8]AP[Go-Game]SZ[%d]KM[0]' % n,
+              'PB[%s]PW[%s]' % (_escape(black), _escape(white))]
+
+    if result(model) is not None:
+        header.append('RE[%s]' % result(model))
+
+    lines = [''.join(header)]
+
+    # a few moves per line
+    played = ['%s[%s]' % ('B' if color else 'W', '' if move is None else COORDINATES[move[0]] + COORDINATES[move[1]])
+              for color, move in record(model)]
+
+    for i in range(0, len(played), 12):
+        lines.append(';' + ';'.join(played[i:i + 12]))
+
+    return '\n'.join(lines) + ')\n'
+
+
+def dump(model, stream, black='Black', white='White'):
+    """Writes the game record of a finished or running game.
+
+    Arguments:
+        model (Model): the game
+        stream (file): file opened for writing (text)
+        black (str): name of the black player
+        white (str): name of the white player
+    """
+    stream.write(dumps(model, black, white))
@@ -0,0 +1,135 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the binary game archive
+#
+# Usage:
+#   python -m unittest test_archive   (or python -m pytest)
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import archive
+import sgf
+from game_model import Model
+
+
+def random_game(n, seed):
+    """Plays random moves and passes, the game may end early.
+
+    Arguments:
+        n (int): size of the grid
+        seed (int): seed of the random generator
+
+    Returns:
+        (Model): the game
+    """
+    rnd = random.Random(seed)
+    model = Model(n)
+
+    for i in range(2 * n * n):
+        if rnd.random() < 0.05:
+            model.passing()
+        else:
+            model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+        if model.game_over:
+            break
+
+    return model
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'games' + archive.EXTENSION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_models(self):
+        models = [random_game((5, 9, 19)[seed % 3], seed) for seed in range(12)]
+
+        with archive.ArchiveWriter(self.path) as writer:
+            for i, model in enumerate(models):
+                self.assertEqual(writer.add_model(model, u'König', 'W', 'B+%d' % i), i)
+
+        with archive.Archive(self.path) as games:
+            self.assertEqual(len(games), len(models))
+
+            for i, model in enumerate(models):
+                header = games.header(i)
+
+                self.assertEqual(header['size'], model.size)
+                self.assertEqual((header['black'], header['white'], header['result']), (u'König', u'W', u'B+%d' % i))
+                self.assertEqual(header['moves'], len(model.journal))
+                self.assertEqual(header['game_over'], model.game_over)
+                self.assertEqual(games.moves(i), sgf.record(model))
+
+                replayed = games.replay(i)
+                self.assertEqual(replayed.points, model.points, i)
+                self.assertEqual(replayed.game_over, model.game_over, i)
+
+                # only the first moves
+                k = len(model.journal) // 2
+                self.assertEqual(games.moves(i, k), sgf.record(model)[:k])
+                self.assertEqual(len(games.replay(i, k).journal), k)
+
+            with self.assertRaises(IndexError):
+                games.header(len(models))
+
+    def test_empty_names(self):
+        with archive.ArchiveWriter(self.path) as writer:
+            writer.add(9, [])
+
+        with archive.Archive(self.path) as games:
+            self.assertEqual(games.header(0), {'size': 9, 'black': None, 'white': None, 'result': None,
+                                               'moves': 0, 'game_over': False})
+
+    def test_not_an_archive(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'hello')
+
+        with self.assertRaises(ValueError):
+            archive.Archive(self.path)
+
+        # the index is cut off
+        with archive.ArchiveWriter(self.path) as writer:
+            writer.add(9, [0, 1])
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        with open(self.path, 'wb') as f:
+            f.write(data[:-1])
+
+        with self.assertRaises(ValueError):
+            archive.Archive(self.path)
+
+    def test_convert(self):
+        model = random_game(9, 1)
+        text = (sgf.dumps(model, u'A', u'B') +
+                u'(;SZ[9]AB[aa];W[bb])\n' +       # setup stones
+                u'(;SZ[9];W[aa];B[bb])\n' +       # White moves first
+                u'(;SZ[9];B[cc];W[];B[];W[])\n')
+
+        with io.open(os.path.join(self.directory, 'games.sgf'), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        summary = archive.convert([self.directory], self.path)
+
+        self.assertEqual(summary, {'games': 2, 'skipped': 2})
+
+        with archive.Archive(self.path) as games:
+            self.assertEqual(games.moves(0), sgf.record(model))
+            self.assertEqual(games.header(0)['black'], u'A')
+            self.assertTrue(games.header(1)['game_over'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the batched model of the Go game (requires NumPy)
+#
+# Usage:
+#   python -m unittest test_batch   (or python -m pytest)
+#
+# Every game of a BatchModel is compared move by move with a Model
+# that gets the same moves.
+
+import random
+import unittest
+
+from game_model import Model, POSITIONAL, SITUATIONAL
+
+try:
+    import numpy as np
+    from batch import BatchModel, PASS
+except ImportError:
+    np = None
+
+
+def codes(model):
+    """Returns the board of a model like BatchModel.stones().
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        (list): 0 for empty fields, 1 for white and 2 for black stones, indexed by [y][x]
+    """
+    return [[0 if color is None else (2 if color else 1) for color in row] for row in model.get_data()['stones']]
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class BatchModelTest(unittest.TestCase):
+
+    def test_step_against_model(self):
+        for n, superko in ((3, None), (5, POSITIONAL), (9, SITUATIONAL), (4, POSITIONAL)):
+            rnd = random.Random(n)
+            games = 20
+            batch = BatchModel(games, n, superko=superko)
+            models = [Model(n, superko=superko) for i in range(games)]
+
+            for step in range(300):
+                moves = [PASS if rnd.random() < 0.03 else rnd.randrange(n * n) for i in range(games)]
+                result = batch.step(moves)
+                stones = batch.stones()
+
+                for i, model in enumerate(models):
+                    finished = model.game_over
+
+                    if moves[i] == PASS:
+                        valid = model.passing()
+                    else:
+                        valid = model.place_stone(moves[i] % n, moves[i] // n)
+
+                    self.assertEqual(bool(result['valid'][i]), valid, (n, step, i))
+                    self.assertEqual(bool(result['game_over'][i]), model.game_over, (n, step, i))
+                    self.assertEqual(stones[i].tolist(), codes(model), (n, step, i))
+                    self.assertEqual(int(batch.hash[i]), model.hash, (n, step, i))
+                    self.assertEqual(bool(batch.turn[i]), model.turn, (n, step, i))
+                    self.assertEqual(batch.captured[i].tolist(), list(model.captured), (n, step, i))
+
+                    ko = int(batch.blocked_field[i])
+                    self.assertEqual(None if ko == PASS else (ko % n, ko // n), model.blocked_field, (n, step, i))
+
+                    if model.game_over and not finished:
+                        model.find_territory(benson=False)
+                        self.assertEqual(result['score'][i].tolist(), list(model.get_data()['score']), (n, step, i))
+
+    def test_moves_off_the_board(self):
+        n = 5
+        batch = BatchModel(4, n)
+        result = batch.step([n * n, 3 * n * n, -7, 0])
+
+        self.assertEqual(result['valid'].tolist(), [False, False, False, True])
+        self.assertEqual(int(batch.stones()[:3].sum()), 0)
+        self.assertEqual(batch.turn.tolist(), [True, True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the NumPy model of the Go game (requires NumPy)
+#
+# Usage:
+#   python -m unittest test_bitboard   (or python -m pytest)
+#
+# A BitboardModel and a Model get the same random moves, their data,
+# legal moves, liberties and the territory at the end are compared.
+
+import random
+import unittest
+
+from game_model import Model, EMPTY, POSITIONAL, SITUATIONAL
+
+try:
+    import numpy as np
+    from bitboard import BitboardModel
+except ImportError:
+    np = None
+
+
+def liberties(model, x, y):
+    """Counts the empty fields next to the group of a stone.
+
+    Arguments:
+        model (Model): the game
+        x (int): x - coordinate of the stone
+        y (int): y - coordinate of the stone
+
+    Returns:
+        (int): nr. of liberties, 0 for an empty field
+    """
+    p = model._point(x, y)
+
+    if model.points[p] == EMPTY:
+        return 0
+
+    return len(set([q + d for q in model._members(p) for d in model.offsets if model.points[q + d] == EMPTY]))
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class BitboardModelTest(unittest.TestCase):
+
+    def test_game_against_model(self):
+        for seed in range(30):
+            rnd = random.Random(seed)
+            n = (2, 3, 5, 9, 13)[seed % 5]
+            superko = (None, POSITIONAL, SITUATIONAL)[seed % 3]
+            model = Model(n, superko=superko)
+            bitboard = BitboardModel(n, superko=superko)
+
+            for i in range(250):
+                if rnd.random() < 0.02:
+                    self.assertEqual(bitboard.passing(), model.passing(), (seed, i))
+                else:
+                    x, y = rnd.randrange(n), rnd.randrange(n)
+                    self.assertEqual(bitboard.is_legal(x, y), model.is_legal(x, y), (seed, i))
+                    self.assertEqual(bitboard.place_stone(x, y), model.place_stone(x, y), (seed, i))
+
+                self.assertEqual(bitboard.hash, model.hash, (seed, i))
+                self.assertEqual(bitboard.blocked_field, model.blocked_field, (seed, i))
+                self.assertEqual(bitboard.get_data(), model.get_data(), (seed, i))
+
+                if i % 25 == 0:
+                    self.assertEqual(bitboard.legal_moves(), model.legal_moves(), (seed, i))
+                    self.assertEqual(bitboard.liberties().tolist(),
+                                     [[liberties(model, x, y) for x in range(n)] for y in range(n)], (seed, i))
+
+                if model.game_over:
+                    break
+
+            # score the position, the bitboard does not use Benson's algorithm
+            model.game_over = bitboard.game_over = True
+            model.find_territory(benson=False)
+            bitboard.find_territory()
+
+            self.assertEqual(bitboard.get_data(), model.get_data(), seed)
+
+            for k in range(6):
+                x, y = rnd.randrange(n), rnd.randrange(n)
+                model.mark_territory(x, y)
+                bitboard.mark_territory(x, y)
+
+                self.assertEqual(bitboard.get_data(), model.get_data(), (seed, k))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,581 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the game model of the Go game
+#
+# Usage:
+#   python -m unittest test_game_model   (or python -m pytest)
+#
+# Differential tests on random games:
+#   - the moves and the territory of finished games are compared with a
+#     plain reference implementation of the rules on a 2D board (the
+#     rules of the original model)
+#   - undo() is compared with the snapshots taken before each move
+#   - the caches of the model (legality, estimate, symmetric hashes, view)
+#     are compared with a freshly unpickled copy of the model, which
+#     rebuilds all of them from the stones
+
+import copy
+import pickle
+import random
+import unittest
+
+from game_model import Model, BLACK, WHITE, POSITIONAL, SITUATIONAL
+
+
+def fresh(model):
+    """Returns a copy of the model without any cached state.
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        (Model): the unpickled copy
+    """
+    return pickle.loads(pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+
+
+def random_step(model, rnd):
+    """Plays a random move, pass, undo or redo.
+
+    Arguments:
+        model (Model): the game
+        rnd (Random): random generator
+    """
+    n = model.size
+    r = rnd.random()
+
+    if r < 0.03:
+        model.passing()
+    elif r < 0.13:
+        model.undo()
+    elif r < 0.18:
+        model.redo()
+    else:
+        model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+    # keep the game running
+    if model.game_over:
+        model.undo()
+
+
+class ReferenceModel(object):
+    """The rules of the game on a 2D board without any caches: groups and
+    liberties are found by flood fill. Simple ko-rule only."""
+
+    def __init__(self, n):
+        """Starts a new game.
+
+        Arguments:
+            n (int): size of the grid
+        """
+        self.size = n
+        self.turn = BLACK
+        self.blocked_field = None
+        self.has_passed = False
+        self.game_over = False
+        self.board = [[None for i in range(n)] for j in range(n)]
+        self.captured = [0, 0]
+
+    def _neighbors(self, x, y):
+        """Returns the fields next to (x, y) on the board."""
+        return [(u, v) for u, v in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                if 0 <= u < self.size and 0 <= v < self.size]
+
+    def _group(self, x, y):
+        """Returns the stones of the group at (x, y) and its liberties."""
+        color = self.board[y][x]
+        stones = set([(x, y)])
+        liberties = set()
+        todo = [(x, y)]
+
+        while todo:
+            for u, v in self._neighbors(*todo.pop()):
+                if self.board[v][u] is None:
+                    liberties.add((u, v))
+                elif self.board[v][u] == color and (u, v) not in stones:
+                    stones.add((u, v))
+                    todo.append((u, v))
+
+        return stones, liberties
+
+    def passing(self):
+        """Passes, the second pass in a row ends the game."""
+        if self.game_over:
+            return False
+
+        if self.has_passed:
+            self.game_over = True
+            return True
+
+        self.turn = not self.turn
+        self.has_passed = True
+        self.blocked_field = None
+
+        return True
+
+    def place_stone(self, x, y):
+        """Places a stone if the move is legal.
+
+        Returns:
+            (boolean): True if the stone has been placed
+        """
+        if self.game_over or self.board[y][x] is not None or self.blocked_field == (x, y):
+            return False
+
+        self.board[y][x] = self.turn
+        killed = []
+
+        for u, v in self._neighbors(x, y):
+            if self.board[v][u] == (not self.turn):
+                stones, liberties = self._group(u, v)
+
+                if not liberties:
+                    killed.append(stones)
+
+                    for a, b in stones:
+                        self.board[b][a] = None
+
+        stones, liberties = self._group(x, y)
+
+        # suicide
+        if not liberties:
+            self.board[y][x] = None
+            return False
+
+        self.captured[self.turn] += sum([len(group) for group in killed])
+
+        if len(stones) == 1 and len(killed) == 1 and len(killed[0]) == 1:
+            self.blocked_field = list(killed[0])[0]
+        else:
+            self.blocked_field = None
+
+        self.turn = not self.turn
+        self.has_passed = False
+
+        return True
+
+    def _area(self, x, y):
+        """Returns the empty fields connected to (x, y) and the colors of
+        the stones next to them."""
+        area = set([(x, y)])
+        colors = set()
+        todo = [(x, y)]
+
+        while todo:
+            for u, v in self._neighbors(*todo.pop()):
+                if self.board[v][u] is not None:
+                    colors.add(self.board[v][u])
+                elif (u, v) not in area:
+                    area.add((u, v))
+                    todo.append((u, v))
+
+        return area, colors
+
+    def find_territory(self):
+        """Claims the empty areas surrounded by one color only."""
+        self.territory = [[None for i in range(self.size)] for j in range(self.size)]
+
+        for y in range(self.size):
+            for x in range(self.size):
+                if self.board[y][x] is None:
+                    area, colors = self._area(x, y)
+
+                    if len(colors) == 1:
+                        color = colors.pop()
+
+                        for u, v in area:
+                            self.territory[v][u] = color
+
+    def mark_territory(self, x, y):
+        """Cycles the mark of an empty area (None, Black, White) or
+        marks a group dead and unmarks it, with its adjacent empty areas."""
+        if not self.game_over:
+            return
+
+        if self.board[y][x] is None:
+            color = {None: BLACK, BLACK: WHITE, WHITE: None}[self.territory[y][x]]
+            fields = self._area(x, y)[0]
+        else:
+            color = not self.board[y][x] if self.territory[y][x] is None else None
+            stones = self._group(x, y)[0]
+            fields = set(stones)
+
+            for u, v in stones:
+                for a, b in self._neighbors(u, v):
+                    if self.board[b][a] is None:
+                        fields |= self._area(a, b)[0]
+
+        for u, v in fields:
+            self.territory[v][u] = color
+
+    def score(self):
+        """Returns the score of the marked fields [White, Black]:
+        1 point for an empty field, 2 points for a dead stone."""
+        score = [0, 0]
+
+        for y in range(self.size):
+            for x in range(self.size):
+                color = self.territory[y][x]
+
+                if color is not None:
+                    score[color] += 1 if self.board[y][x] is None else 2
+
+        return score
+
+
+def finished_games(seeds, sizes):
+    """Plays random games to the end on the model and the reference.
+
+    Arguments:
+        seeds (range): seeds of the random generators
+        sizes (tuple): board sizes, chosen by the seed
+
+    Returns:
+        list (tuple): seed, model and reference of each game
+    """
+    games = []
+
+    for seed in seeds:
+        rnd = random.Random(seed)
+        n = sizes[seed % len(sizes)]
+        model = Model(n, superko=None)
+        reference = ReferenceModel(n)
+
+        for i in range(3 * n * n):
+            x, y = rnd.randrange(n), rnd.randrange(n)
+            model.place_stone(x, y)
+            reference.place_stone(x, y)
+
+        model.passing()
+        model.passing()
+        reference.passing()
+        reference.passing()
+        games.append((seed, model, reference))
+
+    return games
+
+
+class ReferenceTest(unittest.TestCase):
+
+    def test_moves_against_reference(self):
+        for seed in range(30):
+            rnd = random.Random(seed)
+            n = (2, 3, 5, 9, 13)[seed % 5]
+            model = Model(n, superko=None)
+            reference = ReferenceModel(n)
+
+            for i in range(400):
+                if rnd.random() < 0.03:
+                    self.assertEqual(model.passing(), reference.passing(), (seed, i))
+                else:
+                    x, y = rnd.randrange(n), rnd.randrange(n)
+                    self.assertEqual(model.place_stone(x, y), reference.place_stone(x, y), (seed, i))
+
+                data = model.get_data()
+
+                self.assertEqual([list(row) for row in data['stones']], reference.board, (seed, i))
+                self.assertEqual(data['color'], reference.turn, (seed, i))
+                self.assertEqual(data['game_over'], reference.game_over, (seed, i))
+                self.assertEqual(model.captured, reference.captured, (seed, i))
+                self.assertEqual(model.blocked_field, reference.blocked_field, (seed, i))
+
+                if reference.game_over:
+                    break
+
+
+class TerritoryTest(unittest.TestCase):
+
+    def test_find_territory_against_reference(self):
+        for seed, model, reference in finished_games(range(40), (2, 3, 5, 9, 13)):
+            model.find_territory(benson=False)
+            reference.find_territory()
+
+            self.assertEqual(model.territory, reference.territory, seed)
+            self.assertEqual(model.score, reference.score(), seed)
+
+    def test_find_territory_on_large_board(self):
+        # the areas are flooded without recursion
+        model = Model(101)
+        model.place_stone(0, 0)
+        model.passing()
+        model.passing()
+        model.find_territory(benson=False)
+
+        self.assertEqual(model.score, [0, 101 * 101 - 1])
+
+    def test_mark_territory_against_reference(self):
+        for seed, model, reference in finished_games(range(40, 70), (3, 5, 9, 13)):
+            rnd = random.Random(seed)
+            model.find_territory(benson=False)
+            reference.find_territory()
+
+            for i in range(30):
+                x, y = rnd.randrange(model.size), rnd.randrange(model.size)
+                model.mark_territory(x, y)
+                reference.mark_territory(x, y)
+
+                self.assertEqual(model.territory, reference.territory, (seed, i))
+                self.assertEqual(model.score, reference.score(), (seed, i))
+
+            # the score updated by the changed fields equals a full count
+            score = list(model.score)
+            model._compute_score()
+
+            self.assertEqual(model.score, score, seed)
+
+
+def snapshot(model):
+    """Returns the state of the game that undo() has to restore.
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        (tuple): data of the view, hashes and the rule state
+    """
+    return (model.get_data(), model.hash, model.canonical_hash(), frozenset(model.history),
+            model.blocked_field, model.has_passed, model.legal_moves())
+
+
+class UndoTest(unittest.TestCase):
+
+    def test_undo_against_snapshots(self):
+        for seed in range(24):
+            rnd = random.Random(seed)
+            n = (3, 4, 5, 9)[seed % 4]
+            model = Model(n, superko=(None, POSITIONAL, SITUATIONAL)[seed % 3])
+            snapshots = [snapshot(model)]
+
+            for i in range(200):
+                if rnd.random() < 0.03:
+                    played = model.passing()
+                else:
+                    played = model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+                if played:
+                    snapshots.append(snapshot(model))
+
+                # take back a few moves and play some of them again
+                if rnd.random() < 0.1 and len(snapshots) > 1:
+                    k = rnd.randrange(1, min(6, len(snapshots)))
+
+                    for j in range(k):
+                        self.assertTrue(model.undo())
+                        snapshots.pop()
+                        self.assertEqual(snapshot(model), snapshots[-1], (seed, i))
+
+                    for j in range(rnd.randrange(k + 1)):
+                        self.assertTrue(model.redo())
+                        snapshots.append(snapshot(model))
+
+                self.assertEqual(snapshot(model), snapshots[-1], (seed, i))
+
+            while model.undo():
+                snapshots.pop()
+
+            self.assertEqual(snapshot(model), snapshots[0], seed)
+            self.assertEqual(len(snapshots), 1, seed)
+            self.assertEqual(snapshot(fresh(model)), snapshots[0], seed)
+
+
+def regions(model):
+    """Returns the empty regions of the score estimate.
+
+    Arguments:
+        model (Model): the game
+
+    Returns:
+        (list): fields of each region with its counters, sorted
+    """
+    model.estimate()
+    fields = {}
+
+    for p in range(len(model.points)):
+        if model.region[p]:
+            fields.setdefault(model.region[p], []).append(p)
+
+    return sorted([(fields[label],) + model.regions[label] for label in fields])
+
+
+class EstimateTest(unittest.TestCase):
+
+    def test_regions_against_fresh_model(self):
+        for seed in range(30):
+            rnd = random.Random(seed)
+            n = (2, 3, 5, 9, 13)[seed % 5]
+            model = Model(n, superko=None)
+
+            for i in range(200):
+                for j in range(rnd.choice((1, 1, 2, 4, 40))):
+                    random_step(model, rnd)
+
+                if rnd.random() < 0.3:
+                    other = fresh(model)
+
+                    self.assertEqual(regions(model), regions(other), (seed, i))
+                    self.assertEqual(len(model.regions), len(other.regions), (seed, i))
+                    self.assertEqual(model.area_estimate, other.area_estimate, (seed, i))
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_caches_against_fresh_model(self):
+        for seed in range(24):
+            rnd = random.Random(seed)
+            n = (3, 5, 9)[seed % 3]
+            model = Model(n, superko=(None, POSITIONAL, SITUATIONAL)[seed % 3])
+
+            # the board as seen by a view that applies get_changes()
+            view = [list(row) for row in model.get_data()['stones']]
+
+            for i in range(200):
+                # long stretches without a query overflow the change log
+                for j in range(rnd.choice((1, 1, 2, 5, 3 * (n + 2) * (n + 2)))):
+                    random_step(model, rnd)
+
+                r = rnd.random()
+
+                if r < 0.3:
+                    for x, y, color in model.get_changes()['stones']:
+                        view[y][x] = color
+
+                    self.assertEqual(view, [list(row) for row in model.get_data()['stones']], (seed, i))
+                elif r < 0.6:
+                    self.assertEqual(model.estimate(), fresh(model).estimate(), (seed, i))
+                elif r < 0.9:
+                    other = fresh(model)
+
+                    self.assertEqual(model.canonical_hash(), other.canonical_hash(), (seed, i))
+                    self.assertEqual(model.sym_hashes, other.sym_hashes, (seed, i))
+                else:
+                    # a clone continues with the caches of the model
+                    model = model.clone()
+
+                self.assertTrue(len(model.changes) <= 2 * len(model.points), (seed, i))
+
+
+class LegalityTest(unittest.TestCase):
+
+    def test_cache_reset_by_many_changes(self):
+        model = Model(3, superko=None)
+        model.place_stone(1, 0)
+        model.passing()
+        model.place_stone(0, 1)
+
+        # suicide for white, the answer is cached
+        self.assertFalse(model.is_legal(0, 0))
+
+        # more changes than fields reset the cache
+        for i in range(20):
+            model.undo()
+            model.redo()
+
+        for i in range(3):
+            model.undo()
+
+        model.passing()
+
+        self.assertTrue(model.is_legal(0, 0))
+
+    def test_legal_moves_after_transposition(self):
+        # the same stones and turn are reached again after undo() with a
+        # different history, the superko-rule forbids another move
+        first = [(2, 0), (2, 2), (1, 0), (0, 1), (1, 1), (1, 2), (0, 0), (2, 1),
+                 (0, 0), (2, 0), (1, 0), (1, 1), (1, 0), (0, 0), None, (1, 0)]
+        second = [(0, 2), (1, 0), (2, 0), (1, 2), (2, 2), (2, 1), (0, 0), (2, 0),
+                  (0, 1), (1, 1), (0, 1), (2, 2), (0, 2), (0, 0), (0, 2), (0, 1)]
+        model = Model(3)
+
+        for moves in (first, second):
+            while model.undo():
+                pass
+
+            for move in moves:
+                if move is None:
+                    self.assertTrue(model.passing())
+                else:
+                    self.assertTrue(model.place_stone(*move), move)
+
+            legal = model.legal_moves()
+
+            self.assertEqual(legal, fresh(model).legal_moves())
+            self.assertEqual(legal, [(x, y) for y in range(3) for x in range(3) if model.is_legal(x, y)])
+
+        self.assertFalse(model.place_stone(0, 2))
+
+    def test_is_legal_against_fresh_model(self):
+        for seed in range(24):
+            rnd = random.Random(seed)
+            n = (3, 4, 5, 9)[seed % 4]
+            model = Model(n, superko=(None, POSITIONAL, SITUATIONAL)[seed % 3])
+
+            for i in range(300):
+                # long stretches without a query overflow the change lists
+                for j in range(rnd.choice((1, 1, 1, 3 * (n + 2) * (n + 2)))):
+                    random_step(model, rnd)
+
+                if rnd.random() < 0.3:
+                    other = fresh(model)
+                    moves = [(x, y) for y in range(n) for x in range(n)]
+
+                    self.assertEqual([model.is_legal(x, y) for x, y in moves],
+                                     [other.is_legal(x, y) for x, y in moves], (seed, i))
+                    self.assertEqual(model.legal_moves(), other.legal_moves(), (seed, i))
+
+
+class PositionTest(unittest.TestCase):
+
+    def test_position_without_moves(self):
+        rnd = random.Random(1)
+        model = Model(9)
+
+        for i in range(60):
+            model.place_stone(rnd.randrange(9), rnd.randrange(9))
+
+        model.undo()
+        position = fresh(model.position())
+
+        self.assertEqual(position.journal, [])
+        self.assertEqual(position.redo_moves, [])
+        self.assertEqual(position.history, model.history)
+        self.assertEqual(position.legal_moves(), model.legal_moves())
+        self.assertEqual(len(model.redo_moves), 1)
+
+
+class OwnershipTest(unittest.TestCase):
+
+    def test_find_territory_with_probability(self):
+        model = Model(5)
+        model.place_stone(0, 0)
+        model.place_stone(4, 4)
+
+        # black owns every field, the white stone is dead
+        probability = [[[0.0] * 5 for y in range(5)], [[1.0] * 5 for y in range(5)]]
+
+        model.find_territory()
+        self.assertEqual(model.score, [0, 0])
+
+        model.find_territory(probability)
+        self.assertEqual(model.score, [0, 25])
+        self.assertEqual(model.territory[4][4], BLACK)
+        self.assertEqual(model.territory[0][0], None)
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def test_copy_and_pickle(self):
+        model = Model(5)
+        model.place_stone(1, 2)
+        data = model.get_data()
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertEqual(pickle.loads(pickle.dumps(data, protocol)), data)
+
+        self.assertEqual(copy.copy(data), data)
+        self.assertEqual(copy.deepcopy(data), data)
+        self.assertRaises(TypeError, data.__setitem__, 'size', 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
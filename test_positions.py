@@ -0,0 +1,123 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the position search index
+#
+# Usage:
+#   python -m unittest test_positions   (or python -m pytest)
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import archive
+import positions
+from game_model import Model, SYMMETRIES
+
+
+def random_game(n, seed):
+    """Plays random moves and passes, the game may end early.
+
+    Arguments:
+        n (int): size of the grid
+        seed (int): seed of the random generator
+
+    Returns:
+        (Model): the game
+    """
+    rnd = random.Random(seed)
+    model = Model(n)
+
+    for i in range(n * n):
+        if rnd.random() < 0.05:
+            model.passing()
+        else:
+            model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+        if model.game_over:
+            break
+
+    return model
+
+
+class PositionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = os.path.join(self.directory, 'games' + archive.EXTENSION)
+        self.index = os.path.join(self.directory, 'games.gpi')
+
+        with archive.ArchiveWriter(self.archive) as writer:
+            for seed in range(20):
+                writer.add_model(random_game((5, 9)[seed % 2], seed))
+
+            # every game starts the same, the second move is illegal
+            writer.add(9, [0, 0, 1])
+
+        self.entries = positions.build(self.archive, self.index)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries(self):
+        expected = {}
+
+        with archive.Archive(self.archive) as games:
+            for game in range(len(games)):
+                for move, h in positions.game_positions(games, game):
+                    expected.setdefault(h, []).append((game, move))
+
+        found = sum(expected.values(), [])
+
+        # the illegal game stops after its first move
+        self.assertEqual(len(found), self.entries)
+        self.assertEqual([move for game, move in found if game == 20], [1])
+
+        with positions.PositionIndex(self.index) as index:
+            self.assertEqual(len(index), self.entries)
+            self.assertEqual(index.games, 21)
+
+            for h, found in expected.items():
+                self.assertEqual(index.lookup(h), sorted(found))
+
+            self.assertEqual(index.lookup(Model(9).canonical_hash()), [])
+
+    def test_search_symmetries(self):
+        rnd = random.Random(0)
+
+        with archive.Archive(self.archive) as games:
+            with positions.PositionIndex(self.index) as index:
+                for trial in range(40):
+                    game = rnd.randrange(20)
+                    moves = games.moves(game)
+                    n = games.header(game)['size']
+                    k = rnd.randrange(len(moves) + 1)
+                    symmetry = SYMMETRIES[rnd.randrange(len(SYMMETRIES))]
+
+                    # the first k moves rotated or mirrored
+                    model = Model(n)
+
+                    for color, move in moves[:k]:
+                        if move is None:
+                            model.passing()
+                        else:
+                            self.assertTrue(model.place_stone(*symmetry(move[0], move[1], n - 1)))
+
+                    # the position after the last stone
+                    stones = [number for number, (color, move) in enumerate(moves[:k], 1) if move is not None]
+
+                    if stones:
+                        self.assertIn((game, stones[-1]), index.search(model), (game, k))
+
+    def test_not_an_index(self):
+        with open(self.index, 'wb') as f:
+            f.write(b'hello')
+
+        with self.assertRaises(ValueError):
+            positions.PositionIndex(self.index)
+
+
+if __name__ == '__main__':
+    unittest.main()
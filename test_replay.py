@@ -0,0 +1,116 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the bulk replay of game records
+#
+# Usage:
+#   python -m unittest test_replay   (or python -m pytest)
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import archive
+import replay
+import sgf
+
+# a finished game, a move on an occupied point and a ko violation
+FINISHED = u'(;SZ[9]PB[A]PW[B]RE[W+1];B[cc];W[gg];B[];W[])\n'
+OCCUPIED = u'(;SZ[9];B[aa];W[aa];B[bb])\n'
+KO = u'(;SZ[9];B[ba];W[ca];B[ab];W[bb];B[bc];W[db];B[ii];W[cc];B[cb];W[bb])\n'
+
+
+def write(path, text):
+    """Writes a text file in UTF-8.
+
+    Arguments:
+        path (str): path of the file
+        text (str): content
+    """
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class ReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'sub'))
+
+        write(os.path.join(self.directory, 'a.sgf'), FINISHED + OCCUPIED)
+        write(os.path.join(self.directory, 'sub', 'b.sgf'), KO)
+        write(os.path.join(self.directory, 'bad.sgf'), u'(;SZ[9];B[aa]')
+        write(os.path.join(self.directory, 'notes.txt'), u'not a game')
+
+        # the same games in an archive
+        with archive.ArchiveWriter(os.path.join(self.directory, 'c' + archive.EXTENSION)) as writer:
+            for text in (FINISHED, KO):
+                nodes = next(sgf.parse([text]))
+                header = sgf.info(nodes)
+                codes = [archive.PASS if move is None else move[1] * 9 + move[0] for color, move in sgf.moves(nodes)]
+                writer.add(9, codes, header['black'], header['white'], header['result'], text == FINISHED)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_batch(self, workers):
+        """Replays the directory and returns the summary and the result
+        lines by file name and game nr."""
+        output = io.StringIO() if str is not bytes else io.BytesIO()
+        summary = replay.run([self.directory], output, workers=workers)
+
+        results = {}
+
+        for line in output.getvalue().splitlines():
+            result = json.loads(line)
+            results[os.path.basename(result['file']), result['game']] = result
+
+        return summary, results
+
+    def test_find_files(self):
+        names = [os.path.relpath(path, self.directory) for path in replay.find_files([self.directory])]
+
+        self.assertEqual(names, ['a.sgf', 'bad.sgf', 'c' + archive.EXTENSION, os.path.join('sub', 'b.sgf')])
+
+    def test_results(self):
+        summary, results = self.run_batch(1)
+
+        self.assertEqual((summary['games'], summary['invalid'], summary['errors']), (5, 3, 1))
+        self.assertTrue(results['bad.sgf', 0]['error'])
+
+        finished = results['a.sgf', 0]
+        model = sgf.replay(next(sgf.parse([FINISHED])))
+        model.find_territory()
+        white, black = model.add_scores()
+
+        self.assertTrue(finished['valid'] and finished['finished'])
+        self.assertEqual(finished['score'], {'black': black, 'white': white})
+        self.assertEqual(finished['result'], sgf.result(model))
+        self.assertEqual(finished['recorded_result'], 'W+1')
+
+        self.assertEqual(results['a.sgf', 1]['illegal'], {'move': 2, 'point': 'aa', 'reason': 'occupied'})
+        self.assertEqual(results['b.sgf', 0]['illegal'], {'move': 10, 'point': 'bb', 'reason': 'ko'})
+
+        # the archive gives the same results as the SGF files
+        for name, game in (('a.sgf', 0), ('b.sgf', 0)):
+            archived = results['c' + archive.EXTENSION, int(name == 'b.sgf')]
+
+            for key in ('size', 'moves', 'valid', 'illegal', 'finished', 'score', 'result', 'recorded_result'):
+                self.assertEqual(archived[key], results[name, game][key], (name, key))
+
+    def test_processes(self):
+        summary, results = self.run_batch(1)
+        parallel_summary, parallel_results = self.run_batch(2)
+
+        for result in list(results.values()) + list(parallel_results.values()):
+            result.pop('seconds', None)
+
+        self.assertEqual(parallel_results, results)
+        self.assertEqual(parallel_summary['games'], summary['games'])
+
+
+if __name__ == '__main__':
+    unittest.main()
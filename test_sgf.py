@@ -0,0 +1,135 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the SGF import and export
+#
+# Usage:
+#   python -m unittest test_sgf   (or python -m pytest)
+
+import io
+import random
+import unittest
+
+import sgf
+from game_model import Model
+
+# a record with escaped values, an old (FF[3]) identifier, a comment and
+# variations: the main line is B[aa] W[] B[bb] W[cc]
+RECORD = (u'junk (;FF[3]SZ[9]PlayerBlack[A\\]b]PW[C\\\\d]\n'
+          u';B[aa]C[a comment with ) and \\] and (];W[tt]'
+          u'(;B[bb];W[cc])(;B[dd]))\n(;SZ[9];B[ee])')
+
+
+def random_game(n, seed):
+    """Plays random moves and passes until the game is over or the board
+    has been tried n x n times.
+
+    Arguments:
+        n (int): size of the grid
+        seed (int): seed of the random generator
+
+    Returns:
+        (Model): the game
+    """
+    rnd = random.Random(seed)
+    model = Model(n)
+
+    for i in range(n * n):
+        if rnd.random() < 0.05:
+            model.passing()
+        else:
+            model.place_stone(rnd.randrange(n), rnd.randrange(n))
+
+        if model.game_over:
+            break
+
+    return model
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def test_dumps_and_replay(self):
+        for n in (5, 9, 13, 19):
+            for seed in range(4):
+                model = random_game(n, seed)
+
+                if not model.game_over and seed % 2 == 0:
+                    model.passing()
+                    model.passing()
+                    model.find_territory()
+
+                games = list(sgf.parse([sgf.dumps(model, u'A]b', u'C\\d')]))
+                self.assertEqual(len(games), 1)
+
+                header = sgf.info(games[0])
+                self.assertEqual(header['size'], n)
+                self.assertEqual((header['black'], header['white']), (u'A]b', u'C\\d'))
+                self.assertEqual(header['result'], sgf.result(model))
+
+                replayed = sgf.replay(games[0])
+                self.assertEqual(replayed.points, model.points, (n, seed))
+                self.assertEqual(replayed.turn, model.turn, (n, seed))
+                self.assertEqual(replayed.game_over, model.game_over, (n, seed))
+                self.assertEqual(sgf.record(replayed), sgf.record(model), (n, seed))
+
+    def test_main_line(self):
+        games = list(sgf.parse([RECORD]))
+
+        self.assertEqual(len(games), 2)
+        self.assertEqual(sgf.info(games[0])['black'], u'A]b')
+        self.assertEqual(sgf.info(games[0])['white'], u'C\\d')
+        self.assertEqual(sgf.moves(games[0]), [(True, (0, 0)), (False, None), (True, (1, 1)), (False, (2, 2))])
+        self.assertEqual(sgf.moves(games[1]), [(True, (4, 4))])
+
+
+class ChunkTest(unittest.TestCase):
+
+    def test_every_split(self):
+        expected = list(sgf.parse([RECORD]))
+
+        # a token, a value or an escape may be split between two pieces
+        for i in range(len(RECORD) + 1):
+            self.assertEqual(list(sgf.parse([RECORD[:i], RECORD[i:]])), expected, i)
+
+        self.assertEqual(list(sgf.parse(list(RECORD))), expected)
+
+    def test_stream(self):
+        text = sgf.dumps(random_game(9, 1), u'Zürich', u'囲碁') * 3
+        expected = list(sgf.parse([text]))
+
+        self.assertEqual(len(expected), 3)
+
+        for chunk_size in (1, 2, 3, 7, 65536):
+            self.assertEqual(list(sgf.read(io.StringIO(text), chunk_size)), expected, chunk_size)
+
+        # the characters of the names are split between the bytes
+        data = text.encode('utf-8')
+
+        if str is bytes:
+            # Python 2: binary files are parsed as bytes
+            expected = list(sgf.parse([data]))
+
+        for chunk_size in (1, 2, 3, 7, 65536):
+            self.assertEqual(list(sgf.read(io.BytesIO(data), chunk_size)), expected, chunk_size)
+
+
+class InvalidTest(unittest.TestCase):
+
+    def test_errors(self):
+        records = [u'(;SZ[9];B[aa];B[bb])',    # Black moves twice
+                   u'(;SZ[9];B[aa];W[aa])',    # occupied point
+                   u'(;SZ[9]AB[aa])',          # setup stones
+                   u'(;SZ[9];B[zz])',          # off the board
+                   u'(;SZ[60];B[aa])',         # board size
+                   u'(;SZ[9];B[aa]',           # game not closed
+                   u'(;SZ[9]C[x',              # value not closed
+                   u'(;SZ[9]))']               # unbalanced parenthesis
+
+        for text in records:
+            with self.assertRaises(ValueError):
+                for nodes in sgf.parse([text]):
+                    sgf.replay(nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
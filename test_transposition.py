@@ -0,0 +1,101 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Tests of the transposition table and its use by the search
+#
+# Usage:
+#   python -m unittest test_transposition   (or python -m pytest)
+
+import unittest
+
+from game_model import Model
+from mcts import MCTS, MCTSPlayer
+from transposition import TranspositionTable, entries_for, ENTRY_BYTES
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted(self):
+        table = TranspositionTable(3)
+
+        for key in (1, 2, 3):
+            table.put(key, key, key / 2.0)
+
+        # 1 is used again, 2 is the least recently used entry now
+        self.assertEqual(table.get(1), (1, 0.5))
+        table.put(4, 4, 2.0)
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.get(2), None)
+        self.assertEqual(table.get(3), (3, 1.5))
+        self.assertEqual(table.get(4), (4, 2.0))
+
+        # replacing an entry does not evict another one
+        table.put(1, 10, 5.0)
+        self.assertEqual(table.get(1), (10, 5.0))
+        self.assertEqual(len(table), 3)
+
+        stats = table.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (4, 1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.8)
+
+    def test_hard_limit(self):
+        table = TranspositionTable(100)
+
+        for key in range(1000):
+            table.put(key, 1, 1.0)
+            self.assertTrue(len(table) <= 100)
+
+        self.assertEqual(table.stats()['evictions'], 900)
+        self.assertEqual(sorted(table.entries), list(range(900, 1000)))
+        self.assertRaises(ValueError, TranspositionTable, 0)
+
+    def test_entries_for(self):
+        self.assertEqual(entries_for(1), 1024 * 1024 // ENTRY_BYTES)
+        self.assertEqual(entries_for(0), 1)
+
+
+def nodes(node):
+    """Returns all nodes of a search tree.
+
+    Arguments:
+        node (Node): the root
+
+    Returns:
+        generator (Node): the nodes
+    """
+    yield node
+
+    for child in node.children:
+        for other in nodes(child):
+            yield other
+
+
+class SearchTableTest(unittest.TestCase):
+
+    def test_imported_visits_are_capped(self):
+        model = Model(4)
+        table = TranspositionTable(10000)
+        search = MCTS(playouts=200, seed=1, table=table)
+
+        # every position after a move of the root seems to be well known
+        for x in range(4):
+            for y in range(4):
+                game = model.clone()
+                game.place_stone(x, y)
+                table.put(game.position_hash(), 1000000, 900000.0)
+
+        search.search(model)
+
+        for node in nodes(search.root):
+            for child in node.children:
+                self.assertTrue(child.visits <= node.visits, (child.move, child.visits, node.visits))
+                self.assertTrue(child.wins <= child.visits)
+
+    def test_player_has_a_table(self):
+        self.assertTrue(MCTSPlayer(playouts=10).mcts.table is not None)
+        self.assertTrue(MCTSPlayer(playouts=10, table_megabytes=0).mcts.table is None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+
+# Transposition table for the search over Go positions
+#
+# Positions reached by different move orders share one entry, keyed by
+# Model.position_hash() (stones, player to move and ko field). The table
+# holds at most max_entries entries, the least recently used entry is
+# evicted to make room for a new one.
+
+from collections import OrderedDict
+
+# approximate memory of an entry in CPython (key, value list and the
+# links of the ordered dictionary), used by entries_for()
+ENTRY_BYTES = 270
+
+
+def entries_for(megabytes):
+    """Returns the nr. of entries that fit into a memory budget.
+
+    Arguments:
+        megabytes (float): memory budget of the table
+
+    Returns:
+        (int): value for max_entries
+    """
+    return max(1, int(megabytes * 1024 * 1024 // ENTRY_BYTES))
+
+
+class TranspositionTable(object):
+    """Stores the visits and the value (sum of the results) of positions."""
+
+    def __init__(self, max_entries):
+        """Creates an empty table.
+
+        Arguments:
+            max_entries (int): hard limit of the nr. of entries
+
+        Attributes initialized by this function:
+            self.max_entries
+            self.entries
+            self.hits
+            self.misses
+            self.evictions
+        """
+        if max_entries < 1:
+            raise ValueError('the table needs room for at least one entry')
+
+        self.max_entries = max_entries
+
+        # hash -> [visits, value], ordered from least to most recently used
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Looks up a position and marks it as recently used.
+
+        Arguments:
+            key (int): hash of the position
+
+        Returns:
+            (tuple): visits and value, None if the position is unknown
+        """
+        entry = self.entries.pop(key, None)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries[key] = entry
+        self.hits += 1
+
+        return entry[0], entry[1]
+
+    def put(self, key, visits, value):
+        """Stores the statistics of a position, replacing the old ones.
+        Evicts the least recently used entry if the table is full.
+
+        Arguments:
+            key (int): hash of the position
+            visits (int): nr. of visits
+            value (float): sum of the results
+        """
+        entries = self.entries
+
+        if entries.pop(key, None) is None and len(entries) >= self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+        entries[key] = [visits, value]
+
+    def clear(self):
+        """Removes all entries, the counters are kept.
+
+        Variables changed by this function:
+            self.entries
+        """
+        self.entries.clear()
+
+    def stats(self):
+        """Returns the counters of the table.
+
+        Returns:
+            (dictionary): size, max_entries, hits, misses, evictions and hit_rate
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'size'       : len(self.entries),
+            'max_entries': self.max_entries,
+            'hits'       : self.hits,
+            'misses'     : self.misses,
+            'evictions'  : self.evictions,
+            'hit_rate'   : self.hits / float(lookups) if lookups else 0.0
+        }